@@ -0,0 +1,47 @@
+"""
+PSL Draft Simulator - Team analytics and leaderboard
+
+"""
+from models import CATEGORY_ORDER
+
+# Leaderboard orderings: a team's analytics field, highest first
+LEADERBOARD_SORTS = ('total_rating', 'mean_rating', 'rating_per_million')
+
+
+def team_analytics(team):
+    """Strength, category mix, foreign share, budget efficiency and headroom of one team.
+
+    Everything comes from the running totals Team keeps up to date on each
+    add_player and remove_player (points, budget, foreign count, category
+    counts), so this is constant time whatever the roster size.
+    """
+    size = len(team.players)
+    return {
+        'team_id': team.id,
+        'team': team.name,
+        'players': size,
+        'total_rating': team.current_points,
+        'mean_rating': round(team.current_points / size, 1) if size else 0.0,
+        # Rating bought per PKR 1,000,000 spent
+        'rating_per_million': round(team.current_points * 1_000_000 / team.current_budget, 1) if team.current_budget else 0.0,
+        'categories': {category: team.category_counts[category] for category in CATEGORY_ORDER},
+        'foreign_share': round(team.foreign_players / size, 3) if size else 0.0,
+        'headroom': {
+            'points': team.max_points - team.current_points,
+            'budget': team.max_budget - team.current_budget,
+            'foreign_slots': 3 - team.foreign_players,
+        },
+    }
+
+
+def leaderboard(teams, sort_by='total_rating'):
+    """Every team's analytics, best first by `sort_by`, with its rank (ties share one)"""
+    rows = sorted((team_analytics(team) for team in teams),
+                  key=lambda row: (-row[sort_by], -row['total_rating'], row['team']))
+    rank = 0
+    previous = None
+    for position, row in enumerate(rows, 1):
+        if row[sort_by] != previous:
+            rank, previous = position, row[sort_by]
+        row['rank'] = rank
+    return rows
@@ -3,11 +3,31 @@ PSL Draft Simulator - Enhanced Flask Web Application with File Handling
 
 """
 #  main laburary use 
-from flask import Flask, render_template, request, redirect, url_for, flash
-from collections import deque
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g
+from flask import before_render_template, template_rendered
+from markupsafe import Markup
 import secrets
-import csv
 import os
+import io
+import time
+import zlib
+import functools
+import threading
+from urllib.parse import urlsplit
+from models import Player, CATEGORY_ORDER, DRAFT_ROUNDS, create_default_teams
+from engine import DraftEngine
+from storage import CsvStorage, JournalStorage, SqliteStorage
+from shared_log import SharedEventLog
+from events import DraftEventBroker, LiveFeedServer
+from sessions import SessionManager
+from autopick import choose_pick, picks_left
+from solver import solve_roster, team_plan
+from bulk import prepare_import, finish_import, export_rows, detect_format, validate_row
+from clock import PickClock
+from metrics import metrics, SamplingProfiler
+from fragments import FragmentCache
+from analytics import team_analytics, leaderboard, LEADERBOARD_SORTS
+from archive import DraftArchive
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
@@ -18,351 +38,363 @@ TEAMS_FILE = 'data/teams.csv'
 TEAM_PLAYERS_FILE = 'data/team_players.csv'
 DRAFT_STATE_FILE = 'data/draft_state.csv'
 
-# Create data directory if it doesn't exist
-os.makedirs('data', exist_ok=True)
+# Persistence mode: 'csv' rewrites the CSV files after every change,
+# 'journal' appends one event per change and compacts into periodic snapshots,
+# 'sqlite' updates only the changed rows of an indexed SQLite database
+PERSISTENCE_MODE = os.environ.get('PSL_PERSISTENCE', 'csv')
+JOURNAL_FILE = 'data/draft_journal.log'
+SNAPSHOT_FILE = 'data/draft_snapshot.json'
+SNAPSHOT_INTERVAL = 1000
+SQLITE_FILE = 'data/draft.db'
+
+# Shared state: several worker processes (e.g. `gunicorn -w 4`) replay one
+# SQLite event log, so a pick made on one worker is seen by all of them
+SHARED_STATE = os.environ.get('PSL_SHARED_STATE') == '1'
+SHARED_STATE_FILE = 'data/shared_state.db'
+
+# Draft sessions: independent leagues and mock drafts over the same player pool
+SESSIONS_DIR = 'data/sessions'
+SESSION_IDLE_SECONDS = 600
+MAX_ACTIVE_SESSIONS = 256
+
+# Pick clock: seconds the team on the clock has in the main draft before its
+# turn runs out (0 = untimed), and what happens then: 'skip' the turn, or
+# 'autopick' (skipping when no legal pick is left). Sessions set their own
+# pick_seconds and are always skipped.
+PICK_CLOCK_SECONDS = int(os.environ.get('PSL_PICK_SECONDS', '0'))
+PICK_CLOCK_ACTION = os.environ.get('PSL_PICK_CLOCK_ACTION', 'skip')
+MAIN_CLOCK = ('main',)
+
+# Sampling profiler: off unless PSL_PROFILE=1 (or switched on at /api/profiler);
+# requests slower than PSL_PROFILE_SLOW_MS have their stacks saved in PROFILES_DIR
+PROFILE_ON_START = os.environ.get('PSL_PROFILE') == '1'
+PROFILE_SLOW_MS = int(os.environ.get('PSL_PROFILE_SLOW_MS', '500'))
+PROFILES_DIR = 'data/profiles'
+
+# Live feed: /api/draft/stream is served on its own port by one asyncio loop
+# (events.py), so every open stream shares a single thread. Pages connect to
+# that port on the host they came from, or to PSL_LIVE_FEED_URL (e.g. a path
+# a reverse proxy forwards to the port)
+LIVE_FEED_PORT = int(os.environ.get('PSL_LIVE_FEED_PORT', '5001'))
+LIVE_FEED_URL = os.environ.get('PSL_LIVE_FEED_URL')
+
+# Finished drafts are archived here when a reset starts a new one (see archive.py)
+ARCHIVE_FILE = 'data/draft_archive.bin'
+
+# Rendered team cards kept for reuse across pages and requests (see team_fragment)
+FRAGMENT_CACHE_SIZE = 4096
+
 
 # ======================
-# PLAYER CLASS
+# EVENT FUNCTIONS
 # ======================
-class Player:
-    player_counter = 1001
-    
-    def __init__(self, name, rating, price, country="Pakistan", player_id=None):
-        if player_id:
-            self.id = player_id
-        else:
-            self.id = f"P{Player.player_counter}"
-            Player.player_counter += 1
-        self.name = name
-        self.rating = rating
-        self.price = price
-        self.country = country
-        self.is_picked = False
-        self.category = self.get_category()
-    
-    def get_category(self):
-        if self.rating > 90:
-            return "Platinum"
-        elif self.rating > 80:
-            return "Diamond"
-        elif self.rating > 60:
-            return "Silver"
-        elif self.rating > 50:
-            return "Bronze"
-        else:
-            return "Emerging"
-    
-    def get_category_order(self):
-        categories = {"Platinum": 1, "Diamond": 2, "Silver": 3, "Bronze": 4, "Emerging": 5}
-        return categories.get(self.category, 6)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'rating': self.rating,
-            'price': self.price,
-            'country': self.country,
-            'category': self.category,
-            'is_picked': self.is_picked
-        }
+def persist_event(event):
+    """Record an applied event in the shared log or the configured storage backend"""
+    metrics.inc('psl_draft_events_total', type=event['type'])
+    if engine.shared_log is not None:
+        engine.shared_seq = engine.shared_log.append(event)
+        if event['type'] == 'reset' or engine.shared_log.needs_snapshot(engine.shared_seq):
+            engine.shared_log.write_snapshot(engine.snapshot(), engine.shared_seq)
+        return
+    storage.save(event)
 
 
-# ======================
-# TEAM CLASS
-# ======================
-class Team:
-    def __init__(self, name, max_points, max_budget, password):
-        self.name = name
-        self.max_points = max_points
-        self.max_budget = max_budget
-        self.password = password
-        self.players = []
-        self.current_points = 0
-        self.current_budget = 0
-        self.foreign_players = 0
-        self.bought_categories = set()
-        self.pre_draft_count = 0
-    
-    def can_add_player(self, player, is_pre_draft=False):
-        if player.is_picked:
-            return False, "Player already picked"
-        if is_pre_draft and self.pre_draft_count >= 3:
-            return False, "Pre-draft limit reached (max 3 players)"
-        if self.current_points + player.rating > self.max_points:
-            return False, f"Points limit exceeded (Need: {player.rating}, Available: {self.max_points - self.current_points})"
-        if self.current_budget + player.price > self.max_budget:
-            return False, f"Budget limit exceeded (Need: PKR {player.price:,}, Available: PKR {self.max_budget - self.current_budget:,})"
-        if player.country != "Pakistan" and self.foreign_players >= 3:
-            return False, "Foreign player limit reached (max 3)"
-        if is_pre_draft and player.category in self.bought_categories:
-            return False, "Category already taken in pre-draft"
-        return True, "OK"
-    
-    def add_player(self, player, is_pre_draft=False):
-        self.players.append(player)
-        self.current_points += player.rating
-        self.current_budget += player.price
-        player.is_picked = True
-        if player.country != "Pakistan":
-            self.foreign_players += 1
-        if is_pre_draft:
-            self.bought_categories.add(player.category)
-            self.pre_draft_count += 1
-    
-    def remove_player(self, player):
-        self.players.remove(player)
-        self.current_points -= player.rating
-        self.current_budget -= player.price
-        player.is_picked = False
-        if player.country != "Pakistan":
-            self.foreign_players -= 1
-        if player.category in self.bought_categories:
-            self.bought_categories.remove(player.category)
-            self.pre_draft_count -= 1
-    
-    def update_budget(self, new_budget):
-        if new_budget < self.current_budget:
-            return False, f"Cannot set budget lower than current spending (PKR {self.current_budget:,})"
-        self.max_budget = new_budget
-        return True, "Budget updated successfully"
+def announce_event(event):
+    """Bump the versions of the resources an event changed and push a delta
+    to the live draft feed (also called for events made by other workers)"""
+    update_clock(MAIN_CLOCK, engine.draft_started, engine.draft_queue, PICK_CLOCK_SECONDS)
+    for resource in EVENT_RESOURCES[event['type']]:
+        state_versions[resource] += 1
+    broker.publish(event['type'], event_delta(event))
 
 
-# ======================
-# FILE HANDLING FUNCTIONS
-# ======================
-def save_players():
-    """Save all players to CSV file"""
-    with open(PLAYERS_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['id', 'name', 'rating', 'price', 'country', 'is_picked'])
-        for player in players:
-            writer.writerow([
-                player.id,
-                player.name,
-                player.rating,
-                player.price,
-                player.country,
-                player.is_picked
-            ])
-
-
-def load_players():
-    """Load players from CSV file"""
-    global players, player_dict
-    players = []
-    player_dict = {}
-    
-    if not os.path.exists(PLAYERS_FILE):
-        # Create default players if file doesn't exist
-        players = create_demo_players()
-        player_dict = {p.id: p for p in players}
-        save_players()
-        return
-    
-    with open(PLAYERS_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        max_id = 1000
-        for row in reader:
-            player = Player(
-                name=row['name'],
-                rating=int(row['rating']),
-                price=int(row['price']),
-                country=row['country'],
-                player_id=row['id']
-            )
-            player.is_picked = row['is_picked'] == 'True'
-            players.append(player)
-            player_dict[player.id] = player
-            
-            # Update counter
-            id_num = int(row['id'][1:])
-            if id_num > max_id:
-                max_id = id_num
-        
-        Player.player_counter = max_id + 1
-
-
-def save_teams():
-    """Save team configurations to CSV file"""
-    with open(TEAMS_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['name', 'max_points', 'max_budget', 'password', 'current_points', 'current_budget', 'foreign_players', 'pre_draft_count'])
-        for team in teams:
-            writer.writerow([
-                team.name,
-                team.max_points,
-                team.max_budget,
-                team.password,
-                team.current_points,
-                team.current_budget,
-                team.foreign_players,
-                team.pre_draft_count
-            ])
-
-
-def load_teams():
-    """Load teams from CSV file"""
-    global teams
-    
-    if not os.path.exists(TEAMS_FILE):
-        # Create default teams if file doesn't exist
-        teams = [
-            Team("Lahore Qalandars", 1000, 5000000, "lahore123"),
-            Team("Karachi Kings", 1000, 5000000, "karachi123"),
-            Team("Multan Sultans", 1000, 5000000, "multan123"),
-            Team("Peshawar Zalmi", 1000, 5000000, "peshawar123"),
-        ]
-        save_teams()
+def record_event(event):
+    """Persist an applied event and announce it"""
+    persist_event(event)
+    announce_event(event)
+
+
+def update_clock(key, draft_started, draft_queue, seconds):
+    """Restart a draft's pick clock when its turn changed; stop it once untimed or finished"""
+    if seconds and draft_started and draft_queue:
+        if clock.turn(key) != draft_queue.pick_index:
+            clock.start(key, draft_queue.pick_index, seconds)
+    else:
+        clock.stop(key)
+
+
+def expire_turn(key, turn):
+    """Time ran out on a turn: auto-pick or skip it, as the draft routes would"""
+    if key == MAIN_CLOCK:
+        with engine.write():
+            # Another worker (or a last-second pick) may have moved the draft on
+            if not engine.draft_queue or engine.draft_queue.pick_index != turn:
+                return
+            event = autopick_event() if PICK_CLOCK_ACTION == 'autopick' else None
+            if event is None:
+                event = {'type': 'skip'}
+            engine.apply(event)
+            record_event(event)
         return
     
-    teams = []
-    with open(TEAMS_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            team = Team(
-                name=row['name'],
-                max_points=int(row['max_points']),
-                max_budget=int(row['max_budget']),
-                password=row['password']
-            )
-            team.current_points = int(row['current_points'])
-            team.current_budget = int(row['current_budget'])
-            team.foreign_players = int(row['foreign_players'])
-            team.pre_draft_count = int(row['pre_draft_count'])
-            teams.append(team)
-
-
-def save_team_players():
-    """Save team-player assignments to CSV file"""
-    with open(TEAM_PLAYERS_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['team_name', 'player_id', 'category'])
-        for team in teams:
-            for player in team.players:
-                writer.writerow([
-                    team.name,
-                    player.id,
-                    player.category
-                ])
-                if player.category in ['Platinum', 'Diamond', 'Silver', 'Bronze', 'Emerging']:
-                    team.bought_categories.add(player.category)
-
-
-def load_team_players():
-    """Load team-player assignments from CSV file"""
-    if not os.path.exists(TEAM_PLAYERS_FILE):
-        return
+    with sessions.use(key[1]) as session:
+        if session is None or not session.draft_queue or session.draft_queue.pick_index != turn:
+            return
+        session.apply({'type': 'skip'})
+        sessions.save(session)
+        update_clock(key, session.draft_started, session.draft_queue, session.pick_seconds)
+
+
+def event_delta(event):
+    """Small description of what an event changed, for live feed subscribers"""
+    kind = event['type']
+    delta = {}
+    if kind in ('buy', 'pick', 'undo', 'redo') and event.get('player_id'):
+        team_idx = engine.event_team(event)
+        team = engine.teams[team_idx]
+        player = engine.player_dict[event['player_id']]
+        delta = {
+            'team_idx': team_idx,
+            'team_id': team.id,
+            'team': team.name,
+            'player_id': player.id,
+            'player': player.name,
+            'price': player.price,
+            'current_points': team.current_points,
+            'current_budget': team.current_budget,
+            'foreign_players': team.foreign_players
+        }
+    elif kind == 'budget':
+        delta = {'budgets': event['budgets']}
+    elif kind == 'register':
+        delta = {'player': engine.player_dict[event['player'][0]].to_dict()}
+    elif kind == 'import':
+        delta = {'imported': len(event['players'])}
+    elif kind == 'jump':
+        delta = {'position': event['position']}
+    elif kind == 'reset':
+        return delta
     
-    # Clear existing players from teams
-    for team in teams:
-        team.players = []
-        team.bought_categories = set()
-    
-    with open(TEAM_PLAYERS_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Find team and player
-            team = next((t for t in teams if t.name == row['team_name']), None)
-            player = player_dict.get(row['player_id'])
-            
-            if team and player:
-                team.players.append(player)
-                player.is_picked = True
-                team.bought_categories.add(row['category'])
-
-
-def save_draft_state():
-    """Save draft state to CSV file"""
-    with open(DRAFT_STATE_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['draft_started', 'undo_stack'])
-        writer.writerow([
-            draft_started,
-            '|'.join([f"{t},{p},{r}" for t, p, r in undo_stack])
-        ])
-
-
-def load_draft_state():
-    """Load draft state from CSV file"""
-    global draft_started, undo_stack
-    
-    if not os.path.exists(DRAFT_STATE_FILE):
-        draft_started = False
-        undo_stack = []
+    draft_queue = engine.draft_queue
+    if engine.draft_started:
+        delta['picks_remaining'] = len(draft_queue)
+        delta['next'] = None
+        if draft_queue:
+            next_round, next_team_idx = draft_queue[0]
+            next_team = engine.teams[next_team_idx]
+            delta['next'] = {'round': next_round, 'team_idx': next_team_idx, 'team': next_team.name,
+                             'limits': next_team.pick_limits(), 'deadline': clock.deadline(MAIN_CLOCK)}
+    return delta
+
+
+# API resources whose JSON changes with each kind of event
+EVENT_RESOURCES = {
+    'register': ('players',),
+    'import': ('players',),
+    'budget': ('teams', 'draft'),
+    'buy': ('players', 'teams', 'draft', 'history'),
+    'pick': ('players', 'teams', 'draft', 'history'),
+    'undo': ('players', 'teams', 'draft', 'history'),
+    'redo': ('players', 'teams', 'draft', 'history'),
+    'jump': ('players', 'teams', 'draft', 'history'),
+    'skip': ('draft', 'history'),
+    'start': ('draft',),
+    'reset': ('players', 'teams', 'draft', 'history'),
+}
+
+
+def create_storage():
+    """Build the storage backend for PERSISTENCE_MODE (the CSV files seed the others)"""
+    csv_storage = CsvStorage(engine, PLAYERS_FILE, TEAMS_FILE, TEAM_PLAYERS_FILE, DRAFT_STATE_FILE)
+    if PERSISTENCE_MODE == 'journal':
+        return JournalStorage(engine, JOURNAL_FILE, SNAPSHOT_FILE, SNAPSHOT_INTERVAL, seed=csv_storage)
+    if PERSISTENCE_MODE == 'sqlite':
+        return SqliteStorage(engine, SQLITE_FILE, seed=csv_storage)
+    return csv_storage
+
+
+def load_state():
+    """Load all data, catching up from the shared event log in shared mode"""
+    if engine.shared_log is None:
+        with metrics.timer('psl_startup_load_seconds'):
+            storage.load()
         return
-    
-    with open(DRAFT_STATE_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            draft_started = row['draft_started'] == 'True'
-            if row['undo_stack']:
-                undo_stack = []
-                for item in row['undo_stack'].split('|'):
-                    if item:
-                        parts = item.split(',')
-                        undo_stack.append((int(parts[0]), parts[1], int(parts[2])))
-            else:
-                undo_stack = []
+    # The write replays the shared log; the first worker to start seeds it
+    with engine.write():
+        if not engine.shared_log.has_snapshot():
+            storage.load()
+            engine.shared_log.write_snapshot(engine.snapshot(), 0)
+            engine.shared_seq = 0
+    engine.follow()
 
 
 # ======================
 # INITIALIZE DATA
 # ======================
-def create_demo_players():
-    return [
-        Player("Babar Azam", 95, 500000),
-        Player("Shaheen Afridi", 93, 480000),
-        Player("Mohammad Rizwan", 92, 470000),
-        Player("Naseem Shah", 88, 420000),
-        Player("Haris Rauf", 87, 410000),
-        Player("Shadab Khan", 85, 390000),
-        Player("Fakhar Zaman", 82, 370000),
-        Player("Saim Ayub", 78, 340000),
-        Player("Imad Wasim", 75, 320000),
-        Player("Usama Mir", 70, 280000),
-    ]
-
-# Global data - Load from files
-players = []
-player_dict = {}
-teams = []
-undo_stack = []
-draft_queue = deque()
-draft_started = False
-
-# Load all data on startup
-load_players()
-load_teams()
-load_team_players()
-load_draft_state()
+# Global data - all mutable draft state lives in the engine
+engine = DraftEngine(SharedEventLog(SHARED_STATE_FILE, SNAPSHOT_INTERVAL) if SHARED_STATE else None)
+engine.on_remote_event = announce_event
+# Per-resource change counters for the JSON API's ETags; BOOT_ID keeps tags
+# from before a restart (when the counters start over) from ever matching
+state_versions = {'teams': 0, 'players': 0, 'draft': 0, 'history': 0}
+BOOT_ID = secrets.token_hex(4)
+broker = DraftEventBroker(boot_id=BOOT_ID)
+live_feed = LiveFeedServer(broker)
+live_feed_error = None
+clock = PickClock(expire_turn)
+profiler = SamplingProfiler(PROFILES_DIR, PROFILE_SLOW_MS / 1000)
+if PROFILE_ON_START:
+    profiler.enable()
+fragments = FragmentCache(FRAGMENT_CACHE_SIZE)
+archive = DraftArchive(ARCHIVE_FILE)
+
+metrics.describe('psl_request_seconds', 'Request latency by route')
+metrics.describe('psl_responses_total', 'Responses by route and status code')
+metrics.describe('psl_template_seconds', 'Template rendering time')
+metrics.describe('psl_index_seconds', 'Player board sorting and filtering time')
+metrics.describe('psl_storage_seconds', 'Time spent in each persistence call')
+metrics.describe('psl_startup_load_seconds', 'Time to load the draft state on startup')
+metrics.describe('psl_draft_events_total', 'Draft events recorded by this process (picks, undos, skips...)')
+metrics.describe('psl_pick_rejections_total', 'Buys and picks refused by the team rules, by reason')
+# Created by init_state(), so that importing this module touches no files
+storage = None
+sessions = None
+state_ready = False
+state_lock = threading.Lock()
 
 ADMIN_PASSWORD = "admin123"
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Bigger rosters can stop short of a proven best within MAX_SOLVER_STEPS (benchmark.py solver)
+MAX_SOLVER_SIZE = 14
+# Players the solver tries per request, about a second of search at most
+MAX_SOLVER_STEPS = 500000
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
 
 
 # ======================
 # HELPER FUNCTIONS
 # ======================
-def create_draft_queue(total_rounds=5):
-    global draft_queue
-    draft_queue.clear()
-    num_teams = len(teams)
-    for round_num in range(1, total_rounds + 1):
-        if round_num % 2 == 1:
-            for team_idx in range(num_teams):
-                draft_queue.append((round_num, team_idx))
-        else:
-            for team_idx in range(num_teams - 1, -1, -1):
-                draft_queue.append((round_num, team_idx))
+def reads_state(view):
+    """Run a view against a consistent state, normally without waiting on writers.
+    The view may run more than once (see DraftEngine.read), so it must not flash()"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        return engine.read(lambda: view(*args, **kwargs))
+    return wrapper
+
 
+def writes_state(view):
+    """Run a view as the single writer, so its checks and its event see the same state"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with engine.write():
+            return view(*args, **kwargs)
+    return wrapper
 
-def get_available_players():
-    available = [p for p in players if not p.is_picked]
-    return sorted(available, key=lambda p: (p.get_category_order(), -p.rating))
 
+def get_available_players(limit=None, category=None, country=None):
+    with metrics.timer('psl_index_seconds', op='available'):
+        return engine.index.available(limit, category=category, country=country)
 
-def get_all_players_sorted():
-    return sorted(players, key=lambda p: (p.get_category_order(), -p.rating))
+
+def get_all_players_sorted(limit=None):
+    with metrics.timer('psl_index_seconds', op='all_players'):
+        return engine.index.all_players(limit)
+
+
+def check_pick(team, player, is_pre_draft=False):
+    """team.can_add_player, counting each refusal by its reason"""
+    can_add, message = team.can_add_player(player, is_pre_draft=is_pre_draft)
+    if not can_add:
+        # The reason without the figures in brackets, so the label values stay few
+        metrics.inc('psl_pick_rejections_total', reason=message.split(' (')[0],
+                    stage='pre_draft' if is_pre_draft else 'draft')
+    return can_add, message
+
+
+def get_player_page(args, include_picked=False):
+    """Return one filtered, cursor-paged slice of the board for a query string"""
+    filters = {}
+    for key, param in (('name_prefix', 'name'), ('category', 'category'), ('country', 'country')):
+        value = args.get(param, '').strip()
+        if value:
+            filters[key] = value
+    for key in ('min_rating', 'max_rating', 'min_price', 'max_price'):
+        value = args.get(key, type=int)
+        if value is not None:
+            filters[key] = value
+    per_page = min(max(args.get('per_page', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    
+    with metrics.timer('psl_index_seconds', op='page'):
+        try:
+            players_page, prev_cursor, next_cursor = engine.index.page(
+                per_page, after=args.get('after') or None, before=args.get('before') or None,
+                include_picked=include_picked, **filters)
+        except ValueError:
+            # Malformed cursor: start from the first page
+            players_page, prev_cursor, next_cursor = engine.index.page(
+                per_page, include_picked=include_picked, **filters)
+    
+    query = {param: args[param] for param in ('name', 'category', 'country', 'min_rating', 'max_rating',
+                                              'min_price', 'max_price', 'per_page') if args.get(param)}
+    return {
+        'players': players_page,
+        'prev_cursor': prev_cursor,
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'query': query,
+        'per_page': per_page,
+        'categories': list(CATEGORY_ORDER),
+    }
+
+
+def autopick_event():
+    """Pick event for the best legal player for the team on the clock, or None"""
+    current_round, current_team_idx = engine.draft_queue[0]
+    team = engine.teams[current_team_idx]
+    player = choose_pick(team, engine.index, picks_left(engine.draft_queue, current_team_idx))
+    if player is None:
+        return None
+    return {'type': 'pick', 'team_id': team.id, 'player_id': player.id, 'round': current_round}
+
+
+def archive_draft():
+    """Add the main draft's picks to the archive; returns how many were archived"""
+    picks = []
+    for entry in engine.history.applied():
+        if entry.kind != 'pick':
+            continue
+        player = engine.player_dict[entry.player_id]
+        # Picks recorded before the cursor was kept have no position: number them in order
+        pick_number = entry.pick_index + 1 if entry.pick_index is not None else len(picks) + 1
+        picks.append((pick_number, entry.round, engine.team_index[entry.team_id],
+                      player.id, player.name, player.rating, player.price))
+    if picks:
+        archive.append(picks, [team.id for team in engine.teams], engine.draft_queue.total_rounds)
+    return len(picks)
+
+
+def import_players(stream, fmt, dry_run=False):
+    """Validate a CSV/JSONL stream and add its new players as one 'import' event.
+
+    The file is parsed and checked against a copy of the pool before the
+    write lock is taken, so picks go on during a big import. Under the lock
+    the rows are only checked against players added meanwhile and numbered.
+    """
+    pool = engine.players
+    checked = len(pool)
+    rows, report = prepare_import(stream, fmt, pool[:checked])
+    with engine.write():
+        # The pool only grows in place; a reset or reload replaces the list, so check it all
+        added = engine.players[checked:] if engine.players is pool else engine.players
+        rows = finish_import(rows, report, engine.player_dict, added, Player.player_counter)
+        if rows and not dry_run:
+            event = {'type': 'import', 'players': rows}
+            engine.apply(event)
+            record_event(event)  # One write for the whole file
+    return report
 
 
 def get_category_color(category):
@@ -380,41 +412,158 @@ def format_currency(amount):
     return f"PKR {amount:,}"
 
 
+def team_fragment(template_name, team):
+    """One team's card from a fragment template, rendered again only when the team changed"""
+    def render():
+        template = app.jinja_env.get_template(template_name)
+        return Markup(template.render(team=team, analytics=team_analytics(team),
+                                      get_category_color=get_category_color, format_currency=format_currency))
+    return fragments.get((template_name, team.version), render)
+
+
+# ======================
+# APP FACTORY
+# ======================
+def init_state():
+    """Create the data directory and storage backend and load all data, once.
+    Runs on the first request, or up front from create_app()"""
+    global storage, sessions, state_ready
+    if state_ready:
+        return
+    with state_lock:
+        if state_ready:
+            return
+        os.makedirs('data', exist_ok=True)
+        storage = create_storage()
+        sessions = SessionManager(lambda: engine.players, SESSIONS_DIR, SESSION_IDLE_SECONDS, MAX_ACTIVE_SESSIONS)
+        load_state()
+        # A restart gives the turn on the clock its full time again
+        update_clock(MAIN_CLOCK, engine.draft_started, engine.draft_queue, PICK_CLOCK_SECONDS)
+        # Index names for the typeahead off the startup path (a search meanwhile waits for it)
+        threading.Thread(target=engine.search.warm, name='search-index', daemon=True).start()
+        state_ready = True
+
+
+def start_live_feed():
+    """Start the live feed server once; False when its port could not be bound.
+    Called from requests, so only a process that serves them (not the
+    reloader's watcher) takes the port; shared-state workers share it."""
+    global live_feed_error
+    if not live_feed.running and live_feed_error is None:
+        try:
+            live_feed.start(port=LIVE_FEED_PORT, reuse_port=SHARED_STATE)
+        except OSError as e:
+            live_feed_error = e
+            app.logger.warning('Live feed not started on port %s: %s', LIVE_FEED_PORT, e)
+    return live_feed.running
+
+
+def live_feed_url():
+    """Where a browser opens the live feed, or None when it is not running"""
+    if not start_live_feed():
+        return None
+    if LIVE_FEED_URL:
+        return LIVE_FEED_URL
+    host = urlsplit(request.host_url).hostname
+    if ':' in host:
+        host = f'[{host}]'
+    return f"{request.scheme}://{host}:{live_feed.port}{LiveFeedServer.PATH}"
+
+
+def create_app():
+    """The app with its state loaded, e.g. `gunicorn 'app:create_app()'`
+    (`app:app` works too and loads on the first request)"""
+    init_state()
+    return app
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    profiler.begin()
+
+
+@app.after_request
+def count_response(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.inc('psl_responses_total', route=route, status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def observe_request(exc):
+    if 'request_start' not in g:
+        return
+    seconds = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe('psl_request_seconds', seconds, route=route, method=request.method)
+    profiler.end(f"{request.method} {route}", seconds)
+
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.template_start = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def observe_template(sender, template, context, **extra):
+    metrics.observe('psl_template_seconds', time.perf_counter() - g.template_start, template=template.name)
+
+
+@app.before_request
+def ensure_state():
+    init_state()
+
+
+@app.before_request
+def sync_state():
+    # Pick up events committed by other workers (no-op with a single process)
+    engine.sync()
+
+
 # ======================
 # ROUTES
 # ======================
 
 @app.route('/')
+@reads_state
 def index():
-    return render_template('index.html', teams=teams, draft_started=draft_started, format_currency=format_currency)
+    return render_template('index.html', teams=engine.teams, draft_started=engine.draft_started,
+                           format_currency=format_currency, team_fragment=team_fragment)
 
 
 @app.route('/budget_allocation')
+@reads_state
 def budget_allocation():
-    return render_template('budget_allocation.html', teams=teams, format_currency=format_currency, ADMIN_PASSWORD=ADMIN_PASSWORD)
+    return render_template('budget_allocation.html', teams=engine.teams, format_currency=format_currency, ADMIN_PASSWORD=ADMIN_PASSWORD)
 
 
 @app.route('/update_team_budget', methods=['POST'])
+@writes_state
 def update_team_budget():
     admin_password = request.form.get('admin_password')
-    team_idx = int(request.form.get('team_idx'))
+    team_id = request.form.get('team_id')
     new_budget = request.form.get('new_budget')
     
     if admin_password != ADMIN_PASSWORD:
         flash('❌ Incorrect admin password', 'error')
         return redirect(url_for('budget_allocation'))
     
+    if team_id not in engine.team_index:
+        flash('❌ Invalid team', 'error')
+        return redirect(url_for('budget_allocation'))
+    
     try:
         new_budget = int(new_budget)
         if new_budget < 0:
             flash('❌ Budget cannot be negative', 'error')
             return redirect(url_for('budget_allocation'))
         
-        team = teams[team_idx]
+        team = engine.teams[engine.team_index[team_id]]
         success, message = team.update_budget(new_budget)
         
         if success:
-            save_teams()  # Save after budget update
+            record_event({'type': 'budget', 'budgets': [[team_id, new_budget]]})
             flash(f'✅ {team.name} budget updated to {format_currency(new_budget)}', 'success')
         else:
             flash(f'❌ {message}', 'error')
@@ -425,6 +574,7 @@ def update_team_budget():
 
 
 @app.route('/update_all_budgets', methods=['POST'])
+@writes_state
 def update_all_budgets():
     admin_password = request.form.get('admin_password')
     
@@ -433,16 +583,18 @@ def update_all_budgets():
         return redirect(url_for('budget_allocation'))
     
     try:
-        updated_count = 0
-        for idx, team in enumerate(teams):
-            budget_value = request.form.get(f'budget_{idx}')
+        updated = []
+        for team in engine.teams:
+            budget_value = request.form.get(f'budget_{team.id}')
             if budget_value:
                 new_budget = int(budget_value)
                 if new_budget >= team.current_budget:
-                    team.max_budget = new_budget
-                    updated_count += 1
+                    updated.append([team.id, new_budget])
         
-        save_teams()  # Save after updating all budgets
+        event = {'type': 'budget', 'budgets': updated}
+        engine.apply(event)
+        record_event(event)  # Save after updating all budgets
+        updated_count = len(updated)
         flash(f'✅ Updated budgets for {updated_count} team(s)', 'success')
     except ValueError:
         flash('❌ Invalid budget value(s)', 'error')
@@ -451,74 +603,117 @@ def update_all_budgets():
 
 
 @app.route('/players')
+@reads_state
 def view_players():
-    sorted_players = get_all_players_sorted()
-    return render_template('players.html', players=sorted_players, get_category_color=get_category_color, format_currency=format_currency)
+    return render_players_page()
+
+
+def render_players_page():
+    page = get_player_page(request.args, include_picked=True)
+    return render_template('players.html', players=page['players'], page=page,
+                           total_count=len(engine.index), available_count=engine.index.available_count(),
+                           get_category_color=get_category_color, format_currency=format_currency)
 
 
 @app.route('/register_player', methods=['POST'])
+@writes_state
 def register_player():
-    name = request.form.get('name')
-    rating = request.form.get('rating')
-    price = request.form.get('price')
-    country = request.form.get('country', 'Pakistan')
+    # Checked before the pool changes, so a bad form leaves nothing behind
+    try:
+        _, name, rating, price, country = validate_row(request.form)
+    except ValueError as e:
+        flash(f'❌ {e}', 'error')
+        return render_players_page(), 400
     
+    counter = Player.player_counter
+    event = {'type': 'register', 'player': [f'P{counter}', name, rating, price, country]}
+    engine.apply(event)
     try:
-        rating = int(rating)
-        price = int(price)
-        new_player = Player(name, rating, price, country)
-        players.append(new_player)
-        player_dict[new_player.id] = new_player
-        save_players()  # Save after registering player
-        flash(f'✅ Player {name} registered successfully! (Category: {new_player.category})', 'success')
-    except ValueError:
-        flash('❌ Invalid rating or price value', 'error')
+        persist_event(event)
+    except Exception:
+        # Not saved, so not registered: take the player back out of the pool
+        engine.remove_from_pool(event['player'][0])
+        Player.player_counter = counter
+        raise
+    announce_event(event)
     
+    new_player = engine.player_dict[event['player'][0]]
+    flash(f'✅ Player {name} registered successfully! (Category: {new_player.category})', 'success')
+    return redirect(url_for('view_players'))
+
+
+@app.route('/import_players', methods=['POST'])
+def import_players_upload():
+    upload = request.files.get('file')
+    if request.form.get('admin_password') != ADMIN_PASSWORD:
+        flash('❌ Incorrect admin password', 'error')
+        return redirect(url_for('view_players'))
+    if upload is None or not upload.filename:
+        flash('❌ Choose a CSV or JSONL file to import', 'error')
+        return redirect(url_for('view_players'))
+    
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+    try:
+        report = import_players(stream, detect_format(upload.filename))
+    except UnicodeDecodeError:
+        flash('❌ File is not UTF-8 text', 'error')
+        return redirect(url_for('view_players'))
+    
+    flash(f'📥 Imported {report.imported} of {report.rows} rows '
+          f'({report.duplicates} duplicates, {report.error_count} errors)',
+          'success' if report.imported else 'info')
+    for line_number, message in report.errors[:10]:
+        flash(f'❌ Line {line_number}: {message}', 'error')
     return redirect(url_for('view_players'))
 
 
 @app.route('/teams')
+@reads_state
 def view_teams():
-    return render_template('teams.html', teams=teams, get_category_color=get_category_color, format_currency=format_currency)
+    return render_template('teams.html', teams=engine.teams, standings=leaderboard(engine.teams),
+                           format_currency=format_currency, team_fragment=team_fragment)
 
 
 @app.route('/pre_draft')
+@reads_state
 def pre_draft():
-    available = get_available_players()
-    return render_template('pre_draft.html', teams=teams, players=available, get_category_color=get_category_color, format_currency=format_currency)
+    page = get_player_page(request.args)
+    return render_template('pre_draft.html', teams=engine.teams, players=page['players'], page=page,
+                           available_count=engine.index.available_count(),
+                           get_category_color=get_category_color, format_currency=format_currency)
 
 
 @app.route('/pre_draft_buy', methods=['POST'])
+@writes_state
 def pre_draft_buy():
-    team_idx = int(request.form.get('team_idx'))
+    team_id = request.form.get('team_id')
     password = request.form.get('password')
     player_id = request.form.get('player_id')
     
-    team = teams[team_idx]
+    if team_id not in engine.team_index:
+        flash('❌ Invalid team', 'error')
+        return redirect(url_for('pre_draft'))
+    
+    team = engine.teams[engine.team_index[team_id]]
     
     if password != team.password:
         flash('❌ Incorrect password', 'error')
         return redirect(url_for('pre_draft'))
     
-    if player_id not in player_dict:
+    if player_id not in engine.player_dict:
         flash('❌ Invalid player', 'error')
         return redirect(url_for('pre_draft'))
     
-    player = player_dict[player_id]
-    can_add, message = team.can_add_player(player, is_pre_draft=True)
+    player = engine.player_dict[player_id]
+    can_add, message = check_pick(team, player, is_pre_draft=True)
     
     if not can_add:
         flash(f'❌ {message}', 'error')
         return redirect(url_for('pre_draft'))
     
-    team.add_player(player, is_pre_draft=True)
-    undo_stack.append((team_idx, player_id, 0))
-    
-    # Save changes
-    save_players()
-    save_teams()
-    save_team_players()
-    save_draft_state()
+    event = {'type': 'buy', 'team_id': team_id, 'player_id': player_id}
+    engine.apply(event)
+    record_event(event)  # Save changes
     
     flash(f'✅ {team.name} bought {player.name} for {format_currency(player.price)}!', 'success')
     
@@ -526,155 +721,566 @@ def pre_draft_buy():
 
 
 @app.route('/start_draft', methods=['POST'])
+@writes_state
 def start_draft():
-    global draft_started
-    
     password = request.form.get('admin_password')
     
     if password != ADMIN_PASSWORD:
         flash('❌ Incorrect admin password', 'error')
         return redirect(url_for('index'))
     
-    create_draft_queue()
-    draft_started = True
-    save_draft_state()  # Save draft state
+    event = {'type': 'start', 'rounds': DRAFT_ROUNDS}
+    engine.apply(event)
+    record_event(event)  # Save draft state
     flash('🎯 Draft started successfully!', 'success')
     return redirect(url_for('draft'))
 
 
 @app.route('/draft')
 def draft():
-    if not draft_started:
+    feed_url = live_feed_url()
+    response = engine.read(lambda: render_draft(feed_url))
+    if response is None:
+        # Flashed outside the read, which may run more than once
         flash('❌ Draft not started yet', 'error')
         return redirect(url_for('index'))
+    return response
+
+
+def render_draft(feed_url):
+    """The draft board, a redirect once the draft is over, or None before it starts"""
+    if not engine.draft_started:
+        return None
     
+    draft_queue = engine.draft_queue
     if not draft_queue:
         return redirect(url_for('draft_finished'))
     
     current_round, current_team_idx = draft_queue[0]
-    current_team = teams[current_team_idx]
-    available = get_available_players()
+    current_team = engine.teams[current_team_idx]
+    page = get_player_page(request.args)
     
     return render_template('draft.html',
                          current_team=current_team,
                          current_round=current_round,
-                         available_players=available,
-                         teams=teams,
+                         limits=current_team.pick_limits(),
+                         history=engine.history,
+                         deadline=clock.deadline(MAIN_CLOCK),
+                         now=time.time(),
+                         available_players=page['players'],
+                         page=page,
+                         available_count=engine.index.available_count(),
+                         teams=engine.teams,
+                         standings=leaderboard(engine.teams),
                          get_category_color=get_category_color,
                          format_currency=format_currency,
+                         team_fragment=team_fragment,
+                         live_feed_url=feed_url,
                          total_picks=len(draft_queue))
 
 
 @app.route('/draft_pick', methods=['POST'])
+@writes_state
 def draft_pick():
     player_id = request.form.get('player_id')
     
-    if not draft_queue:
+    if not engine.draft_queue:
         flash('❌ Draft already finished', 'error')
         return redirect(url_for('draft_finished'))
     
-    current_round, current_team_idx = draft_queue[0]
-    team = teams[current_team_idx]
+    current_round, current_team_idx = engine.draft_queue[0]
+    team = engine.teams[current_team_idx]
     
-    if player_id not in player_dict:
+    if player_id not in engine.player_dict:
         flash('❌ Invalid player', 'error')
         return redirect(url_for('draft'))
     
-    player = player_dict[player_id]
-    can_add, message = team.can_add_player(player)
+    player = engine.player_dict[player_id]
+    can_add, message = check_pick(team, player)
     
     if not can_add:
         flash(f'❌ {message}', 'error')
         return redirect(url_for('draft'))
     
-    team.add_player(player)
-    undo_stack.append((current_team_idx, player_id, current_round))
-    draft_queue.popleft()
-    
-    # Save changes
-    save_players()
-    save_teams()
-    save_team_players()
-    save_draft_state()
+    event = {'type': 'pick', 'team_id': team.id, 'player_id': player_id, 'round': current_round}
+    engine.apply(event)
+    record_event(event)  # Save changes
     
     flash(f'✅ {team.name} picked {player.name} for {format_currency(player.price)}!', 'success')
     
-    if draft_queue:
+    if engine.draft_queue:
+        return redirect(url_for('draft'))
+    else:
+        return redirect(url_for('draft_finished'))
+
+
+@app.route('/draft_autopick', methods=['POST'])
+@writes_state
+def draft_autopick():
+    if not engine.draft_queue:
+        flash('❌ Draft already finished', 'error')
+        return redirect(url_for('draft_finished'))
+    
+    event = autopick_event()
+    if event is None:
+        team = engine.teams[engine.draft_queue[0][1]]
+        flash(f'❌ No legal pick left for {team.name}', 'error')
+        return redirect(url_for('draft'))
+    
+    engine.apply(event)
+    record_event(event)  # Save changes
+    
+    team = engine.teams[engine.event_team(event)]
+    player = engine.player_dict[event['player_id']]
+    flash(f'🤖 {team.name} auto-picked {player.name} for {format_currency(player.price)}!', 'success')
+    
+    if engine.draft_queue:
         return redirect(url_for('draft'))
     else:
         return redirect(url_for('draft_finished'))
 
 
 @app.route('/draft_skip', methods=['POST'])
+@writes_state
 def draft_skip():
-    if draft_queue:
-        draft_queue.popleft()
+    if engine.draft_queue:
+        event = {'type': 'skip'}
+        engine.apply(event)
+        record_event(event)
         flash('⏭️ Turn skipped', 'info')
     
-    if draft_queue:
+    if engine.draft_queue:
         return redirect(url_for('draft'))
     else:
         return redirect(url_for('draft_finished'))
 
 
 @app.route('/draft_undo', methods=['POST'])
+@writes_state
 def draft_undo():
-    if not undo_stack:
+    entry = engine.history.last()
+    if entry is None:
         flash('❌ Nothing to undo', 'error')
         return redirect(url_for('draft'))
     
-    team_idx, player_id, round_num = undo_stack.pop()
-    team = teams[team_idx]
-    player = player_dict[player_id]
+    team = engine.teams[engine.team_index[entry.team_id]]
+    event = {'type': 'undo', 'team_id': entry.team_id, 'player_id': entry.player_id}
+    engine.apply(event)
+    record_event(event)  # Save changes
     
-    team.remove_player(player)
+    if entry.kind == 'skip':
+        flash(f'↩️ Undone: skipped turn for {team.name}', 'info')
+    else:
+        flash(f'↩️ Undone: {engine.player_dict[entry.player_id].name} removed from {team.name}', 'info')
     
-    # Save changes
-    save_players()
-    save_teams()
-    save_team_players()
-    save_draft_state()
+    return redirect(url_for('draft'))
+
+
+@app.route('/draft_redo', methods=['POST'])
+@writes_state
+def draft_redo():
+    if not engine.history.can_redo():
+        flash('❌ Nothing to redo', 'error')
+        return redirect(url_for('draft'))
     
-    flash(f'↩️ Undone: {player.name} removed from {team.name}', 'info')
+    entry = engine.history.entries[engine.history.position]
+    team = engine.teams[engine.team_index[entry.team_id]]
+    event = {'type': 'redo', 'team_id': entry.team_id, 'player_id': entry.player_id}
+    engine.apply(event)
+    record_event(event)
     
-    return redirect(url_for('draft'))
+    if entry.kind == 'skip':
+        flash(f'↪️ Redone: skipped turn for {team.name}', 'info')
+    else:
+        flash(f'↪️ Redone: {engine.player_dict[entry.player_id].name} back to {team.name}', 'info')
+    
+    if engine.draft_queue or not engine.draft_started:
+        return redirect(url_for('draft'))
+    else:
+        return redirect(url_for('draft_finished'))
+
+
+@app.route('/draft_jump', methods=['POST'])
+@writes_state
+def draft_jump():
+    """Move the draft to just after history entry N (0 = before the first buy)"""
+    if request.form.get('admin_password') != ADMIN_PASSWORD:
+        flash('❌ Incorrect admin password', 'error')
+        return redirect(url_for('draft'))
+    
+    try:
+        position = int(request.form.get('position'))
+    except (TypeError, ValueError):
+        position = -1
+    if not 0 <= position <= len(engine.history):
+        flash(f'❌ Position must be between 0 and {len(engine.history)}', 'error')
+        return redirect(url_for('draft'))
+    
+    if position != engine.history.position:
+        event = {'type': 'jump', 'position': position}
+        engine.apply(event)
+        record_event(event)
+    flash(f'⏩ Draft moved to action {position} of {len(engine.history)}', 'info')
+    
+    if engine.draft_queue or not engine.draft_started:
+        return redirect(url_for('draft'))
+    else:
+        return redirect(url_for('draft_finished'))
 
 
 @app.route('/draft_finished')
+@reads_state
 def draft_finished():
-    return render_template('draft_finished.html', teams=teams, get_category_color=get_category_color, format_currency=format_currency)
+    return render_template('draft_finished.html', teams=engine.teams, standings=leaderboard(engine.teams),
+                           format_currency=format_currency, team_fragment=team_fragment)
 
 
 @app.route('/reset', methods=['POST'])
+@writes_state
 def reset():
-    global draft_started, players, player_dict, teams, undo_stack, draft_queue
-    
-    # Reset data
-    Player.player_counter = 1001
-    players = create_demo_players()
-    player_dict = {p.id: p for p in players}
-    
-    teams = [
-        Team("Lahore Qalandars", 1000, 5000000, "lahore123"),
-        Team("Karachi Kings", 1000, 5000000, "karachi123"),
-        Team("Multan Sultans", 1000, 5000000, "multan123"),
-        Team("Peshawar Zalmi", 1000, 5000000, "peshawar123"),
-    ]
-    
-    undo_stack.clear()
-    draft_queue.clear()
-    draft_started = False
-    
-    # Save reset data to files
-    save_players()
-    save_teams()
-    save_team_players()
-    save_draft_state()
-    
-    flash('🔄 Application reset successfully!', 'success')
+    # A finished draft is archived before the reset wipes it
+    archived = archive_draft() if engine.draft_started and not engine.draft_queue else 0
+    # Reset data (and compact the journal or shared log into a fresh snapshot)
+    event = {'type': 'reset'}
+    engine.apply(event)
+    record_event(event)
+    
+    if archived:
+        flash(f'🔄 Application reset successfully! The finished draft ({archived} picks) was archived.', 'success')
+    else:
+        flash('🔄 Application reset successfully!', 'success')
     return redirect(url_for('index'))
 
 
+
+# ======================
+# JSON API
+# ======================
+def conditional_json(resource, build):
+    """Serve `build()` as JSON tagged with the resource's version.
+
+    The ETag is derived from the version counter alone, so a poll whose
+    If-None-Match is still current gets a bodiless 304 without `build`
+    ever running (no sorting, serializing or template work).
+    """
+    version = state_versions[resource]
+    etag = f"{resource}-{BOOT_ID}-{version}-{zlib.crc32(request.query_string):08x}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(dict(engine.read(build), version=version))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def draft_status():
+    """Compact description of the pick on the clock"""
+    draft_queue = engine.draft_queue
+    status = {
+        'started': engine.draft_started,
+        'finished': engine.draft_started and not draft_queue,
+        'pick_index': draft_queue.pick_index,
+        'picks_remaining': len(draft_queue),
+        'pick_seconds': PICK_CLOCK_SECONDS,
+        'current': None
+    }
+    if engine.draft_started and draft_queue:
+        current_round, current_team_idx = draft_queue[0]
+        status['current'] = {
+            'round': current_round,
+            'team_idx': current_team_idx,
+            'team': engine.teams[current_team_idx].to_dict(),
+            'limits': engine.teams[current_team_idx].pick_limits(),
+            # Unix time the turn runs out (None when untimed); fixed per turn, so the ETag stays valid
+            'deadline': clock.deadline(MAIN_CLOCK)
+        }
+    return status
+
+
+@app.route('/api/teams')
+def api_teams():
+    return conditional_json('teams', lambda: {
+        'teams': [dict(team.to_dict(), idx=idx) for idx, team in enumerate(engine.teams)]
+    })
+
+
+@app.route('/api/leaderboard')
+def api_leaderboard():
+    """Teams ranked by total rating (or ?sort=mean_rating, rating_per_million), with their analytics"""
+    sort_by = request.args.get('sort', 'total_rating')
+    if sort_by not in LEADERBOARD_SORTS:
+        return jsonify({'error': f"sort must be one of {', '.join(LEADERBOARD_SORTS)}"}), 400
+    return conditional_json('teams', lambda: {'sort': sort_by, 'leaderboard': leaderboard(engine.teams, sort_by)})
+
+
+@app.route('/api/archive/<query>')
+def api_archive(query):
+    """Statistics across archived drafts: adp, rounds (pick rate by round) or trends (price per rating point)"""
+    top = min(max(request.args.get('top', 50, type=int), 1), 1000)
+    if query == 'adp':
+        result = archive.adp(top, max(request.args.get('min_drafted', 1, type=int), 1))
+    elif query == 'rounds':
+        result = archive.round_rates(request.args.get('player_id'), top)
+    elif query == 'trends':
+        result = archive.price_trends(max(request.args.get('window', 100, type=int), 1))
+    else:
+        return jsonify({'error': 'Unknown archive query'}), 404
+    return jsonify(dict(archive.summary(), result=result))
+
+
+@app.route('/api/players')
+def api_players():
+    def build():
+        page = get_player_page(request.args, include_picked=request.args.get('include_picked') == '1')
+        return {
+            'players': [p.to_dict() for p in page['players']],
+            'prev_cursor': page['prev_cursor'],
+            'next_cursor': page['next_cursor'],
+            'total_count': len(engine.index),
+            'available_count': engine.index.available_count()
+        }
+    return conditional_json('players', build)
+
+
+@app.route('/api/players/search')
+def api_players_search():
+    """Typeahead: the best available players for a partial name or country (`q`)"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', SEARCH_LIMIT, type=int), 1), MAX_SEARCH_LIMIT)
+
+    def build():
+        with metrics.timer('psl_index_seconds', op='search'):
+            players = engine.search.search(query, limit)
+        return {'query': query, 'players': [p.to_dict() for p in players]}
+    return conditional_json('players', build)
+
+
+@app.route('/api/draft')
+def api_draft():
+    return conditional_json('draft', draft_status)
+
+
+@app.route('/api/draft/stream')
+def api_draft_stream():
+    """Server-Sent Events feed of draft deltas, served by the live feed server on its own port"""
+    feed_url = live_feed_url()
+    if feed_url is None:
+        return jsonify({'error': 'Live feed is not running'}), 503
+    return redirect(feed_url, code=307)
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Counters and latency histograms in the Prometheus text format"""
+    def sizes():
+        return len(engine.players), engine.index.available_count(), len(engine.history)
+    pool_size, available, history_size = engine.read(sizes)
+    metrics.set('psl_players', pool_size)
+    metrics.set('psl_players_available', available)
+    metrics.set('psl_history_entries', history_size)
+    metrics.set('psl_active_sessions', sessions.active_count())
+    metrics.set('psl_timed_drafts', len(clock))
+    metrics.set('psl_live_feed_connections', live_feed.connection_count())
+    metrics.set('psl_fragment_cache_entries', len(fragments))
+    metrics.set('psl_fragment_cache_hits', fragments.hits)
+    metrics.set('psl_fragment_cache_misses', fragments.misses)
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/profiler', methods=['GET', 'POST'])
+def api_profiler():
+    """Show or switch the sampling profiler (admin password to switch)"""
+    if request.method == 'POST':
+        data = request_data()
+        if data.get('admin_password') != ADMIN_PASSWORD:
+            return jsonify({'error': 'Incorrect admin password'}), 403
+        if str(data.get('enabled', '')).lower() in ('1', 'true', 'on'):
+            slow_ms = data.get('slow_ms')
+            try:
+                profiler.enable(int(slow_ms) / 1000 if slow_ms is not None else None)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'slow_ms must be a number of milliseconds'}), 400
+        else:
+            profiler.disable()
+    return jsonify({
+        'enabled': profiler.enabled,
+        'slow_ms': round(profiler.slow_seconds * 1000),
+        'interval_ms': profiler.interval * 1000,
+        'directory': PROFILES_DIR,
+        'profiles_written': profiler.dumped
+    })
+
+
+@app.route('/api/solver')
+def api_solver():
+    """Highest-rated rosters a team can still buy pre-draft (or `size` more players)"""
+    team_idx = engine.team_index.get(request.args.get('team_id'), request.args.get('team_idx', type=int))
+    if team_idx is None or not 0 <= team_idx < len(engine.teams):
+        return jsonify({'error': 'Invalid team'}), 400
+    size = request.args.get('size', type=int)
+    if size is not None and not 1 <= size <= MAX_SOLVER_SIZE:
+        return jsonify({'error': f'size must be between 1 and {MAX_SOLVER_SIZE}'}), 400
+    top = min(max(request.args.get('top', 5, type=int), 1), 50)
+
+    def snapshot():
+        team = engine.teams[team_idx]
+        return team.name, team_plan(team, size), engine.index.available()
+
+    # The search runs on a copy, so picks made meanwhile neither wait for it nor restart it
+    team_name, plan, players = engine.read(snapshot)
+    rosters, complete = solve_roster(players, top=top, max_steps=MAX_SOLVER_STEPS, **plan)
+    return jsonify({
+        'team': team_name,
+        'mode': 'pre_draft' if size is None else 'roster',
+        'complete': complete,
+        'rosters': [{
+            'players': [p.to_dict() for p in roster['players']],
+            'total_rating': roster['total_rating'],
+            'total_price': roster['total_price']
+        } for roster in rosters]
+    })
+
+
+@app.route('/api/players/export')
+def api_players_export():
+    """Stream the whole pool as CSV or JSON lines without building the file in memory"""
+    fmt = 'jsonl' if request.args.get('format') == 'jsonl' else 'csv'
+    players = engine.read(lambda: list(engine.players))
+    mimetype = 'application/x-ndjson' if fmt == 'jsonl' else 'text/csv'
+    return app.response_class(export_rows(players, fmt), mimetype=mimetype,
+                              headers={'Content-Disposition': f'attachment; filename=players.{fmt}'})
+
+
+@app.route('/api/history')
+def api_history():
+    return conditional_json('history', lambda: {
+        'entries': [{'kind': e.kind, 'team_id': e.team_id, 'team_idx': engine.team_index[e.team_id],
+                     'player_id': e.player_id, 'round': e.round, 'pick_index': e.pick_index}
+                    for e in engine.history.entries],
+        'position': engine.history.position,
+        'can_undo': engine.history.can_undo(),
+        'can_redo': engine.history.can_redo()
+    })
+
+
+
+# ======================
+# DRAFT SESSIONS API
+# ======================
+def session_error(message, status=400):
+    return jsonify({'error': message}), status
+
+
+def request_data():
+    """Fields of a JSON body or a submitted form"""
+    return request.get_json(silent=True) or request.form
+
+
+def session_status(session):
+    """A session's status plus when its turn on the clock runs out"""
+    return dict(session.status(), deadline=clock.deadline(('session', session.id)))
+
+
+@app.route('/api/sessions', methods=['GET', 'POST'])
+def api_sessions():
+    if request.method == 'GET':
+        return jsonify({'sessions': sessions.list_ids(), 'active': sessions.active_count()})
+    
+    data = request_data()
+    admin_password = data.get('admin_password')
+    if not admin_password:
+        return session_error('admin_password is required')
+    try:
+        if data.get('teams'):
+            teams = [(t['name'], int(t.get('max_points', 1000)), int(t.get('max_budget', 5000000)), t['password'])
+                     for t in data['teams']]
+        else:
+            teams = [(t.name, t.max_points, t.max_budget, t.password) for t in create_default_teams()]
+        rounds = int(data.get('rounds', DRAFT_ROUNDS))
+        pick_seconds = int(data.get('pick_seconds', 0))
+        if pick_seconds < 0:
+            raise ValueError("pick_seconds must not be negative")
+        session = sessions.create(data.get('id') or secrets.token_urlsafe(8), admin_password, teams, rounds,
+                                  pick_seconds)
+    except (KeyError, TypeError, ValueError) as e:
+        return session_error(str(e))
+    return jsonify(session_status(session)), 201
+
+
+@app.route('/api/sessions/<session_id>')
+def api_session(session_id):
+    with sessions.use(session_id) as session:
+        if session is None:
+            return session_error('Session not found', 404)
+        return jsonify(session_status(session))
+
+
+@app.route('/api/sessions/<session_id>/players')
+def api_session_players(session_id):
+    limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    with sessions.use(session_id) as session:
+        if session is None:
+            return session_error('Session not found', 404)
+        players = session.available(limit, category=request.args.get('category') or None)
+        return jsonify({
+            'players': [dict(p.to_dict(), is_picked=False) for p in players],
+            'available_count': session.available_count()
+        })
+
+
+@app.route('/api/sessions/<session_id>/<action>', methods=['POST'])
+def api_session_action(session_id, action):
+    """Start, buy, pick, skip or undo in one session"""
+    data = request_data()
+    
+    with sessions.use(session_id) as session:
+        if session is None:
+            return session_error('Session not found', 404)
+        if action == 'start':
+            if data.get('admin_password') != session.admin_password:
+                return session_error('Incorrect admin password', 403)
+            if session.draft_started:
+                return session_error('Draft already started', 409)
+            event = {'type': 'start'}
+        elif action in ('buy', 'pick'):
+            player = session.catalog.get(data.get('player_id'))
+            if player is None:
+                return session_error('Invalid player')
+            if action == 'buy':
+                try:
+                    team_idx = int(data.get('team_idx'))
+                    team = session.teams[team_idx]
+                except (TypeError, ValueError, IndexError):
+                    return session_error('Invalid team')
+                if data.get('password') != team.password:
+                    return session_error('Incorrect password', 403)
+                event = {'type': 'buy', 'team_idx': team_idx, 'player_id': player.id}
+            else:
+                if not session.draft_started or not session.draft_queue:
+                    return session_error('Draft not in progress', 409)
+                current_round, team_idx = session.draft_queue[0]
+                team = session.teams[team_idx]
+                event = {'type': 'pick', 'team_idx': team_idx, 'player_id': player.id, 'round': current_round}
+            can_add, message = check_pick(team, player, is_pre_draft=action == 'buy')
+            if not can_add:
+                return session_error(message, 409)
+        elif action == 'skip':
+            if not session.draft_queue:
+                return session_error('Draft not in progress', 409)
+            event = {'type': 'skip'}
+        elif action == 'undo':
+            if not session.undo_stack:
+                return session_error('Nothing to undo', 409)
+            event = {'type': 'undo'}
+        else:
+            return session_error('Unknown action', 404)
+        
+        session.apply(event)
+        sessions.save(session)
+        update_clock(('session', session.id), session.draft_started, session.draft_queue, session.pick_seconds)
+        return jsonify(session_status(session))
+
 if __name__ == '__main__':
 
-    app.run(debug=True)
+    create_app().run(debug=True)
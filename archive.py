@@ -0,0 +1,314 @@
+"""
+PSL Draft Simulator - Compressed archive of finished drafts with cross-draft queries
+
+Usage:
+    python archive.py adp --top 25
+    python archive.py rounds --player P1001
+    python archive.py trends --window 100
+"""
+import argparse
+from array import array
+from collections import Counter, namedtuple
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+MAGIC = b'PSLA'
+# magic, compressed payload bytes, picks, teams, rounds, Unix time the draft was archived
+BLOCK_HEADER = struct.Struct('<4sIIHHd')
+# Numeric columns of a block, in payload order: (field, array typecode)
+COLUMNS = (('pick_numbers', 'I'), ('round_numbers', 'H'), ('team_slots', 'H'), ('ratings', 'i'), ('prices', 'q'))
+SEPARATOR = '\0'
+
+# One archived draft, column by column (team_slots index team_ids)
+ArchivedDraft = namedtuple('ArchivedDraft', ['number', 'finished_at', 'rounds', 'team_ids', 'pick_numbers',
+                                             'round_numbers', 'team_slots', 'player_ids', 'names', 'ratings',
+                                             'prices'])
+
+
+def _pack_column(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack_column(typecode, data):
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+# ======================
+# DRAFT ARCHIVE CLASS
+# ======================
+class DraftArchive:
+    """Every finished draft's picks in one append-only file, one block per draft.
+
+    A block is a small header and a zlib-compressed payload laid out by
+    column: pick numbers, rounds, team slots, ratings and prices as packed
+    arrays, then the team IDs, player IDs and names as one string table.
+    Similar values sit side by side, so a 20-pick draft takes about 400
+    bytes. Queries stream the file one block at a time, so memory
+    depends on the number of distinct players, not the number of drafts.
+
+    Query results are cached until the file changes size, which for an
+    append-only file means until a draft is archived (by this process or
+    another). A torn last block from a crash mid-append is ignored and
+    trimmed before the next append.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._trimmed = False
+        # Results of the queries, valid while the file is `_cached_size` bytes long
+        self._cache = {}
+        self._cached_size = None
+
+    # ----- writing -----
+    def append(self, picks, team_ids, rounds, finished_at=None):
+        """Archive one draft.
+
+        picks: (pick_number, round, team_slot, player_id, name, rating, price)
+        in pick order, with team_slot indexing team_ids.
+        """
+        self.extend([(picks, team_ids, rounds, finished_at)])
+
+    def extend(self, drafts):
+        """Archive several (picks, team_ids, rounds, finished_at) drafts with one write and fsync"""
+        data = b''.join(self._block(*draft) for draft in drafts)
+        with self._lock:
+            if not self._trimmed:
+                self._trim()
+            with open(self.path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._cache = {}
+            self._cached_size = None
+
+    @staticmethod
+    def _block(picks, team_ids, rounds, finished_at=None):
+        payload = b''.join(_pack_column(typecode, [pick[position] for pick in picks])
+                           for position, (_, typecode) in zip((0, 1, 2, 5, 6), COLUMNS))
+        texts = list(team_ids) + [pick[3] for pick in picks] + [pick[4] for pick in picks]
+        # A name can't hold the separator, or the string table would split in the wrong places
+        payload += SEPARATOR.join(text.replace(SEPARATOR, ' ') for text in texts).encode('utf-8')
+        payload = zlib.compress(payload, 6)
+        header = BLOCK_HEADER.pack(MAGIC, len(payload), len(picks), len(team_ids), rounds,
+                                   time.time() if finished_at is None else finished_at)
+        return header + payload
+
+    def _trim(self):
+        """Cut a torn last block off, so new blocks follow a whole one"""
+        self._trimmed = True
+        if not os.path.exists(self.path):
+            return
+        good_bytes = sum(BLOCK_HEADER.size + length for length, _ in self._block_offsets())
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_bytes)
+
+    # ----- reading -----
+    def _size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def _block_offsets(self, limit=None):
+        """(payload length, header fields) of each whole block, reading headers only"""
+        limit = self._size() if limit is None else limit
+        offset = 0
+        with open(self.path, 'rb') as f:
+            while offset + BLOCK_HEADER.size <= limit:
+                f.seek(offset)
+                fields = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+                if fields[0] != MAGIC or offset + BLOCK_HEADER.size + fields[1] > limit:
+                    return
+                yield fields[1], fields
+                offset += BLOCK_HEADER.size + fields[1]
+
+    def drafts(self, limit=None):
+        """Yield each archived draft in order, decompressing one block at a time
+        (up to `limit` bytes of the file, so a concurrent append is not half read)"""
+        if not os.path.exists(self.path):
+            return
+        limit = self._size() if limit is None else limit
+        offset = 0
+        number = 0
+        with open(self.path, 'rb') as f:
+            while offset + BLOCK_HEADER.size <= limit:
+                magic, length, picks, teams, rounds, finished_at = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+                if magic != MAGIC or offset + BLOCK_HEADER.size + length > limit:
+                    return
+                payload = zlib.decompress(f.read(length))
+                offset += BLOCK_HEADER.size + length
+                number += 1
+
+                columns = {}
+                start = 0
+                for field, typecode in COLUMNS:
+                    end = start + picks * array(typecode).itemsize
+                    columns[field] = _unpack_column(typecode, payload[start:end])
+                    start = end
+                texts = payload[start:].decode('utf-8').split(SEPARATOR)
+                yield ArchivedDraft(number, finished_at, rounds, texts[:teams], player_ids=texts[teams:teams + picks],
+                                    names=texts[teams + picks:], **columns)
+
+    def _cached(self, key, compute):
+        """compute(limit) for the archive as it is now, remembered until a draft is added"""
+        size = self._size()
+        with self._lock:
+            if size != self._cached_size:
+                self._cache = {}
+                self._cached_size = size
+            if key in self._cache:
+                return self._cache[key]
+        result = compute(size)
+        with self._lock:
+            if self._cached_size == size:
+                self._cache[key] = result
+        return result
+
+    # ----- queries -----
+    def _player_stats(self, limit):
+        """One pass over the archive: draft count, and per player the name,
+        times drafted, pick-number sum, earliest and latest pick and picks by round"""
+        drafts = 0
+        players = {}
+        for draft in self.drafts(limit):
+            drafts += 1
+            for player_id, name, pick_number, round_number in zip(
+                    draft.player_ids, draft.names, draft.pick_numbers, draft.round_numbers):
+                stats = players.get(player_id)
+                if stats is None:
+                    stats = players[player_id] = [name, 0, 0, pick_number, pick_number, Counter()]
+                stats[0] = name
+                stats[1] += 1
+                stats[2] += pick_number
+                stats[3] = min(stats[3], pick_number)
+                stats[4] = max(stats[4], pick_number)
+                stats[5][round_number] += 1
+        return drafts, players
+
+    def player_stats(self):
+        return self._cached('player_stats', self._player_stats)
+
+    def summary(self):
+        def compute(limit):
+            drafts = picks = 0
+            for _, fields in self._block_offsets(limit) if limit else ():
+                drafts += 1
+                picks += fields[2]
+            return {'drafts': drafts, 'picks': picks}
+        return self._cached('summary', compute)
+
+    def adp(self, top=None, min_drafted=1):
+        """Average draft position of each player, earliest first.
+
+        `drafted_pct` is the share of archived drafts that picked the player;
+        players picked fewer than `min_drafted` times are left out.
+        """
+        def compute(limit):
+            drafts, players = self.player_stats()
+            rows = [{
+                'player_id': player_id,
+                'name': name,
+                'adp': round(pick_sum / count, 2),
+                'earliest': earliest,
+                'latest': latest,
+                'times_drafted': count,
+                'drafted_pct': round(100 * count / drafts, 2),
+            } for player_id, (name, count, pick_sum, earliest, latest, _) in players.items() if count >= min_drafted]
+            rows.sort(key=lambda row: (row['adp'], -row['times_drafted'], row['player_id']))
+            return rows
+        rows = self._cached(('adp', min_drafted), compute)
+        return rows[:top] if top else rows
+
+    def round_rates(self, player_id=None, top=None):
+        """Share of archived drafts (in %) that picked each player in each round,
+        for one player or for the players with the best ADP"""
+        drafts, players = self.player_stats()
+        if player_id is not None:
+            selected = [player_id] if player_id in players else []
+        else:
+            selected = [row['player_id'] for row in self.adp(top)]
+        return [{
+            'player_id': pid,
+            'name': players[pid][0],
+            'by_round': {round_number: round(100 * count / drafts, 2)
+                         for round_number, count in sorted(players[pid][5].items())},
+        } for pid in selected]
+
+    def price_trends(self, window=100):
+        """How much a rating point cost, over time and by round.
+
+        `windows` averages the price per rating point of the picks in each
+        run of `window` consecutive drafts, oldest first; `by_round` averages
+        it per round across the whole archive.
+        """
+        def compute(limit):
+            windows = []
+            by_round = {}
+            current = None
+            for draft in self.drafts(limit):
+                if current is None or current['drafts'] == window:
+                    current = {'first_draft': draft.number, 'from': draft.finished_at, 'drafts': 0,
+                               'picks': 0, 'price': 0, 'rating': 0}
+                    windows.append(current)
+                current['drafts'] += 1
+                current['to'] = draft.finished_at
+                current['picks'] += len(draft.prices)
+                current['price'] += sum(draft.prices)
+                current['rating'] += sum(draft.ratings)
+                for round_number, rating, price in zip(draft.round_numbers, draft.ratings, draft.prices):
+                    totals = by_round.setdefault(round_number, [0, 0])
+                    totals[0] += price
+                    totals[1] += rating
+            return {
+                'windows': [{
+                    'first_draft': w['first_draft'],
+                    'drafts': w['drafts'],
+                    'from': w['from'],
+                    'to': w['to'],
+                    'mean_rating': round(w['rating'] / w['picks'], 2) if w['picks'] else 0.0,
+                    'mean_price': round(w['price'] / w['picks']) if w['picks'] else 0,
+                    'price_per_rating': round(w['price'] / w['rating'], 1) if w['rating'] else 0.0,
+                } for w in windows],
+                'by_round': {round_number: round(price / rating, 1) if rating else 0.0
+                             for round_number, (price, rating) in sorted(by_round.items())},
+            }
+        return self._cached(('price_trends', window), compute)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the archive of finished drafts')
+    parser.add_argument('--file', default='data/draft_archive.bin')
+    commands = parser.add_subparsers(dest='command', required=True)
+    adp = commands.add_parser('adp', help='average draft position per player')
+    adp.add_argument('--top', type=int, default=25)
+    adp.add_argument('--min-drafted', type=int, default=1)
+    rounds = commands.add_parser('rounds', help='pick rate by round')
+    rounds.add_argument('--player', help='one player ID (default: the best ADPs)')
+    rounds.add_argument('--top', type=int, default=25)
+    trends = commands.add_parser('trends', help='price per rating point over time and by round')
+    trends.add_argument('--window', type=int, default=100)
+    args = parser.parse_args()
+
+    archive = DraftArchive(args.file)
+    if args.command == 'adp':
+        result = archive.adp(args.top, args.min_drafted)
+    elif args.command == 'rounds':
+        result = archive.round_rates(args.player, args.top)
+    else:
+        result = archive.price_trends(args.window)
+    print(json.dumps(dict(archive.summary(), result=result), indent=2))
+
+
+if __name__ == '__main__':
+    main()
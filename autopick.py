@@ -0,0 +1,96 @@
+"""
+PSL Draft Simulator - Auto-pick engine for the team on the clock
+
+"""
+
+# Rules Team.can_add_player enforces for the main draft
+DOMESTIC_COUNTRY = "Pakistan"
+FOREIGN_LIMIT = 3
+
+
+def picks_left(draft_queue, team_idx):
+    """How many picks the team has after the one now on the clock"""
+    return sum(1 for _, idx in draft_queue if idx == team_idx) - 1
+
+
+def _reserve(players, count, value, exclude):
+    """Sum of `value` over the first `count` of `players`, leaving out `exclude`"""
+    total = 0
+    taken = 0
+    for player in players:
+        if taken == count:
+            break
+        if player is not exclude:
+            total += value(player)
+            taken += 1
+    return total
+
+
+class _Reserves:
+    """Cheapest prices and lowest ratings that could fill the remaining picks.
+
+    Fetched once per pick (count + 1 of each, so a candidate that is itself
+    one of the cheapest can be left out), separately for the whole pool and
+    for domestic players only, which is all a team with no foreign slots
+    left may draft.
+    """
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+        self._cache = {}
+
+    def lists(self, domestic_only):
+        if domestic_only not in self._cache:
+            country = DOMESTIC_COUNTRY if domestic_only else None
+            self._cache[domestic_only] = (self.index.cheapest(self.count + 1, country),
+                                          self.index.lowest_rated(self.count + 1, country))
+        return self._cache[domestic_only]
+
+    def points(self, domestic_only, exclude=None):
+        return _reserve(self.lists(domestic_only)[1], self.count, lambda p: p.rating, exclude)
+
+    def budget(self, domestic_only, exclude=None):
+        return _reserve(self.lists(domestic_only)[0], self.count, lambda p: p.price, exclude)
+
+
+def choose_pick(team, index, remaining_picks=0, is_pre_draft=False):
+    """Return the highest rated player `team` may legally pick now without
+    leaving itself unable to afford its `remaining_picks` later, or None.
+
+    Candidates come from the sorted index in board order (rating
+    descending), starting at the best rating the points left can carry once
+    the lowest rated reserve is set aside, and skipping anyone dearer than
+    the budget left over after the cheapest reserve, so most players are
+    never looked at. Each candidate must leave enough points and budget for
+    the lowest rated and cheapest players still available (domestic ones
+    only, if this pick uses the last foreign slot) and pass every rule in
+    `Team.can_add_player`. When no candidate passes the lookahead, the best
+    player that is legal right now is returned instead.
+    """
+    points_left = team.max_points - team.current_points
+    budget_left = team.max_budget - team.current_budget
+    foreign_left = FOREIGN_LIMIT - team.foreign_players
+    reserves = _Reserves(index, remaining_picks)
+
+    # Leaving a candidate out of a reserve can only raise it, so these are upper bounds
+    rating_cap = points_left - reserves.points(domestic_only=foreign_left <= 0)
+    price_cap = budget_left - reserves.budget(domestic_only=foreign_left <= 0)
+    if rating_cap > 0 and price_cap > 0:
+        for player in index.iter_available(max_rating=rating_cap):
+            if player.price > price_cap:
+                continue
+            foreign = player.country != DOMESTIC_COUNTRY
+            if foreign and foreign_left <= 0:
+                continue
+            domestic_only = foreign_left - foreign <= 0
+            if (player.rating + reserves.points(domestic_only, player) <= points_left
+                    and player.price + reserves.budget(domestic_only, player) <= budget_left
+                    and team.can_add_player(player, is_pre_draft)[0]):
+                return player
+
+    # No pick keeps the remaining rounds affordable: take the best legal one
+    for player in index.iter_available(max_rating=points_left):
+        if player.price <= budget_left and team.can_add_player(player, is_pre_draft)[0]:
+            return player
+    return None
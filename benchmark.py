@@ -0,0 +1,603 @@
+"""
+PSL Draft Simulator - Benchmarks
+
+Usage:
+    python benchmark.py broadcast --subscribers 500 --events 200
+    python benchmark.py catalog --players 500000
+    python benchmark.py simulate --sims 2000 --workers 4
+    python benchmark.py solver --players 1000,5000,20000 --sizes 8,12,16,20
+    python benchmark.py routes --players 1000,100000,1000000 --teams 4,32 --out before.json
+    python benchmark.py load --players 10000 --teams 8 --spectators 50 --seconds 10
+    python benchmark.py coldstart --players 1000,100000 --repeat 5
+    python benchmark.py compare before.json after.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import selectors
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from catalog import ColumnarCatalog, np
+from events import DraftEventBroker, LiveFeedServer
+from models import Player, CATEGORY_ORDER, create_default_teams
+from player_index import PlayerIndex
+from simulator import run_simulations, synthetic_pool
+from solver import solve_roster, team_plan
+
+
+# ======================
+# BROADCAST BENCHMARK
+# ======================
+def bench_broadcast(subscribers, events):
+    """Publish `events` deltas to `subscribers` live feed connections and time delivery.
+
+    The feed is a real LiveFeedServer on a local port. The clients are plain
+    sockets read by one selector in this thread, so the numbers measure the
+    server's single loop thread rather than the clients.
+    """
+    broker = DraftEventBroker(history=events + 1)
+    feed = LiveFeedServer(broker)
+    threads_before = threading.active_count()
+    port = feed.start('127.0.0.1', 0)
+    sample = {'team_idx': 0, 'team': 'Lahore Qalandars', 'player_id': 'P1001', 'player': 'Babar Azam',
+              'price': 500000, 'current_points': 95, 'current_budget': 500000, 'foreign_players': 0,
+              'picks_remaining': 19, 'next': {'round': 1, 'team_idx': 1, 'team': 'Karachi Kings'}}
+    marker = b'\nevent: pick\n'
+    selector = selectors.DefaultSelector()
+    # socket -> [events received, unmatched tail of the last read]
+    received = {}
+    for _ in range(subscribers):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b"GET " + LiveFeedServer.PATH.encode() + b" HTTP/1.1\r\nHost: bench\r\n\r\n")
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        received[sock] = [0, b'']
+    while feed.connection_count() < subscribers:
+        time.sleep(0.01)
+    server_threads = threading.active_count() - threads_before
+
+    def publish():
+        for _ in range(events):
+            broker.publish('pick', sample)
+
+    start = time.perf_counter()
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    pending = subscribers
+    finished_at = start
+    while pending:
+        for key, _ in selector.select(timeout=5):
+            state = received[key.fileobj]
+            data = state[1] + key.fileobj.recv(1 << 16)
+            state[0] += data.count(marker)
+            state[1] = data[-len(marker):]
+            if state[0] >= events:
+                selector.unregister(key.fileobj)
+                pending -= 1
+                finished_at = time.perf_counter()
+    publisher.join()
+    publish_seconds = time.perf_counter() - start
+    delivered_seconds = finished_at - start
+    for sock in received:
+        sock.close()
+
+    return {
+        'benchmark': 'broadcast',
+        'subscribers': subscribers,
+        'events': events,
+        'server_threads': server_threads,
+        'publish_us_per_event': round(publish_seconds / events * 1e6, 2),
+        'all_delivered_seconds': round(delivered_seconds, 4),
+        'deliveries_per_second': round(subscribers * events / delivered_seconds),
+    }
+
+
+# ======================
+# CATALOG BENCHMARK
+# ======================
+def write_synthetic_players(path, count, seed=7):
+    """Write a PLAYERS_FILE-style CSV of `count` random players"""
+    rng = random.Random(seed)
+    countries = ['Pakistan'] * 6 + ['England', 'Australia', 'South Africa', 'New Zealand', 'West Indies', 'Sri Lanka']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'rating', 'price', 'country', 'is_picked'])
+        for n in range(count):
+            writer.writerow([f"P{1001 + n}", f"Scouted Player {n}", rng.randint(30, 99),
+                             rng.randrange(50000, 600000, 5000), rng.choice(countries), False])
+
+
+def load_as_objects(path):
+    """The current representation: Player objects, an ID dict and the sorted index"""
+    players = []
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for player_id, name, rating, price, country, is_picked in reader:
+            player = Player(name, int(rating), int(price), country, player_id=player_id)
+            player.is_picked = is_picked == 'True'
+            players.append(player)
+    player_dict = {p.id: p for p in players}
+    index = PlayerIndex()
+    index.rebuild(players)
+    return players, player_dict, index
+
+
+def load_as_columns(path):
+    catalog = ColumnarCatalog.load_csv(path)
+    catalog.order
+    return catalog
+
+
+def measure(loader, path):
+    """Return (seconds, bytes retained) for one load"""
+    start = time.perf_counter()
+    loader(path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    result = loader(path)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return seconds, retained
+
+
+def bench_catalog(players):
+    """Compare load time and memory of Player objects against the columnar catalog"""
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_synthetic_players(path, players)
+        object_seconds, object_bytes = measure(load_as_objects, path)
+        column_seconds, column_bytes = measure(load_as_columns, path)
+
+        catalog = load_as_columns(path)
+        catalog.category_positions('Diamond')
+        start = time.perf_counter()
+        catalog.available(50, category='Diamond')
+        query_ms = (time.perf_counter() - start) * 1000
+    finally:
+        os.remove(path)
+
+    return {
+        'benchmark': 'catalog',
+        'players': players,
+        'numpy': np is not None,
+        'objects_load_seconds': round(object_seconds, 3),
+        'objects_mb': round(object_bytes / 2**20, 1),
+        'columnar_load_seconds': round(column_seconds, 3),
+        'columnar_mb': round(column_bytes / 2**20, 1),
+        'memory_ratio': round(object_bytes / column_bytes, 2),
+        'columnar_top50_ms': round(query_ms, 3),
+    }
+
+
+# ======================
+# SIMULATION BENCHMARK
+# ======================
+def bench_simulate(sims, workers, players, strategies):
+    """Simulations per second (and per core) of the Monte Carlo draft runner"""
+    workers = workers or os.cpu_count() or 1
+    pool = synthetic_pool(players)
+    team_specs = [(t.name, t.max_points, t.max_budget, t.password) for t in create_default_teams()]
+    start = time.perf_counter()
+    report = run_simulations(pool, team_specs, sims, strategy_names=strategies, workers=workers)
+    seconds = time.perf_counter() - start
+    return {
+        'benchmark': 'simulate',
+        'sims': report['sims'],
+        'workers': workers,
+        'players': players,
+        'strategies': list(strategies),
+        'seconds': round(seconds, 3),
+        'sims_per_second': round(sims / seconds, 1),
+        'sims_per_second_per_core': round(sims / seconds / workers, 1),
+    }
+
+
+# ======================
+# SOLVER BENCHMARK
+# ======================
+def bench_solver(player_counts, sizes, top, steps):
+    """Time to plan `size` more players for a fresh team, and whether the
+    search finished within `steps` (the cap /api/solver uses)"""
+    team = create_default_teams()[0]
+    cases = []
+    for count in player_counts:
+        players = [Player(name, rating, price, country, player_id=player_id)
+                   for player_id, name, rating, price, country in synthetic_pool(count)]
+        for size in sizes:
+            start = time.perf_counter()
+            rosters, complete = solve_roster(players, top=top, max_steps=steps, **team_plan(team, size))
+            cases.append({
+                'players': count,
+                'size': size,
+                'ms': round((time.perf_counter() - start) * 1000, 1),
+                'complete': complete,
+                'best': [rosters[0]['total_rating'], rosters[0]['total_price']] if rosters else None,
+            })
+    return {'benchmark': 'solver', 'top': top, 'steps': steps, 'cases': cases}
+
+
+# ======================
+# ROUTE BENCHMARKS
+# ======================
+def import_app(workdir):
+    """Import the app with its data/ directory in `workdir`, on CSV storage and untimed turns"""
+    os.environ['PSL_PERSISTENCE'] = 'csv'
+    for name in ('PSL_SHARED_STATE', 'PSL_PICK_SECONDS', 'PSL_PROFILE'):
+        os.environ.pop(name, None)
+    os.chdir(workdir)
+    import app
+    app.init_state()
+    return app
+
+
+def seed_league(app, players, teams, seed=7):
+    """Replace the app's CSV files with a synthetic pool and `teams` teams that
+    have each made three pre-draft buys, then load them; returns the history
+    position the draft starts from"""
+    for path in (app.TEAM_PLAYERS_FILE, app.DRAFT_STATE_FILE, app.storage.history_file):
+        if os.path.exists(path):
+            os.remove(path)
+    write_synthetic_players(app.PLAYERS_FILE, players, seed)
+    with open(app.TEAMS_FILE, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'max_points', 'max_budget', 'password'])
+        for n in range(teams):
+            writer.writerow([f"Team {n + 1}", 1000, 5000000, f"team{n + 1}"])
+
+    engine = app.engine
+    with engine.write():
+        app.storage.load()
+        for team in engine.teams:
+            for category in CATEGORY_ORDER:
+                if team.pre_draft_count == 3:
+                    break
+                for player in engine.index.available(10, category=category):
+                    if team.can_add_player(player, is_pre_draft=True)[0]:
+                        engine.apply({'type': 'buy', 'team_id': team.id, 'player_id': player.id})
+                        break
+        app.storage.save_all()
+        # Later requests must not be answered from cached ETags of the previous league
+        for resource in app.state_versions:
+            app.state_versions[resource] += 1
+    return engine.history.position
+
+
+def timings(samples):
+    """Median, 95th percentile and max of a list of durations, in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return timings(samples)
+
+
+def bench_route_case(app, players, teams, repeat):
+    """Time loading, board queries, page renders and a pick-undo cycle for one league size"""
+    seed_league(app, players, teams)
+    storage = app.storage
+    engine = app.engine
+    client = app.app.test_client()
+    results = {}
+
+    # Startup: each CSV loader on its own, then the whole load with the index rebuild
+    for loader in (storage.load_players, storage.load_teams, storage.load_team_players):
+        results[loader.__name__] = time_calls(loader, repeat)
+    results['load_total'] = time_calls(storage.load, repeat)
+
+    results['get_available_players_page'] = time_calls(lambda: app.get_available_players(app.PAGE_SIZE), repeat)
+    results['get_available_players_all'] = time_calls(app.get_available_players, repeat)
+    results['render_players'] = time_calls(lambda: client.get('/players'), repeat)
+
+    client.post('/start_draft', data={'admin_password': app.ADMIN_PASSWORD})
+    results['render_draft'] = time_calls(lambda: client.get('/draft'), repeat)
+
+    picks, undos = [], []
+    for _ in range(repeat):
+        event = engine.read(app.autopick_event)
+        if event is None:
+            break
+        start = time.perf_counter()
+        client.post('/draft_pick', data={'player_id': event['player_id']})
+        picked = time.perf_counter()
+        client.post('/draft_undo')
+        picks.append(picked - start)
+        undos.append(time.perf_counter() - picked)
+    if picks:
+        results['pick'] = timings(picks)
+        results['undo'] = timings(undos)
+        results['pick_undo_cycle'] = timings([p + u for p, u in zip(picks, undos)])
+    return {'players': players, 'teams': teams, 'timings': results}
+
+
+def bench_routes(player_counts, team_counts, repeat):
+    """Route and storage timings over a grid of pool sizes and team counts"""
+    workdir = tempfile.mkdtemp(prefix='psl-bench-')
+    cwd = os.getcwd()
+    try:
+        app = import_app(workdir)
+        cases = [bench_route_case(app, players, teams, repeat)
+                 for players in player_counts for teams in team_counts]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {'benchmark': 'routes', 'repeat': repeat, 'cases': cases}
+
+
+# ======================
+# LOAD TEST
+# ======================
+def bench_load(players, teams, spectators, seconds, poll_interval=0.01):
+    """Many teams and spectators hitting the app at once, each on its own thread.
+
+    Each team polls /api/draft and, on its turn, auto-picks (or skips when
+    no legal pick is left). Spectators poll /api/draft with If-None-Match,
+    as a dashboard would, and load the draft board every tenth poll. When
+    the draft finishes, the team that notices jumps back to the start.
+    """
+    workdir = tempfile.mkdtemp(prefix='psl-load-')
+    cwd = os.getcwd()
+    try:
+        app = import_app(workdir)
+        start_position = seed_league(app, players, teams)
+        app.app.test_client().post('/start_draft', data={'admin_password': app.ADMIN_PASSWORD})
+
+        samples = {}
+        counts = {'not_modified': 0, 'errors': 0, 'restarts': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def record(op, started, response):
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.setdefault(op, []).append(elapsed)
+                if response.status_code == 304:
+                    counts['not_modified'] += 1
+                elif response.status_code >= 400:
+                    counts['errors'] += 1
+
+        def team_worker(team_id):
+            client = app.app.test_client()
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = client.get('/api/draft')
+                record('team_poll', started, response)
+                status = response.get_json()
+                if status['finished']:
+                    started = time.perf_counter()
+                    response = client.post('/draft_jump', data={'admin_password': app.ADMIN_PASSWORD,
+                                                                 'position': start_position})
+                    record('restart', started, response)
+                    with lock:
+                        counts['restarts'] += 1
+                elif status['current']['team']['id'] == team_id:
+                    started = time.perf_counter()
+                    response = client.post('/draft_autopick')
+                    record('pick', started, response)
+                    if app.engine.draft_queue.pick_index == status['pick_index']:
+                        # No legal pick left (or another worker moved first): pass the turn on
+                        client.post('/draft_skip')
+                else:
+                    time.sleep(poll_interval)
+
+        def spectator_worker():
+            client = app.app.test_client()
+            etag = None
+            polls = 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = client.get('/api/draft', headers={'If-None-Match': etag} if etag else {})
+                record('spectator_poll', started, response)
+                etag = response.headers.get('ETag') or etag
+                polls += 1
+                if polls % 10 == 0:
+                    started = time.perf_counter()
+                    response = client.get('/draft')
+                    record('spectator_page', started, response)
+                time.sleep(poll_interval)
+
+        threads = [threading.Thread(target=team_worker, args=(team.id,)) for team in app.engine.teams]
+        threads += [threading.Thread(target=spectator_worker) for _ in range(spectators)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'benchmark': 'load',
+        'players': players,
+        'teams': teams,
+        'spectators': spectators,
+        'seconds': round(elapsed, 2),
+        'requests': sum(len(v) for v in samples.values()),
+        'requests_per_second': round(sum(len(v) for v in samples.values()) / elapsed, 1),
+        'picks_per_second': round(len(samples.get('pick', [])) / elapsed, 1),
+        'not_modified': counts['not_modified'],
+        'errors': counts['errors'],
+        'restarts': counts['restarts'],
+        'timings': {op: timings(values) for op, values in sorted(samples.items())},
+    }
+
+
+# ======================
+# COLD START BENCHMARK
+# ======================
+COLD_START_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+print(json.dumps({'import': imported - start, 'init': time.perf_counter() - imported}))
+'''
+
+
+def cold_start(workdir):
+    """Import the app and load its state in a fresh interpreter; seconds for each step"""
+    env = dict(os.environ, PSL_PERSISTENCE='csv', PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    for name in ('PSL_SHARED_STATE', 'PSL_PICK_SECONDS', 'PSL_PROFILE'):
+        env.pop(name, None)
+    result = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def bench_cold_start(player_counts, repeat):
+    """Process start to a loaded state: the import alone, a start that parses
+    the players CSV (and writes the snapshot) and one that reads the snapshot"""
+    cases = []
+    for players in player_counts:
+        workdir = tempfile.mkdtemp(prefix='psl-cold-')
+        try:
+            os.makedirs(os.path.join(workdir, 'data'))
+            write_synthetic_players(os.path.join(workdir, 'data', 'players.csv'), players)
+            snapshot_file = os.path.join(workdir, 'data', 'players.bin')
+            samples = {'import': [], 'init_csv': [], 'init_snapshot': []}
+            for _ in range(repeat):
+                if os.path.exists(snapshot_file):
+                    os.remove(snapshot_file)
+                parsed = cold_start(workdir)
+                mapped = cold_start(workdir)
+                samples['import'] += [parsed['import'], mapped['import']]
+                samples['init_csv'].append(parsed['init'])
+                samples['init_snapshot'].append(mapped['init'])
+            cases.append({'players': players, 'timings': {op: timings(values) for op, values in samples.items()}})
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {'benchmark': 'coldstart', 'repeat': repeat, 'cases': cases}
+
+
+# ======================
+# COMPARING RUNS
+# ======================
+def median_timings(result):
+    """(case label, operation) -> median ms for any saved benchmark result"""
+    cases = result.get('cases') or [result]
+    medians = {}
+    for case in cases:
+        label = ' '.join(f"{key}={case[key]}" for key in ('players', 'teams', 'spectators') if key in case)
+        for op, stats in case.get('timings', {}).items():
+            medians[(label, op)] = stats['median_ms']
+    return medians
+
+
+def compare_results(before, after):
+    """Median timings of two saved runs side by side, with the after/before ratio"""
+    old, new = median_timings(before), median_timings(after)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] else None
+        rows.append({'case': key[0], 'op': key[1], 'before_ms': old[key], 'after_ms': new[key],
+                     'ratio': round(ratio, 3) if ratio is not None else None})
+    return {'benchmark': 'compare', 'rows': rows}
+
+
+def int_list(text):
+    return [int(part) for part in text.split(',') if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PSL Draft Simulator benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--out', help='also save the result as JSON (with machine details) to this file')
+
+    broadcast = commands.add_parser('broadcast', parents=[output], help='live feed fan-out to many subscribers')
+    broadcast.add_argument('--subscribers', type=int, default=500)
+    broadcast.add_argument('--events', type=int, default=200)
+
+    catalog = commands.add_parser('catalog', parents=[output], help='memory and load time of large player pools')
+    catalog.add_argument('--players', type=int, default=500000)
+
+    simulate = commands.add_parser('simulate', parents=[output], help='Monte Carlo draft throughput')
+    simulate.add_argument('--sims', type=int, default=2000)
+    simulate.add_argument('--workers', type=int, default=None)
+    simulate.add_argument('--players', type=int, default=1000)
+    simulate.add_argument('--strategies', default='lookahead')
+
+    solver = commands.add_parser('solver', parents=[output], help='roster solver time by pool and roster size')
+    solver.add_argument('--players', type=int_list, default=[1000, 5000, 20000], help='comma-separated pool sizes')
+    solver.add_argument('--sizes', type=int_list, default=[8, 12, 16, 20], help='comma-separated roster sizes')
+    solver.add_argument('--top', type=int, default=5)
+    solver.add_argument('--steps', type=int, default=500000)
+
+    routes = commands.add_parser('routes', parents=[output], help='board queries, page renders, pick-undo and startup load')
+    routes.add_argument('--players', type=int_list, default=[1000, 10000, 100000], help='comma-separated pool sizes')
+    routes.add_argument('--teams', type=int_list, default=[4, 8, 32], help='comma-separated team counts')
+    routes.add_argument('--repeat', type=int, default=10)
+
+    load = commands.add_parser('load', parents=[output], help='concurrent teams and spectators against the app')
+    load.add_argument('--players', type=int, default=10000)
+    load.add_argument('--teams', type=int, default=8)
+    load.add_argument('--spectators', type=int, default=50)
+    load.add_argument('--seconds', type=float, default=10.0)
+
+    coldstart = commands.add_parser('coldstart', parents=[output], help='process start to loaded state, CSV against snapshot')
+    coldstart.add_argument('--players', type=int_list, default=[1000, 100000], help='comma-separated pool sizes')
+    coldstart.add_argument('--repeat', type=int, default=5)
+
+    compare = commands.add_parser('compare', parents=[output], help='compare two results saved with --out')
+    compare.add_argument('before')
+    compare.add_argument('after')
+
+    args = parser.parse_args()
+    if args.command == 'broadcast':
+        result = bench_broadcast(args.subscribers, args.events)
+    elif args.command == 'catalog':
+        result = bench_catalog(args.players)
+    elif args.command == 'simulate':
+        result = bench_simulate(args.sims, args.workers, args.players, args.strategies.split(','))
+    elif args.command == 'solver':
+        result = bench_solver(args.players, args.sizes, args.top, args.steps)
+    elif args.command == 'routes':
+        result = bench_routes(args.players, args.teams, args.repeat)
+    elif args.command == 'load':
+        result = bench_load(args.players, args.teams, args.spectators, args.seconds)
+    elif args.command == 'coldstart':
+        result = bench_cold_start(args.players, args.repeat)
+    elif args.command == 'compare':
+        with open(args.before, 'r', encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, 'r', encoding='utf-8') as f:
+            after = json.load(f)
+        result = compare_results(before, after)
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        result = dict(result, python=platform.python_version(), machine=platform.machine(),
+                      cpus=os.cpu_count(), recorded_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+PSL Draft Simulator - Bulk player import and streaming export
+
+Usage:
+    python bulk.py import scouting.csv
+    python bulk.py import scouting.jsonl --dry-run
+    python bulk.py export players.jsonl --format jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+# Rows validated per batch, so memory for parsing stays flat however big the file
+CHUNK_SIZE = 5000
+# Errors kept for the report; beyond this only the count grows
+MAX_REPORTED_ERRORS = 100
+EXPORT_FIELDS = ['id', 'name', 'rating', 'price', 'country', 'category', 'is_picked']
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+# ======================
+# IMPORT
+# ======================
+def iter_rows(stream, fmt):
+    """Yield (line_number, row dict) from a text stream, one line at a time"""
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def validate_row(row):
+    """Return (player_id or None, name, rating, price, country) or raise ValueError"""
+    if row is None:
+        raise ValueError("Not a valid record")
+    name = str(row.get('name') or '').strip()
+    if not name:
+        raise ValueError("Missing name")
+    try:
+        rating = int(row.get('rating'))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid rating: {row.get('rating')!r}")
+    if not 1 <= rating <= 100:
+        raise ValueError(f"Rating must be between 1 and 100 (got {rating})")
+    try:
+        price = int(row.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid price: {row.get('price')!r}")
+    if price <= 0:
+        raise ValueError(f"Price must be positive (got {price})")
+    country = str(row.get('country') or '').strip() or 'Pakistan'
+    player_id = str(row.get('id') or '').strip() or None
+    if player_id is not None and not (player_id[:1] == 'P' and player_id[1:].isdigit()):
+        raise ValueError(f"Invalid player ID: {player_id!r}")
+    return player_id, name, rating, price, country
+
+
+class ImportReport:
+    """What a bulk import did, with the first errors by line number"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'duplicates': self.duplicates,
+            'error_count': self.error_count,
+            'errors': [{'line': line, 'message': message} for line, message in self.errors]
+        }
+
+
+def prepare_import(stream, fmt, existing_players):
+    """Validate a file against the pool and return (new player rows, report).
+
+    Rows are read and checked CHUNK_SIZE at a time. A row is a duplicate
+    when its ID is already in the pool or earlier in the file, or (for rows
+    without an ID) when a player with the same name and country exists.
+    The rows are [id, name, rating, price, country], the shape of a
+    'register' event, with no ID yet for rows that gave none. Nothing is
+    applied here, so this can run against a copy of the pool without
+    holding the engine's lock; finish_import() completes the rows.
+    """
+    report = ImportReport()
+    known_ids = {p.id for p in existing_players}
+    known_names = {(p.name.lower(), p.country.lower()) for p in existing_players}
+    rows = []
+
+    records = iter_rows(stream, fmt)
+    while True:
+        chunk = list(islice(records, CHUNK_SIZE))
+        if not chunk:
+            break
+        valid = []
+        for line_number, row in chunk:
+            report.rows += 1
+            try:
+                player_id, name, rating, price, country = validate_row(row)
+            except ValueError as e:
+                report.error(line_number, str(e))
+                continue
+            name_key = (name.lower(), country.lower())
+            if player_id in known_ids or (player_id is None and name_key in known_names):
+                report.duplicates += 1
+                continue
+            if player_id is not None:
+                known_ids.add(player_id)
+            known_names.add(name_key)
+            valid.append([player_id, name, rating, price, country])
+        rows.extend(valid)
+
+    report.imported = len(rows)
+    return rows, report
+
+
+def finish_import(rows, report, player_dict, added_players, next_number):
+    """Re-check prepared rows against players added since and give the new ones IDs.
+
+    Run under the engine's write lock, with `added_players` the players
+    that joined the pool after the copy prepare_import() checked. This is
+    set lookups only, no parsing. New IDs are numbered from `next_number`
+    (Player.player_counter) or past the highest ID in the file.
+    """
+    added_names = {(p.name.lower(), p.country.lower()) for p in added_players}
+    kept = []
+    for row in rows:
+        player_id, name, _, _, country = row
+        if player_id in player_dict or (player_id is None and (name.lower(), country.lower()) in added_names):
+            report.duplicates += 1
+            continue
+        kept.append(row)
+        if player_id is not None:
+            next_number = max(next_number, int(player_id[1:]) + 1)
+
+    # One block of IDs for the whole file
+    for number, row in enumerate((row for row in kept if row[0] is None), next_number):
+        row[0] = f"P{number}"
+    report.imported = len(kept)
+    return kept
+
+
+# ======================
+# EXPORT
+# ======================
+def export_rows(players, fmt='csv', chunk_size=1000):
+    """Yield the pool as CSV or JSON lines, a chunk of rows per string"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer is not None:
+        writer.writerow(EXPORT_FIELDS)
+    for count, player in enumerate(players, 1):
+        if writer is not None:
+            writer.writerow([player.id, player.name, player.rating, player.price,
+                             player.country, player.category, player.is_picked])
+        else:
+            buffer.write(json.dumps(player.to_dict(), separators=(',', ':')))
+            buffer.write('\n')
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# ======================
+# CLI
+# ======================
+def main():
+    parser = argparse.ArgumentParser(description='Bulk player import and export')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help='add players from a CSV or JSONL file')
+    importer.add_argument('path')
+    importer.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    importer.add_argument('--dry-run', action='store_true', help='validate and report without importing')
+
+    exporter = commands.add_parser('export', help='write the player pool to a CSV or JSONL file')
+    exporter.add_argument('path')
+    exporter.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+
+    args = parser.parse_args()
+    fmt = args.format or detect_format(args.path)
+
+    # The app builds the engine and storage backend configured by the environment
+    import app
+    app.init_state()
+
+    if args.command == 'import':
+        with open(args.path, 'r', encoding='utf-8', newline='') as f:
+            report = app.import_players(f, fmt, dry_run=args.dry_run)
+        print(f"{report.rows} rows: {report.imported} {'valid' if args.dry_run else 'imported'}, "
+              f"{report.duplicates} duplicates, {report.error_count} errors")
+        for line_number, message in report.errors:
+            print(f"  line {line_number}: {message}")
+    else:
+        players = app.engine.read(lambda: list(app.engine.players))
+        tmp_path = f"{args.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in export_rows(players, fmt):
+                f.write(chunk)
+        os.replace(tmp_path, args.path)
+        print(f"Exported {len(players)} players to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
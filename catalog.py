@@ -0,0 +1,205 @@
+"""
+PSL Draft Simulator - Columnar player catalog for very large pools
+
+"""
+from array import array
+from bisect import bisect_left
+import csv
+
+from models import CATEGORY_ORDER, category_for_rating
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the array module covers everything
+    np = None
+
+# Category code -> name (codes follow CATEGORY_ORDER, so they sort in board order)
+CATEGORY_NAMES = {code: name for name, code in CATEGORY_ORDER.items()}
+
+
+# ======================
+# PLAYER VIEW CLASS
+# ======================
+class PlayerView:
+    """Read-only Player look-alike for one catalog row (what templates and teams see)"""
+    __slots__ = ('catalog', 'pos')
+
+    def __init__(self, catalog, pos):
+        self.catalog = catalog
+        self.pos = pos
+
+    @property
+    def id(self):
+        return f"P{self.catalog.id_numbers[self.pos]}"
+
+    @property
+    def name(self):
+        return self.catalog.names[self.pos]
+
+    @property
+    def rating(self):
+        return self.catalog.ratings[self.pos]
+
+    @property
+    def price(self):
+        return self.catalog.prices[self.pos]
+
+    @property
+    def country(self):
+        return self.catalog.countries[self.catalog.country_codes[self.pos]]
+
+    @property
+    def category(self):
+        return CATEGORY_NAMES[self.catalog.category_codes[self.pos]]
+
+    @property
+    def is_picked(self):
+        return bool(self.catalog.picked[self.pos])
+
+    def get_category_order(self):
+        return self.catalog.category_codes[self.pos]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'rating': self.rating,
+            'price': self.price,
+            'country': self.country,
+            'category': self.category,
+            'is_picked': self.is_picked
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, PlayerView) and other.catalog is self.catalog and other.pos == self.pos
+
+    def __hash__(self):
+        return hash(self.pos)
+
+
+# ======================
+# COLUMNAR CATALOG CLASS
+# ======================
+class ColumnarCatalog:
+    """A player pool stored column by column in typed arrays.
+
+    Each player is a row number. Ratings, prices, category codes, country
+    codes and the numeric part of the ID live in `array` columns (a few
+    bytes per player instead of a full object), country names are interned
+    in one small table, and picked flags are a bytearray. Rows are exposed
+    as `PlayerView` objects created on demand. With NumPy installed the
+    columns are wrapped zero-copy and the board order is sorted with it.
+    """
+
+    def __init__(self):
+        self.id_numbers = array('q')
+        self.names = []
+        self.ratings = array('h')
+        self.prices = array('q')
+        self.category_codes = array('b')
+        self.country_codes = array('H')
+        self.countries = []
+        self.country_index = {}
+        self.picked = bytearray()
+        self._order = None
+        self._by_category = None
+        self._id_sorted = None
+
+    # ----- building -----
+    def append(self, player_id, name, rating, price, country, is_picked=False):
+        code = self.country_index.get(country)
+        if code is None:
+            code = self.country_index[country] = len(self.countries)
+            self.countries.append(country)
+        self.id_numbers.append(int(player_id[1:]))
+        self.names.append(name)
+        self.ratings.append(rating)
+        self.prices.append(price)
+        self.category_codes.append(CATEGORY_ORDER[category_for_rating(rating)])
+        self.country_codes.append(code)
+        self.picked.append(1 if is_picked else 0)
+        self._order = self._by_category = self._id_sorted = None
+
+    @classmethod
+    def from_players(cls, players):
+        catalog = cls()
+        for p in players:
+            catalog.append(p.id, p.name, p.rating, p.price, p.country, p.is_picked)
+        return catalog
+
+    @classmethod
+    def load_csv(cls, path):
+        """Stream a players CSV (the PLAYERS_FILE layout) straight into columns"""
+        catalog = cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header: id, name, rating, price, country, is_picked
+            for player_id, name, rating, price, country, is_picked in reader:
+                catalog.append(player_id, name, int(rating), int(price), country, is_picked == 'True')
+        return catalog
+
+    # ----- lookups -----
+    def __len__(self):
+        return len(self.names)
+
+    def view(self, pos):
+        return PlayerView(self, pos)
+
+    def get(self, player_id):
+        """Return the view for an ID, or None (binary search over the sorted IDs)"""
+        try:
+            number = int(player_id[1:])
+        except (TypeError, ValueError):
+            return None
+        if self._id_sorted is None:
+            ids = self.id_numbers
+            positions = sorted(range(len(ids)), key=ids.__getitem__)
+            self._id_sorted = (array('q', (ids[pos] for pos in positions)), array('l', positions))
+        numbers, positions = self._id_sorted
+        i = bisect_left(numbers, number)
+        if i < len(numbers) and numbers[i] == number:
+            return PlayerView(self, positions[i])
+        return None
+
+    @property
+    def order(self):
+        """Every row in draft-board order: category, then highest rating first"""
+        if self._order is None:
+            if np is not None and len(self):
+                codes = np.frombuffer(self.category_codes, dtype=np.int8)
+                ratings = np.frombuffer(self.ratings, dtype=np.int16)
+                # lexsort is stable, so equal keys keep row order
+                self._order = array('l', np.lexsort((-ratings.astype(np.int32), codes)).tolist())
+            else:
+                codes = self.category_codes
+                ratings = self.ratings
+                self._order = array('l', sorted(range(len(self)), key=lambda pos: (codes[pos], -ratings[pos])))
+        return self._order
+
+    def category_positions(self, category):
+        """Rows of one category in board order"""
+        if self._by_category is None:
+            by_category = {}
+            codes = self.category_codes
+            for pos in self.order:
+                by_category.setdefault(CATEGORY_NAMES[codes[pos]], array('l')).append(pos)
+            self._by_category = by_category
+        return self._by_category.get(category, ())
+
+    def available(self, limit=None, category=None, picked=None):
+        """Views of unpicked rows in board order; `picked` overrides the catalog's own flags"""
+        positions = self.order if category is None else self.category_positions(category)
+        if picked is None:
+            picked = self.picked
+        result = []
+        for pos in positions:
+            if not picked[pos]:
+                result.append(PlayerView(self, pos))
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def nbytes(self):
+        """Approximate memory held by the numeric columns and flags"""
+        return sum(column.itemsize * len(column) for column in (
+            self.id_numbers, self.ratings, self.prices, self.category_codes, self.country_codes)) + len(self.picked)
@@ -0,0 +1,105 @@
+"""
+PSL Draft Simulator - Pick clock for timed turns
+
+"""
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# ======================
+# PICK CLOCK CLASS
+# ======================
+class PickClock:
+    """Turn timers for any number of drafts on one asyncio event loop.
+
+    The loop runs in a single daemon thread and each draft with a turn on
+    the clock holds one timer handle on it (`loop.call_later`), so a
+    thousand timed drafts still cost one thread. When a turn runs out,
+    `on_expire(key, turn)` runs in the loop's default executor, so a slow
+    save for one draft never delays the timers of the others.
+
+    `turn` is whatever the caller uses to identify a turn (the draft
+    cursor position). The draft may have moved on between the timer firing
+    and the handler taking the draft's lock, so the handler should check
+    the turn is still current before acting.
+    """
+
+    def __init__(self, on_expire):
+        self.on_expire = on_expire
+        self._loop = None
+        # key -> (turn, deadline as a Unix time); read by request threads
+        self._turns = {}
+        # key -> TimerHandle; only touched on the loop thread
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='pick-clock', daemon=True).start()
+            return self._loop
+
+    def start(self, key, turn, seconds):
+        """Put a new turn on a draft's clock, replacing the previous turn's timer"""
+        loop = self._ensure_loop()
+        with self._lock:
+            self._turns[key] = (turn, time.time() + seconds)
+        loop.call_soon_threadsafe(self._schedule, key, turn, seconds)
+
+    def stop(self, key):
+        """Take a draft off the clock (finished, reset or no longer timed)"""
+        with self._lock:
+            if self._turns.pop(key, None) is None:
+                return
+        self._loop.call_soon_threadsafe(self._cancel, key)
+
+    def turn(self, key):
+        """The turn on a draft's clock, or None"""
+        entry = self._turns.get(key)
+        return entry[0] if entry else None
+
+    def deadline(self, key):
+        """Unix time a draft's turn runs out, or None when it is not on the clock"""
+        entry = self._turns.get(key)
+        return entry[1] if entry else None
+
+    def remaining(self, key):
+        """Seconds left on a draft's turn, or None"""
+        deadline = self.deadline(key)
+        return None if deadline is None else max(0.0, deadline - time.time())
+
+    def __len__(self):
+        return len(self._turns)
+
+    # ----- loop thread -----
+    def _cancel(self, key):
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+    def _schedule(self, key, turn, seconds):
+        self._cancel(key)
+        # A stop or a newer start may have been queued after this one
+        if self.turn(key) == turn:
+            self._handles[key] = self._loop.call_later(seconds, self._fire, key, turn)
+
+    def _fire(self, key, turn):
+        self._handles.pop(key, None)
+        with self._lock:
+            entry = self._turns.get(key)
+            if entry is None or entry[0] != turn:
+                return
+            del self._turns[key]
+        self._loop.run_in_executor(None, self._expire, key, turn)
+
+    def _expire(self, key, turn):
+        try:
+            self.on_expire(key, turn)
+        except Exception:
+            # The turn stays where it was; the next action restarts its clock
+            logger.exception("Pick clock handler failed for %r", key)
@@ -0,0 +1,330 @@
+"""
+PSL Draft Simulator - Draft state engine
+
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+from models import Player, Team, DraftCursor, DRAFT_ROUNDS, create_demo_players, create_default_teams
+from player_index import PlayerIndex
+from search import PlayerSearch
+from history import DraftHistory, HistoryEntry
+
+
+# ======================
+# DRAFT ENGINE CLASS
+# ======================
+class DraftEngine:
+    """All mutable draft state, with one writer at a time and mostly lock-free reads.
+
+    Mutations run inside `write()`, which serializes them on a lock. Reads
+    go through `read()`, a seqlock: the version is odd while a write is in
+    progress, and a read that overlaps a write is simply run again, so a
+    reader never sees half of a pick. A reader only waits on a writer when
+    writes keep landing mid-read and it falls back to taking the lock.
+
+    With a `shared_log` (see shared_log.py) the engine is one replica of a
+    state shared by several worker processes: each write first catches up on
+    events committed by other workers inside the log's cross-process
+    transaction, and `sync()` pulls them in between requests.
+    """
+
+    def __init__(self, shared_log=None):
+        self.players = []
+        self.player_dict = {}
+        self.teams = []
+        self.history = DraftHistory()
+        self.draft_queue = DraftCursor()
+        self.draft_started = False
+        self.index = PlayerIndex()
+        self.search = PlayerSearch()
+        self.shared_log = shared_log
+        self.shared_seq = -1
+        # Called with each event applied from another worker's commit
+        self.on_remote_event = None
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._version = 0
+
+    # ----- teams -----
+    @property
+    def teams(self):
+        return self._teams
+
+    @teams.setter
+    def teams(self, teams):
+        self._teams = teams
+        # Team ID -> position, rebuilt whenever the team list is replaced
+        self.team_index = {team.id: idx for idx, team in enumerate(teams)}
+
+    def team_position(self, key):
+        """Position of a team given its ID (or, in older events and files, its position)"""
+        return key if isinstance(key, int) else self.team_index[key]
+
+    def team_id(self, key):
+        """ID of a team given its ID or, in older events and files, its position"""
+        return self.teams[key].id if isinstance(key, int) else key
+
+    def event_team(self, event):
+        """Position of the team a buy, pick or undo event names"""
+        return self.team_index[event['team_id']] if 'team_id' in event else event['team_idx']
+
+    def rebuild_team_totals(self):
+        """Derive every team's running totals from its roster and the history"""
+        pre_draft_ids = {entry.player_id for entry in self.history.applied() if entry.kind == 'buy'}
+        for team in self.teams:
+            team.rebuild_totals(pre_draft_ids)
+
+    def rebuild_indexes(self):
+        """Re-index the whole pool: the sorted index now, the search index on its next query"""
+        self.index.rebuild(self.players)
+        self.search.rebuild(self.players)
+
+    # ----- concurrency -----
+    @contextmanager
+    def write(self):
+        """Run a block as the single writer (across processes with a shared log)"""
+        with self._lock:
+            self._depth += 1
+            outer = self._depth == 1
+            if outer:
+                self._version += 1
+            try:
+                if outer and self.shared_log is not None:
+                    with self.shared_log.transaction():
+                        self._apply_remote(self.shared_log.read_since(self.shared_seq))
+                        yield self
+                else:
+                    yield self
+            except BaseException:
+                if outer and self.shared_log is not None:
+                    # Memory may hold a change the log rolled back: reload on next sync
+                    self.shared_seq = -1
+                raise
+            finally:
+                if outer:
+                    self._version += 1
+                self._depth -= 1
+
+    def read(self, fn, attempts=5):
+        """Return fn() computed against state no writer touched meanwhile.
+
+        fn runs again whenever a write overlapped it, so it must be free of
+        side effects (no flash(), no writes). After `attempts` overlapped
+        runs it runs once more holding the write lock, which does wait for
+        the writer in progress.
+        """
+        for _ in range(attempts):
+            start = self._version
+            if start % 2:
+                time.sleep(0)
+                continue
+            try:
+                result = fn()
+            except Exception:
+                if self._version == start:
+                    raise
+                continue
+            if self._version == start:
+                return result
+        # Writes kept landing mid-read: take the lock once to guarantee progress
+        with self._lock:
+            return fn()
+
+    def sync(self):
+        """Apply events other workers committed; skipped while a local write runs"""
+        if self.shared_log is None or not self._lock.acquire(blocking=False):
+            return
+        try:
+            changes = self.shared_log.read_since(self.shared_seq)
+            if changes[0] is not None or changes[1]:
+                self._version += 1
+                try:
+                    self._apply_remote(changes)
+                finally:
+                    self._version += 1
+        finally:
+            self._lock.release()
+
+    def follow(self, interval=0.5):
+        """Sync from a background thread too, so an idle worker's live feed
+        still carries the picks made on other workers"""
+        if self.shared_log is None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync()
+                except Exception:
+                    # A failed read is retried on the next tick (or request)
+                    pass
+
+        threading.Thread(target=loop, name='draft-engine-follow', daemon=True).start()
+
+    def _apply_remote(self, changes):
+        snapshot, events = changes
+        if snapshot is not None:
+            self.restore(snapshot)
+            self.shared_seq = snapshot['seq']
+            if self.on_remote_event:
+                self.on_remote_event({'type': 'reset'})
+        for seq, event in events:
+            self.apply(event)
+            self.shared_seq = seq
+            if self.on_remote_event:
+                self.on_remote_event(event)
+
+    # ----- state changes -----
+    def add_to_pool(self, player):
+        """Add a new player to the pool, the lookup dict, the sorted index and the search index"""
+        self.players.append(player)
+        self.player_dict[player.id] = player
+        self.index.add(player)
+        self.search.add(player)
+
+    def remove_from_pool(self, player_id):
+        """Take back a player add_to_pool added (one whose registration failed to save)"""
+        player = self.player_dict.pop(player_id)
+        self.players.remove(player)
+        self.rebuild_indexes()
+
+    def add_many_to_pool(self, players):
+        """Add a batch of new players, re-sorting the index once instead of per player"""
+        self.players.extend(players)
+        for player in players:
+            self.player_dict[player.id] = player
+        self.rebuild_indexes()
+
+    def reset(self):
+        Player.player_counter = 1001
+        self.players = create_demo_players()
+        self.player_dict = {p.id: p for p in self.players}
+        self.rebuild_indexes()
+        self.teams = create_default_teams()
+        self.history = DraftHistory()
+        self.draft_queue = DraftCursor()
+        self.draft_started = False
+
+    def apply(self, event):
+        """Apply one draft event to the state (used live and on replay)"""
+        kind = event['type']
+
+        if kind == 'register':
+            player_id, name, rating, price, country = event['player']
+            if player_id not in self.player_dict:
+                self.add_to_pool(Player(name, rating, price, country, player_id=player_id))
+                Player.player_counter = max(Player.player_counter, int(player_id[1:]) + 1)
+        elif kind == 'import':
+            new_players = [Player(name, rating, price, country, player_id=player_id)
+                           for player_id, name, rating, price, country in event['players']
+                           if player_id not in self.player_dict]
+            self.add_many_to_pool(new_players)
+            for player in new_players:
+                Player.player_counter = max(Player.player_counter, int(player.id[1:]) + 1)
+        elif kind == 'budget':
+            for team_key, new_budget in event['budgets']:
+                self.teams[self.team_position(team_key)].update_budget(new_budget)
+        elif kind == 'buy':
+            team = self.teams[self.event_team(event)]
+            self._record(HistoryEntry('buy', team.id, event['player_id'], 0, None))
+        elif kind == 'pick':
+            team = self.teams[self.event_team(event)]
+            self._record(HistoryEntry('pick', team.id, event['player_id'], event['round'],
+                                      self.draft_queue.pick_index))
+        elif kind == 'skip':
+            current_round, team_idx = self.draft_queue[0]
+            self._record(HistoryEntry('skip', self.teams[team_idx].id, None, current_round,
+                                      self.draft_queue.pick_index))
+        elif kind == 'undo':
+            self._revert_entry(self.history.undo())
+        elif kind == 'redo':
+            self._apply_entry(self.history.redo())
+        elif kind == 'jump':
+            while self.history.position > event['position']:
+                self._revert_entry(self.history.undo())
+            while self.history.position < event['position']:
+                self._apply_entry(self.history.redo())
+        elif kind == 'start':
+            self.draft_queue = DraftCursor(event.get('rounds', DRAFT_ROUNDS), len(self.teams))
+            self.draft_started = True
+        elif kind == 'reset':
+            self.reset()
+
+    # ----- history -----
+    def _record(self, entry):
+        self.history.record(entry)
+        self._apply_entry(entry)
+
+    def _apply_entry(self, entry):
+        """Carry out one history entry (a new action or a redo)"""
+        if entry.kind != 'skip':
+            player = self.player_dict[entry.player_id]
+            self.teams[self.team_index[entry.team_id]].add_player(player, is_pre_draft=entry.kind == 'buy')
+            self.index.mark_picked(player)
+            self.search.mark_picked(player)
+        if entry.pick_index is not None:
+            if entry.kind == 'skip':
+                self.draft_queue.skipped.append(entry.pick_index)
+            self.draft_queue.pick_index = entry.pick_index + 1
+
+    def _revert_entry(self, entry):
+        """Take back one history entry, putting the turn back on the clock"""
+        if entry.kind != 'skip':
+            player = self.player_dict[entry.player_id]
+            self.teams[self.team_index[entry.team_id]].remove_player(player, is_pre_draft=entry.kind == 'buy')
+            self.index.mark_available(player)
+            self.search.mark_available(player)
+        if entry.pick_index is not None:
+            if entry.kind == 'skip':
+                self.draft_queue.skipped.pop()
+            self.draft_queue.pick_index = entry.pick_index
+
+    # ----- snapshots -----
+    def snapshot(self):
+        """Collect the full draft state into a compact JSON-serializable dict"""
+        return {
+            'player_counter': Player.player_counter,
+            'players': [[p.id, p.name, p.rating, p.price, p.country, p.is_picked] for p in self.players],
+            'teams': [
+                [t.name, t.max_points, t.max_budget, t.password, t.current_points, t.current_budget,
+                 t.foreign_players, t.pre_draft_count, sorted(t.bought_categories), [p.id for p in t.players], t.id]
+                for t in self.teams
+            ],
+            'draft_started': self.draft_started,
+            'history': self.history.to_dict(),
+            'draft_cursor': self.draft_queue.to_list(),
+        }
+
+    def restore(self, snapshot):
+        """Replace the state with the contents of a snapshot"""
+        self.players = []
+        for player_id, name, rating, price, country, is_picked in snapshot['players']:
+            player = Player(name, rating, price, country, player_id=player_id)
+            player.is_picked = is_picked
+            self.players.append(player)
+        self.player_dict = {p.id: p for p in self.players}
+        Player.player_counter = snapshot['player_counter']
+
+        # Running totals are rebuilt below; older snapshots have no team ID
+        teams = []
+        for row in snapshot['teams']:
+            name, max_points, max_budget, password = row[:4]
+            team = Team(name, max_points, max_budget, password, team_id=row[10] if len(row) > 10 else None)
+            team.players = [self.player_dict[pid] for pid in row[9]]
+            teams.append(team)
+        self.teams = teams
+
+        self.draft_started = snapshot['draft_started']
+        if 'history' in snapshot:
+            self.history = DraftHistory.from_dict(snapshot['history'])
+        else:
+            # Older snapshots kept an undo stack naming teams by position
+            self.history = DraftHistory.from_undo_stack(
+                (self.team_id(team_key), player_id, round_num)
+                for team_key, player_id, round_num in snapshot['undo_stack'])
+        self.draft_queue = DraftCursor(*snapshot['draft_cursor'])
+        self.rebuild_team_totals()
+        self.rebuild_indexes()
@@ -0,0 +1,225 @@
+"""
+PSL Draft Simulator - Server-Sent Events broadcaster for the live draft feed
+
+"""
+import asyncio
+from collections import deque
+import json
+import os
+import secrets
+import socket
+import threading
+
+
+# ======================
+# DRAFT EVENT BROKER CLASS
+# ======================
+class DraftEventBroker:
+    """Draft events in their wire form, for the live feed to fan out.
+
+    Each event is encoded once and kept in a bounded ring buffer under a
+    sequence number; listeners (the LiveFeedServer) are told after every
+    publish and read what they missed from the buffer. A client that
+    reconnects with Last-Event-ID picks up where it left off.
+    Event ids are `<stream_id>-<seq>`, with a stream_id new every boot (and
+    every worker), so an id this broker did not hand out, or one that fell
+    out of the buffer, is answered with a single resync event instead.
+    """
+
+    def __init__(self, history=1000, boot_id=None):
+        self._boot_id = boot_id or secrets.token_hex(4)
+        self._buffer = deque(maxlen=history)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def last_id(self):
+        return self._seq
+
+    @property
+    def stream_id(self):
+        # Workers forked from one loaded app share its boot id; the pid tells their feeds apart
+        return f"{self._boot_id}.{os.getpid()}"
+
+    def add_listener(self, listener):
+        """Call listener() after every publish (from the publishing thread)"""
+        self._listeners.append(listener)
+
+    def publish(self, kind, data):
+        """Encode and buffer one event, then tell the listeners"""
+        payload = json.dumps(data, separators=(',', ':'))
+        with self._lock:
+            self._seq += 1
+            message = f"id: {self.stream_id}-{self._seq}\nevent: {kind}\ndata: {payload}\n\n".encode('utf-8')
+            self._buffer.append((self._seq, message))
+            seq = self._seq
+        for listener in self._listeners:
+            listener()
+        return seq
+
+    def resume(self, last_event_id):
+        """Return (encoded messages a reconnecting client missed, newest seq)
+        for its Last-Event-ID header; None starts from now"""
+        if last_event_id is None:
+            return [], self._seq
+        stream_id, _, seq = last_event_id.rpartition('-')
+        if stream_id != self.stream_id or not seq.isdigit():
+            with self._lock:
+                return [self._resync()], self._seq
+        return self.messages_after(int(seq))
+
+    def messages_after(self, last_id):
+        """Return (encoded messages newer than seq last_id, newest seq)"""
+        with self._lock:
+            # Ahead of this broker (it restarted) or behind its buffer: the client cannot catch up
+            if last_id > self._seq or (self._buffer and last_id < self._buffer[0][0] - 1):
+                return [self._resync()], self._seq
+            batch = []
+            for seq, message in reversed(self._buffer):
+                if seq <= last_id:
+                    break
+                batch.append(message)
+            batch.reverse()
+            return batch, self._seq
+
+    def _resync(self):
+        return f"id: {self.stream_id}-{self._seq}\nevent: resync\ndata: {{}}\n\n".encode('utf-8')
+
+
+# ======================
+# LIVE FEED SERVER CLASS
+# ======================
+class LiveFeedServer:
+    """Every open live feed connection, served from one asyncio event loop.
+
+    The loop runs in a single daemon thread (like the pick clock) and
+    accepts SSE connections on its own port; each connection is only a
+    StreamWriter and the seq it has been sent up to. A publish schedules
+    one flush on the loop, which writes each batch of already encoded
+    events to every connection at that position, so a thousand watchers
+    cost one thread and one buffer lookup per distinct position. Idle
+    connections get a keepalive comment every `heartbeat` seconds. A
+    connection with more than `max_buffer` bytes unsent is dropped; its
+    browser reconnects with Last-Event-ID and catches up or resyncs.
+    """
+
+    PATH = '/api/draft/stream'
+    HEADERS = (b"HTTP/1.1 200 OK\r\n"
+               b"Content-Type: text/event-stream\r\n"
+               b"Cache-Control: no-cache\r\n"
+               b"X-Accel-Buffering: no\r\n"
+               # Pages are served from the app's port, so the feed is cross-origin to them
+               b"Access-Control-Allow-Origin: *\r\n"
+               b"Connection: close\r\n\r\n")
+    PREFLIGHT = (b"HTTP/1.1 204 No Content\r\n"
+                 b"Access-Control-Allow-Origin: *\r\n"
+                 b"Access-Control-Allow-Methods: GET\r\n"
+                 b"Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n"
+                 b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+    NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+    def __init__(self, broker, heartbeat=15.0, max_buffer=256 * 1024):
+        self.broker = broker
+        self.heartbeat = heartbeat
+        self.max_buffer = max_buffer
+        self.port = None
+        self._loop = None
+        self._server = None
+        # writer -> seq sent up to; only touched on the loop thread
+        self._clients = {}
+        self._flush_pending = False
+        self._lock = threading.Lock()
+        broker.add_listener(self._published)
+
+    def start(self, host='0.0.0.0', port=0, reuse_port=False):
+        """Listen for feed connections (port 0 picks a free port); returns the port.
+        `reuse_port` lets several worker processes share one port."""
+        with self._lock:
+            if self._server is not None:
+                return self.port
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name='live-feed', daemon=True).start()
+            listen = asyncio.start_server(self._serve, host, port,
+                                          reuse_port=reuse_port and hasattr(socket, 'SO_REUSEPORT'))
+            try:
+                self._server = asyncio.run_coroutine_threadsafe(listen, self._loop).result()
+            except OSError:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+                raise
+            self.port = self._server.sockets[0].getsockname()[1]
+            self._loop.call_soon_threadsafe(self._loop.call_later, self.heartbeat, self._beat)
+            return self.port
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def connection_count(self):
+        return len(self._clients)
+
+    # ----- publishing thread -----
+    def _published(self):
+        # One flush per burst of events: it sends everything buffered when it runs
+        if self._loop is not None and not self._flush_pending:
+            self._flush_pending = True
+            self._loop.call_soon_threadsafe(self._flush)
+
+    # ----- loop thread -----
+    async def _serve(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        request_line, *lines = head.decode('latin-1').split("\r\n")
+        method, _, target = request_line.partition(' ')
+        if method != 'GET' or target.split(' ')[0].split('?')[0] != self.PATH:
+            writer.write(self.PREFLIGHT if method == 'OPTIONS' else self.NOT_FOUND)
+            writer.close()
+            return
+        headers = {}
+        for line in lines:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        batch, seq = self.broker.resume(headers.get('last-event-id'))
+        writer.write(self.HEADERS + b"retry: 2000\n\n" + b"".join(batch))
+        self._clients[writer] = seq
+        try:
+            # Feed clients send nothing more; this returns when they go away
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(writer)
+
+    def _flush(self):
+        self._flush_pending = False
+        batches = {}
+        for writer, seq in list(self._clients.items()):
+            if seq not in batches:
+                batch, newest = self.broker.messages_after(seq)
+                batches[seq] = (b"".join(batch), newest)
+            data, newest = batches[seq]
+            if data:
+                self._send(writer, data)
+            if writer in self._clients:
+                self._clients[writer] = newest
+
+    def _beat(self):
+        for writer in list(self._clients):
+            self._send(writer, b": keepalive\n\n")
+        self._loop.call_later(self.heartbeat, self._beat)
+
+    def _send(self, writer, data):
+        transport = writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > self.max_buffer:
+            self._drop(writer)
+            return
+        writer.write(data)
+
+    def _drop(self, writer):
+        if self._clients.pop(writer, None) is not None:
+            writer.transport.abort()
@@ -0,0 +1,53 @@
+"""
+PSL Draft Simulator - Cache of rendered page fragments
+
+"""
+from collections import OrderedDict
+import threading
+
+
+# ======================
+# FRAGMENT CACHE CLASS
+# ======================
+class FragmentCache:
+    """Rendered HTML fragments keyed by (fragment, version stamp), least recently used out first.
+
+    A team's stamp (Team.version) changes with every pick, undo or budget
+    change, so after a pick only that team's fragments miss and are
+    rendered again; every other team is served from here. An entry for an
+    old stamp is never asked for again and simply ages out, so the cache
+    needs no invalidation, only its bound of `max_entries` fragments.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        """Return the fragment for key, calling render() to build it on a miss"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        # Rendered outside the lock: two requests may both render a new
+        # stamp, which costs a render but gives the same HTML
+        html = render()
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,75 @@
+"""
+PSL Draft Simulator - Draft history with undo, redo and jump-to-pick
+
+"""
+from collections import namedtuple
+
+# One draft action: kind is 'buy', 'pick' or 'skip'; player_id is None for a
+# skip (team_id is the team that was on the clock); pick_index is the draft
+# cursor position the action used (None for a buy, and for picks recorded
+# before the cursor was kept)
+HistoryEntry = namedtuple('HistoryEntry', ['kind', 'team_id', 'player_id', 'round', 'pick_index'])
+
+
+# ======================
+# DRAFT HISTORY CLASS
+# ======================
+class DraftHistory:
+    """Every buy, pick and skip in order, plus how many of them are applied.
+
+    Undo and redo only move `position`, so both are O(1) and an undone
+    action stays available for redo until a new action replaces it. The
+    draft state at any position is the initial state plus the first
+    `position` entries, so jumping from the current state to pick N applies
+    or reverts just the entries in between; the current state acts as the
+    checkpoint and nothing is replayed from pick zero.
+    """
+
+    def __init__(self, entries=(), position=None):
+        self.entries = [HistoryEntry(*entry) for entry in entries]
+        self.position = len(self.entries) if position is None else position
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, entry):
+        """Append a new action, dropping any undone actions after the current position"""
+        del self.entries[self.position:]
+        self.entries.append(entry)
+        self.position += 1
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries)
+
+    def last(self):
+        """The action an undo would revert, or None"""
+        return self.entries[self.position - 1] if self.position else None
+
+    def undo(self):
+        self.position -= 1
+        return self.entries[self.position]
+
+    def redo(self):
+        entry = self.entries[self.position]
+        self.position += 1
+        return entry
+
+    def applied(self):
+        """Entries in effect, oldest first"""
+        return self.entries[:self.position]
+
+    def to_dict(self):
+        return {'entries': [list(entry) for entry in self.entries], 'position': self.position}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['entries'], data['position'])
+
+    @classmethod
+    def from_undo_stack(cls, undo_stack):
+        """Convert the (team, player_id, round) stack older files kept (no cursor positions)"""
+        return cls(('buy' if round_num == 0 else 'pick', team_id, player_id, round_num, None)
+                   for team_id, player_id, round_num in undo_stack)
@@ -0,0 +1,94 @@
+"""
+PSL Draft Simulator - Append-only event journal with compacted snapshots
+
+"""
+import json
+import os
+
+
+# ======================
+# DRAFT JOURNAL CLASS
+# ======================
+class DraftJournal:
+    """Write-ahead log of draft events plus a periodic full-state snapshot.
+
+    Every change is appended as one JSON line and fsync'd before the request
+    returns, so a pick costs one small write instead of rewriting every CSV.
+    Each event carries a sequence number; the snapshot records the last
+    sequence it contains, so events already folded into it are skipped on
+    replay even if the log was not truncated before a crash.
+    """
+
+    def __init__(self, log_path, snapshot_path, snapshot_interval=1000):
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self._log = None
+
+    def load(self):
+        """Return the latest snapshot (or None) and the events logged after it"""
+        snapshot = None
+        self.seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.seq = snapshot['seq']
+
+        events = []
+        if os.path.exists(self.log_path):
+            good_bytes = 0
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash: everything after it is lost
+                        break
+                    good_bytes += len(line)
+                    if event['seq'] > self.seq:
+                        events.append(event)
+                        self.seq = event['seq']
+            # Drop a partial trailing record so new appends start on a clean line
+            if good_bytes < os.path.getsize(self.log_path):
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(good_bytes)
+
+        self.events_since_snapshot = len(events)
+        return snapshot, events
+
+    def append(self, event):
+        """Durably append one event and return its sequence number"""
+        if self._log is None:
+            self._log = open(self.log_path, 'ab')
+        self.seq += 1
+        record = dict(event, seq=self.seq)
+        self._log.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self.events_since_snapshot += 1
+        return self.seq
+
+    def needs_snapshot(self):
+        return self.events_since_snapshot >= self.snapshot_interval
+
+    def write_snapshot(self, state):
+        """Atomically replace the snapshot with `state` and truncate the log"""
+        state = dict(state, seq=self.seq)
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_path, 'wb')
+        self.events_since_snapshot = 0
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,214 @@
+"""
+PSL Draft Simulator - Request metrics and a sampling profiler for slow requests
+
+"""
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ======================
+# METRICS CLASS
+# ======================
+class Metrics:
+    """Counters, gauges and latency histograms served in the Prometheus text format.
+
+    Each series is a name plus a set of labels. Recording is a dict update
+    under one lock, and a histogram observation is one bisect into fixed
+    buckets, so instrumenting a hot path costs about a microsecond.
+    Buckets are kept per bucket and only made cumulative when rendered.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._help = {}
+        self._counters = {}
+        self._gauges = {}
+        # (name, labels) -> [count per bucket..., count above the last bucket, sum]
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe how long a block takes (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def value(self, name, **labels):
+        """Current value of a counter or gauge (0 if never recorded)"""
+        key = (name, _label_key(labels))
+        return self._counters.get(key, self._gauges.get(key, 0))
+
+    def count(self, name, **labels):
+        """Number of observations in a histogram series"""
+        series = self._histograms.get((name, _label_key(labels)))
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        """All series in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, list(series)) for key, series in self._histograms.items())
+
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+        for (name, key), value in gauges:
+            header(name, 'gauge')
+            lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+        for (name, key), series in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', repr(bound))])} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {series[-1]!r}")
+            lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry: routes, storage backends and the engine's callers record here
+metrics = Metrics()
+
+
+# ======================
+# SAMPLING PROFILER CLASS
+# ======================
+class SamplingProfiler:
+    """Samples the call stacks of in-flight requests and dumps the slow ones.
+
+    While enabled, a background thread wakes every `interval` seconds
+    and records the current stack of each thread that is serving a request
+    (via sys._current_frames), so a request pays nothing but two dict
+    operations. A request that took at least `slow_seconds` has its samples
+    written to `directory` as folded stacks ("outer;inner count" per line),
+    the input format of flamegraph.pl and speedscope. Requests on gevent
+    greenlets are not seen, since they share one OS thread.
+    """
+
+    def __init__(self, directory, slow_seconds=0.5, interval=0.005, max_files=200):
+        self.directory = directory
+        self.slow_seconds = slow_seconds
+        self.interval = interval
+        self.max_files = max_files
+        self.enabled = False
+        self.dumped = 0
+        # Thread ident -> Counter of folded stacks, for requests in flight
+        self._active = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enable(self, slow_seconds=None):
+        if slow_seconds is not None:
+            self.slow_seconds = slow_seconds
+        with self._lock:
+            self.enabled = True
+            if self._thread is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+
+    def disable(self):
+        self.enabled = False
+        self._active.clear()
+
+    def begin(self):
+        """Start sampling the calling thread's request"""
+        if self.enabled:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, name, seconds):
+        """Stop sampling; write the samples if the request was slow. Returns the file or None"""
+        samples = self._active.pop(threading.get_ident(), None)
+        if not samples or seconds < self.slow_seconds or self.dumped >= self.max_files:
+            return None
+        self.dumped += 1
+        safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        path = os.path.join(self.directory, f"{int(time.time() * 1000)}-{safe_name}-{int(seconds * 1000)}ms.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _run(self):
+        # Started on first enable; idles at two wake-ups a second while disabled
+        while True:
+            time.sleep(self.interval if self.enabled else 0.5)
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            for ident, samples in list(self._active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[_fold(frame)] += 1
+
+
+def _fold(frame):
+    """One stack as 'outermost;...;innermost' of file:function entries"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
@@ -0,0 +1,297 @@
+"""
+PSL Draft Simulator - Player, Team and draft order models
+
+"""
+import itertools
+import re
+
+# Source of Team.version stamps: shared by all teams, so a stamp is never
+# reused, even by a team rebuilt after a reset or a reload
+_team_versions = itertools.count(1)
+
+# Draft-board order of the player categories
+CATEGORY_ORDER = {"Platinum": 1, "Diamond": 2, "Silver": 3, "Bronze": 4, "Emerging": 5}
+
+
+def category_for_rating(rating):
+    if rating > 90:
+        return "Platinum"
+    elif rating > 80:
+        return "Diamond"
+    elif rating > 60:
+        return "Silver"
+    elif rating > 50:
+        return "Bronze"
+    else:
+        return "Emerging"
+
+
+# ======================
+# PLAYER CLASS
+# ======================
+class Player:
+    # No per-instance __dict__: large pools hold hundreds of thousands of these
+    __slots__ = ('id', 'name', 'rating', 'price', 'country', 'is_picked', 'category')
+    player_counter = 1001
+    
+    def __init__(self, name, rating, price, country="Pakistan", player_id=None):
+        if player_id:
+            self.id = player_id
+        else:
+            self.id = f"P{Player.player_counter}"
+            Player.player_counter += 1
+        self.name = name
+        self.rating = rating
+        self.price = price
+        self.country = country
+        self.is_picked = False
+        self.category = self.get_category()
+    
+    def get_category(self):
+        return category_for_rating(self.rating)
+    
+    def get_category_order(self):
+        return CATEGORY_ORDER.get(self.category, 6)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'rating': self.rating,
+            'price': self.price,
+            'country': self.country,
+            'category': self.category,
+            'is_picked': self.is_picked
+        }
+
+
+def team_slug(name):
+    """Stable team ID derived from a name, e.g. 'lahore-qalandars'"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'team'
+
+
+# ======================
+# TEAM CLASS
+# ======================
+class Team:
+    def __init__(self, name, max_points, max_budget, password, team_id=None):
+        # Routes, events and the undo stack refer to teams by this ID, not list position
+        self.id = team_id or team_slug(name)
+        self.name = name
+        self.max_points = max_points
+        self.max_budget = max_budget
+        self.password = password
+        self.players = []
+        self.current_points = 0
+        self.current_budget = 0
+        self.foreign_players = 0
+        self.bought_categories = set()
+        self.pre_draft_count = 0
+        # Players per category, kept up to date pick by pick for the analytics views
+        self.category_counts = dict.fromkeys(CATEGORY_ORDER, 0)
+        # New stamp after every change to the roster or budget. It is taken
+        # last, so a render that raced a change is filed under the old stamp,
+        # which no later render asks for
+        self.version = next(_team_versions)
+    
+    # Where a player's picked flag lives; a draft session keeps its own
+    # bitmap instead of flagging the shared Player objects
+    def _is_picked(self, player):
+        return player.is_picked
+    
+    def _mark_picked(self, player, picked):
+        player.is_picked = picked
+    
+    def can_add_player(self, player, is_pre_draft=False):
+        if self._is_picked(player):
+            return False, "Player already picked"
+        if is_pre_draft and self.pre_draft_count >= 3:
+            return False, "Pre-draft limit reached (max 3 players)"
+        if self.current_points + player.rating > self.max_points:
+            return False, f"Points limit exceeded (Need: {player.rating}, Available: {self.max_points - self.current_points})"
+        if self.current_budget + player.price > self.max_budget:
+            return False, f"Budget limit exceeded (Need: PKR {player.price:,}, Available: PKR {self.max_budget - self.current_budget:,})"
+        if player.country != "Pakistan" and self.foreign_players >= 3:
+            return False, "Foreign player limit reached (max 3)"
+        if is_pre_draft and player.category in self.bought_categories:
+            return False, "Category already taken in pre-draft"
+        return True, "OK"
+    
+    def pick_limits(self, is_pre_draft=False):
+        """The thresholds can_add_player checks, so a board can flag illegal
+        players with a few comparisons each instead of calling it per player"""
+        return {
+            'max_rating': self.max_points - self.current_points,
+            'max_price': self.max_budget - self.current_budget,
+            'foreign_allowed': self.foreign_players < 3,
+            'blocked_categories': sorted(self.bought_categories) if is_pre_draft else [],
+            'full': is_pre_draft and self.pre_draft_count >= 3
+        }
+    
+    def add_player(self, player, is_pre_draft=False):
+        self.players.append(player)
+        self.current_points += player.rating
+        self.current_budget += player.price
+        self._mark_picked(player, True)
+        self.category_counts[player.category] += 1
+        if player.country != "Pakistan":
+            self.foreign_players += 1
+        if is_pre_draft:
+            self.bought_categories.add(player.category)
+            self.pre_draft_count += 1
+        self.version = next(_team_versions)
+    
+    def remove_player(self, player, is_pre_draft=False):
+        if self.players and self.players[-1] is player:
+            # Undo takes back a team's latest player: no list scan
+            self.players.pop()
+        else:
+            self.players.remove(player)
+        self.current_points -= player.rating
+        self.current_budget -= player.price
+        self._mark_picked(player, False)
+        self.category_counts[player.category] -= 1
+        if player.country != "Pakistan":
+            self.foreign_players -= 1
+        if is_pre_draft:
+            self.bought_categories.discard(player.category)
+            self.pre_draft_count -= 1
+        self.version = next(_team_versions)
+    
+    def rebuild_totals(self, pre_draft_ids=()):
+        """Recompute points, budget, foreign count, category counts and pre-draft
+        buys from the roster in one pass (`pre_draft_ids`: players bought before the draft)"""
+        points = budget = foreign = 0
+        bought = set()
+        pre_draft_count = 0
+        category_counts = dict.fromkeys(CATEGORY_ORDER, 0)
+        for player in self.players:
+            points += player.rating
+            budget += player.price
+            category_counts[player.category] += 1
+            if player.country != "Pakistan":
+                foreign += 1
+            if player.id in pre_draft_ids:
+                bought.add(player.category)
+                pre_draft_count += 1
+        self.current_points = points
+        self.current_budget = budget
+        self.foreign_players = foreign
+        self.bought_categories = bought
+        self.pre_draft_count = pre_draft_count
+        self.category_counts = category_counts
+        self.version = next(_team_versions)
+    
+    def update_budget(self, new_budget):
+        if new_budget < self.current_budget:
+            return False, f"Cannot set budget lower than current spending (PKR {self.current_budget:,})"
+        self.max_budget = new_budget
+        self.version = next(_team_versions)
+        return True, "Budget updated successfully"
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'max_points': self.max_points,
+            'current_points': self.current_points,
+            'max_budget': self.max_budget,
+            'current_budget': self.current_budget,
+            'foreign_players': self.foreign_players,
+            'pre_draft_count': self.pre_draft_count,
+            'player_ids': [p.id for p in self.players]
+        }
+
+
+# ======================
+# DRAFT CURSOR CLASS
+# ======================
+class DraftCursor:
+    """Snake draft order computed lazily from the current position.
+
+    Only the round count, team count, pick index and skipped picks are
+    stored; the (round, team_idx) of any pick is derived arithmetically, so
+    resuming a draft takes the same time and memory whatever the number of
+    rounds. It keeps the deque interface the routes use (`[0]`, `len`,
+    `popleft`, `clear`).
+    """
+
+    def __init__(self, total_rounds=0, num_teams=0, pick_index=0, skipped=()):
+        self.total_rounds = total_rounds
+        self.num_teams = num_teams
+        self.pick_index = pick_index
+        self.skipped = list(skipped)
+
+    @property
+    def total_picks(self):
+        return self.total_rounds * self.num_teams
+
+    def pick_at(self, pick_number):
+        """Return (round, team_idx) for an absolute pick number"""
+        round_num, position = divmod(pick_number, self.num_teams)
+        if round_num % 2 == 1:
+            position = self.num_teams - 1 - position
+        return round_num + 1, position
+
+    def __len__(self):
+        return max(self.total_picks - self.pick_index, 0)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, offset):
+        if not 0 <= offset < len(self):
+            raise IndexError('draft cursor index out of range')
+        return self.pick_at(self.pick_index + offset)
+
+    def __iter__(self):
+        for pick_number in range(self.pick_index, self.total_picks):
+            yield self.pick_at(pick_number)
+
+    def popleft(self):
+        current = self[0]
+        self.pick_index += 1
+        return current
+
+    def skip(self):
+        self.skipped.append(self.pick_index)
+        return self.popleft()
+
+    def clear(self):
+        self.total_rounds = 0
+        self.num_teams = 0
+        self.pick_index = 0
+        self.skipped = []
+
+    def to_list(self):
+        return [self.total_rounds, self.num_teams, self.pick_index, list(self.skipped)]
+
+
+# ======================
+# DEFAULT DATA
+# ======================
+DRAFT_ROUNDS = 5
+
+
+def create_demo_players():
+    return [
+        Player("Babar Azam", 95, 500000),
+        Player("Shaheen Afridi", 93, 480000),
+        Player("Mohammad Rizwan", 92, 470000),
+        Player("Naseem Shah", 88, 420000),
+        Player("Haris Rauf", 87, 410000),
+        Player("Shadab Khan", 85, 390000),
+        Player("Fakhar Zaman", 82, 370000),
+        Player("Saim Ayub", 78, 340000),
+        Player("Imad Wasim", 75, 320000),
+        Player("Usama Mir", 70, 280000),
+    ]
+
+
+def create_default_teams():
+    return [
+        Team("Lahore Qalandars", 1000, 5000000, "lahore123"),
+        Team("Karachi Kings", 1000, 5000000, "karachi123"),
+        Team("Multan Sultans", 1000, 5000000, "multan123"),
+        Team("Peshawar Zalmi", 1000, 5000000, "peshawar123"),
+    ]
@@ -0,0 +1,224 @@
+"""
+PSL Draft Simulator - Sorted index of the player pool
+
+"""
+from bisect import bisect_left, insort
+from itertools import islice
+
+from models import CATEGORY_ORDER, category_for_rating
+
+
+# ======================
+# PLAYER INDEX CLASS
+# ======================
+class PlayerIndex:
+    """Players kept in draft-board order: category, then rating descending.
+
+    Entries are (category_order, -rating, seq, player) tuples, where seq is
+    the registration order, so ties come out exactly as the old stable sort
+    of the `players` list did and two entries never compare the players
+    themselves. The full pool, the available players and per-category /
+    per-country buckets of available players are separate sorted lists. A
+    pick or undo moves one entry with a binary search plus a list shift,
+    and reading the top k is a slice. Available players are also kept in
+    price order, as (price, seq, player), for the auto-pick reserves.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._all = []
+        self._available = []
+        self._by_category = {}
+        self._by_country = {}
+        self._by_price = []
+        self._next_seq = 0
+
+    def rebuild(self, players):
+        """Index a whole pool at once with a single sort"""
+        self._entries = {}
+        for seq, player in enumerate(players):
+            self._entries[player.id] = (player.get_category_order(), -player.rating, seq, player)
+        self._next_seq = len(players)
+        self._all = sorted(self._entries.values())
+        self._available = [e for e in self._all if not e[3].is_picked]
+        self._by_category = {}
+        self._by_country = {}
+        for entry in self._available:
+            self._by_category.setdefault(entry[3].category, []).append(entry)
+            self._by_country.setdefault(entry[3].country, []).append(entry)
+        self._by_price = sorted(_price_entry(e) for e in self._available)
+
+    def add(self, player):
+        """Index a newly registered player"""
+        entry = (player.get_category_order(), -player.rating, self._next_seq, player)
+        self._next_seq += 1
+        self._entries[player.id] = entry
+        insort(self._all, entry)
+        if not player.is_picked:
+            self._insert_available(entry)
+
+    def mark_picked(self, player):
+        entry = self._entries[player.id]
+        for entries in self._buckets_for(entry):
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] is entry:
+                del entries[i]
+        price_entry = _price_entry(entry)
+        i = bisect_left(self._by_price, price_entry)
+        if i < len(self._by_price) and self._by_price[i][1] == entry[2]:
+            del self._by_price[i]
+
+    def mark_available(self, player):
+        entry = self._entries[player.id]
+        i = bisect_left(self._available, entry)
+        if i < len(self._available) and self._available[i] is entry:
+            return
+        self._insert_available(entry)
+
+    def _insert_available(self, entry):
+        self._by_category.setdefault(entry[3].category, [])
+        self._by_country.setdefault(entry[3].country, [])
+        for entries in self._buckets_for(entry):
+            insort(entries, entry)
+        insort(self._by_price, _price_entry(entry))
+
+    def _buckets_for(self, entry):
+        player = entry[3]
+        return (self._available,
+                self._by_category.get(player.category, []),
+                self._by_country.get(player.country, []))
+
+    def available(self, limit=None, category=None, country=None):
+        """Return the first `limit` available players, optionally from one bucket"""
+        if category is not None and country is not None:
+            matches = (e[3] for e in self._by_category.get(category, []) if e[3].country == country)
+            return list(islice(matches, limit))
+        if category is not None:
+            entries = self._by_category.get(category, [])
+        elif country is not None:
+            entries = self._by_country.get(country, [])
+        else:
+            entries = self._available
+        return [e[3] for e in entries[:limit]]
+
+    def page(self, limit, after=None, before=None, include_picked=False, category=None,
+             country=None, min_rating=None, max_rating=None, min_price=None, max_price=None,
+             name_prefix=None):
+        """Return (players, prev_cursor, next_cursor) for one filtered page.
+
+        Cursors are the sort key of the row at the page edge rather than an
+        offset, so a page stays put when players above it are picked or
+        un-picked between requests. Every list is sorted by category and
+        then rating, and the categories are rating bands, so the rows of a
+        category or rating range are one slice found by bisection; only the
+        country, price and name filters are checked row by row.
+        """
+        if include_picked:
+            entries = self._all
+        elif category is not None:
+            entries = self._by_category.get(category, [])
+        elif country is not None:
+            entries = self._by_country.get(country, [])
+        else:
+            entries = self._available
+        prefix = name_prefix.lower() if name_prefix else None
+
+        lo, hi = 0, len(entries)
+        if category is not None:
+            order = CATEGORY_ORDER.get(category, 0)
+            lo, hi = bisect_left(entries, (order,)), bisect_left(entries, (order + 1,))
+        if max_rating is not None:
+            lo = max(lo, bisect_left(entries, _rating_key(max_rating), lo, hi))
+        if min_rating is not None:
+            hi = max(lo, min(hi, bisect_left(entries, _rating_key(min_rating - 1), lo, hi)))
+
+        def matches(player):
+            return ((country is None or player.country == country)
+                    and (min_price is None or player.price >= min_price)
+                    and (max_price is None or player.price <= max_price)
+                    and (prefix is None or player.name.lower().startswith(prefix)))
+
+        if before is not None:
+            step, i = -1, bisect_left(entries, decode_cursor(before), lo, hi) - 1
+        else:
+            step, i = 1, bisect_left(entries, _after_key(after), lo, hi) if after is not None else lo
+
+        found = []
+        while lo <= i < hi and len(found) <= limit:
+            if matches(entries[i][3]):
+                found.append(entries[i])
+            i += step
+
+        has_more = len(found) > limit
+        found = found[:limit]
+        if step == -1:
+            found.reverse()
+        if not found:
+            return [], None, None
+        first, last = encode_cursor(found[0]), encode_cursor(found[-1])
+        if step == 1:
+            return [e[3] for e in found], first if after is not None else None, last if has_more else None
+        return [e[3] for e in found], first if has_more else None, last
+
+    def iter_available(self, max_rating=None):
+        """Yield available players in board order, starting at the best rated <= max_rating"""
+        entries = self._available
+        start = 0
+        if max_rating is not None:
+            start = bisect_left(entries, _rating_key(max_rating))
+        for entry in islice(entries, start, None):
+            yield entry[3]
+
+    def cheapest(self, count, country=None):
+        """The `count` cheapest available players, optionally only from one country"""
+        if country is None:
+            return [e[2] for e in self._by_price[:count]]
+        matches = (e[2] for e in self._by_price if e[2].country == country)
+        return list(islice(matches, count))
+
+    def lowest_rated(self, count, country=None):
+        """The `count` lowest rated available players, optionally only from one country"""
+        entries = self._available if country is None else self._by_country.get(country, [])
+        return [e[3] for e in reversed(entries[-count:])] if count > 0 else []
+
+    def all_players(self, limit=None):
+        return [e[3] for e in self._all[:limit]]
+
+    def available_count(self, category=None, country=None):
+        if category is not None:
+            return len(self._by_category.get(category, []))
+        if country is not None:
+            return len(self._by_country.get(country, []))
+        return len(self._available)
+
+    def __len__(self):
+        return len(self._all)
+
+
+def _price_entry(entry):
+    return (entry[3].price, entry[2], entry[3])
+
+
+def _rating_key(rating):
+    # Sorts just before the first entry rated `rating` or lower
+    return CATEGORY_ORDER[category_for_rating(rating)], -rating
+
+
+# ======================
+# PAGE CURSORS
+# ======================
+def encode_cursor(entry):
+    order, neg_rating, seq = entry[:3]
+    return f"{order}.{-neg_rating}.{seq}"
+
+
+def decode_cursor(cursor):
+    """Turn a cursor string back into the sort key it was taken from"""
+    order, rating, seq = (int(part) for part in cursor.split('.'))
+    return order, -rating, seq
+
+
+def _after_key(cursor):
+    # Smallest key sorting after the cursor row (ties are broken by seq)
+    order, neg_rating, seq = decode_cursor(cursor)
+    return order, neg_rating, seq + 1
@@ -0,0 +1,114 @@
+"""
+PSL Draft Simulator - Binary snapshot of the player pool for fast startup
+
+"""
+import mmap
+import os
+import struct
+
+from models import Player
+
+MAGIC = b'PSLPOOL2'
+# magic, players, countries, source size, source mtime (ns), Player.player_counter, string table bytes
+HEADER = struct.Struct('<8sQQqqQQ')
+# One fixed-width record per player, in pool order: rating, price, country code. Who is
+# picked is left out: it changes on every pick, and loading derives it from the rosters
+RECORD = struct.Struct('<iqH')
+SEPARATOR = '\0'
+
+
+def source_stamp(source_path):
+    """(size, mtime) of the CSV file a snapshot was taken from"""
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# ======================
+# SNAPSHOT FUNCTIONS
+# ======================
+def write_snapshot(path, players, player_counter, source_path):
+    """Save the pool next to the CSV file it was loaded from.
+
+    The numbers go in fixed-width records and the texts in one string
+    table (countries first, then each player's ID and name), so loading is
+    a few bulk reads instead of parsing every row. Returns False, writing
+    nothing, when a text contains the table's separator.
+    """
+    countries = {}
+    texts = []
+    records = bytearray(RECORD.size * len(players))
+    for pos, player in enumerate(players):
+        code = countries.setdefault(player.country, len(countries))
+        RECORD.pack_into(records, pos * RECORD.size, player.rating, player.price, code)
+        texts.append(player.id)
+        texts.append(player.name)
+    texts[:0] = countries
+    if any(SEPARATOR in text for text in texts):
+        return False
+    strings = SEPARATOR.join(texts).encode('utf-8')
+
+    size, mtime_ns = source_stamp(source_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(players), len(countries), size, mtime_ns, player_counter, len(strings)))
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return True
+
+
+def restamp_snapshot(path, source_path):
+    """Mark a snapshot as taken from the CSV file as it is now.
+
+    For a rewrite of the CSV file that left the pool itself alone (a pick
+    only changes the is_picked column), so the snapshot stays in use.
+    Only the header changes.
+    """
+    size, mtime_ns = source_stamp(source_path)
+    with open(path, 'r+b') as f:
+        fields = list(HEADER.unpack(f.read(HEADER.size)))
+        fields[3:5] = size, mtime_ns
+        f.seek(0)
+        f.write(HEADER.pack(*fields))
+
+
+def snapshot_is_current(path, source_path):
+    """Whether a snapshot was taken from the CSV file as it is now"""
+    try:
+        with open(path, 'rb') as f:
+            fields = HEADER.unpack(f.read(HEADER.size))
+        return fields[0] == MAGIC and (fields[3], fields[4]) == source_stamp(source_path)
+    except (OSError, struct.error):
+        return False
+
+
+def read_snapshot(path, source_path):
+    """Return (players, player_counter) from a snapshot, or None when it is
+    missing, unreadable or older than the CSV file. Every player comes back
+    unpicked; the caller marks the ones on a roster."""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data.size() < HEADER.size:
+                    return None
+                magic, count, country_count, size, mtime_ns, player_counter, strings_length = HEADER.unpack_from(data)
+                if magic != MAGIC or (size, mtime_ns) != source_stamp(source_path):
+                    return None
+                strings_start = HEADER.size + count * RECORD.size
+                if data.size() != strings_start + strings_length:
+                    return None
+                records = data[HEADER.size:strings_start]
+                texts = data[strings_start:].decode('utf-8').split(SEPARATOR) if strings_length else []
+    except (OSError, ValueError):
+        # Missing, empty (mmap refuses those) or truncated: the CSV file is the fallback
+        return None
+
+    countries = texts[:country_count]
+    ids = texts[country_count::2]
+    names = texts[country_count + 1::2]
+    players = []
+    for player_id, name, (rating, price, code) in zip(ids, names, RECORD.iter_unpack(records)):
+        players.append(Player(name, rating, price, countries[code], player_id=player_id))
+    if len(players) != count:
+        return None
+    return players, player_counter
@@ -0,0 +1,288 @@
+"""
+PSL Draft Simulator - Typeahead search over player names and countries
+
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+import heapq
+import re
+import threading
+import unicodedata
+
+# Match quality of one query word against one player, best (lowest) first
+EXACT, PREFIX, COUNTRY, FUZZY = 0, 1, 2, 3
+# Words shorter than this are only matched by prefix; a typo in two letters is no signal
+MIN_FUZZY_LENGTH = 3
+MAX_QUERY_WORDS = 5
+# Sorts after every character a token can hold, closing a prefix range in the vocabulary
+PREFIX_END = '\U0010ffff'
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Lowercase words of a text, with accents folded ('Zaman' and 'Zamán' give 'zaman')"""
+    if not text:
+        return []
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return _WORD.findall(text.casefold())
+
+
+def trigrams(token):
+    """Three-letter slices of a token, padded at the start so short words still have some"""
+    padded = f"$${token}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it is known to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def max_typos(word):
+    return 1 if len(word) <= 5 else 2
+
+
+# ======================
+# PLAYER SEARCH CLASS
+# ======================
+class PlayerSearch:
+    """Available players by the words of their name and country.
+
+    The distinct words (tokens) are kept in one sorted list, so the words a
+    query word is a prefix of are a contiguous range found by bisection,
+    and each token maps to the IDs of the available players that have it.
+    A pick or undo takes the player's ID out of, or puts it back into, the
+    postings of its own few tokens; the vocabulary never changes. Name
+    tokens are also indexed by trigram, so a word that matches nothing by
+    prefix can still find names within one or two typos. Matches are ranked
+    by intersecting them with per-rating buckets, best rating first, so a
+    query matching half the pool still never sorts it.
+
+    A rebuild only takes a copy of the pool; the index itself is built by
+    `warm()` or on the first search, so loading state never waits for it
+    and processes that never search (bulk imports, sessions) never pay.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rebuild([])
+
+    # ----- maintenance -----
+    def rebuild(self, players):
+        """Start over from a whole pool, indexed by warm() or the next search"""
+        with self._lock:
+            self._pending = list(players)
+            self._built = False
+            self._players = {}
+            self._tokens = {}
+            self._country_tokens = {}
+            self._vocabulary = []
+            self._name_postings = {}
+            self._country_postings = {}
+            self._grams = {}
+            # Every indexed player by rating, and the ratings in use negated (so sorted highest first)
+            self._by_rating = {}
+            self._ratings = []
+
+    def add(self, player):
+        """Index a newly registered player"""
+        with self._lock:
+            if self._built:
+                for token in self._index(player):
+                    i = bisect_left(self._vocabulary, token)
+                    if i == len(self._vocabulary) or self._vocabulary[i] != token:
+                        self._vocabulary.insert(i, token)
+                        self._add_token(token)
+            else:
+                self._pending.append(player)
+
+    def mark_picked(self, player):
+        with self._lock:
+            if self._built and player.id in self._tokens:
+                self._update_postings(player.id, set.discard)
+
+    def mark_available(self, player):
+        with self._lock:
+            if self._built and player.id in self._tokens:
+                self._update_postings(player.id, set.add)
+
+    def _update_postings(self, player_id, change):
+        name_tokens, country_tokens = self._tokens[player_id]
+        for token in name_tokens:
+            change(self._name_postings[token], player_id)
+        for token in country_tokens:
+            change(self._country_postings[token], player_id)
+
+    def _index(self, player):
+        """Record a player's tokens and postings; returns the tokens"""
+        name_tokens = tuple(set(tokenize(player.name)))
+        country_tokens = self._country_tokens.get(player.country)
+        if country_tokens is None:
+            # A handful of countries spread over the whole pool
+            country_tokens = self._country_tokens[player.country] = tuple(set(tokenize(player.country)))
+        self._players[player.id] = player
+        self._tokens[player.id] = (name_tokens, country_tokens)
+        same_rating = self._by_rating.get(player.rating)
+        if same_rating is None:
+            same_rating = self._by_rating[player.rating] = set()
+            insort(self._ratings, -player.rating)
+        same_rating.add(player.id)
+        for tokens, postings in ((name_tokens, self._name_postings), (country_tokens, self._country_postings)):
+            for token in tokens:
+                ids = postings.get(token)
+                if ids is None:
+                    ids = postings[token] = set()
+                if not player.is_picked:
+                    ids.add(player.id)
+        return name_tokens + country_tokens
+
+    def _add_token(self, token):
+        if token.isalpha():
+            for gram in trigrams(token):
+                self._grams.setdefault(gram, set()).add(token)
+
+    def warm(self):
+        """Build the index now, e.g. from a background thread, rather than on the first search"""
+        self._ensure_built()
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            vocabulary = set()
+            for player in self._pending:
+                vocabulary.update(self._index(player))
+            # One sort of the whole vocabulary, where add() inserts a new token in place
+            self._vocabulary = sorted(vocabulary)
+            for token in self._vocabulary:
+                self._add_token(token)
+            self._pending = []
+            self._built = True
+
+    # ----- queries -----
+    def search(self, query, limit=10):
+        """The `limit` best available players for a typeahead query.
+
+        Every word of the query has to match a word of the player's name
+        (exactly or as a prefix) or of their country; when that finds fewer
+        than `limit` players, name words within a typo or two count too.
+        Players with better matches come first, then higher ratings.
+        """
+        self._ensure_built()
+        words = tokenize(query)[:MAX_QUERY_WORDS]
+        if not words or limit < 1:
+            return []
+        groups = self._match(words, fuzzy=False)
+        if (sum(len(ids) for ids in groups.values()) < limit
+                and any(len(word) >= MIN_FUZZY_LENGTH for word in words)):
+            groups = self._match(words, fuzzy=True)
+
+        found = []
+        for score in sorted(groups):
+            found.extend(self._best_rated(groups[score], limit - len(found)))
+            if len(found) == limit:
+                break
+        return [self._players[player_id] for player_id in found]
+
+    def _best_rated(self, ids, count):
+        """The `count` highest rated of a set of player IDs.
+
+        A large set is walked one rating at a time, intersecting it with the
+        players of that rating, so ranking half the pool is a few dozen set
+        intersections rather than a sort of half the pool.
+        """
+        def order(player_id):
+            player = self._players[player_id]
+            return -player.rating, player.name, player_id
+
+        if len(ids) <= count * len(self._ratings):
+            return heapq.nsmallest(count, ids, key=order)
+        best = []
+        for negated in self._ratings:
+            best.extend(sorted(ids & self._by_rating[-negated], key=order)[:count - len(best)])
+            if len(best) == count:
+                break
+        return best
+
+    def _match(self, words, fuzzy):
+        """Summed match tier -> IDs of the players every word matches at that total"""
+        groups = {0: None}
+        for word in words:
+            merged = {}
+            for score, ids in groups.items():
+                for tier, matches in self._match_word(word, fuzzy):
+                    hits = matches if ids is None else ids & matches
+                    if not hits:
+                        continue
+                    if score + tier in merged:
+                        merged[score + tier] |= hits
+                    else:
+                        merged[score + tier] = hits
+            if not merged:
+                return {}
+            groups = merged
+        return groups
+
+    def _match_word(self, word, fuzzy):
+        """(tier, player IDs) for one query word, best tier first; each player
+        appears once, at the best tier they match"""
+        start = bisect_left(self._vocabulary, word)
+        end = bisect_right(self._vocabulary, word + PREFIX_END, start)
+        matched = self._vocabulary[start:end]
+        exact = set(self._name_postings.get(word, ()))
+        tiers = [
+            (EXACT, exact),
+            (PREFIX, set().union(*(self._name_postings.get(token, ()) for token in matched if token != word))),
+            (COUNTRY, set().union(*(self._country_postings.get(token, ()) for token in matched))),
+        ]
+        if fuzzy and len(word) >= MIN_FUZZY_LENGTH:
+            near = self._near_tokens(word)
+            for distance in range(1, max_typos(word) + 1):
+                tiers.append((FUZZY + distance - 1, set().union(
+                    *(self._name_postings.get(token, ()) for token, typos in near if typos == distance))))
+        seen = None
+        result = []
+        for tier, ids in tiers:
+            if seen:
+                ids -= seen
+            if ids:
+                result.append((tier, ids))
+                seen = ids if seen is None else seen | ids
+        return result
+
+    def _near_tokens(self, word):
+        """(token, typos) for name tokens that start with something within max_typos(word) of word"""
+        limit = max_typos(word)
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        # Each typo spoils at most three trigrams
+        needed = max(1, len(grams) - 3 * limit)
+        near = []
+        for token, count in shared.items():
+            if count < needed or token.startswith(word):
+                continue
+            distance = min(edit_distance(word, token[:length], limit)
+                           for length in {len(word) - 1, len(word), len(word) + 1, len(token)})
+            if distance <= limit:
+                near.append((token, distance))
+        return near
+
+    def __len__(self):
+        self._ensure_built()
+        return len(self._players)
@@ -0,0 +1,362 @@
+"""
+PSL Draft Simulator - Independent draft sessions sharing one player pool
+
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+import os
+import re
+import threading
+import time
+
+from models import Team, DraftCursor, DRAFT_ROUNDS
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+# ======================
+# PLAYER CATALOG CLASS
+# ======================
+class PlayerCatalog:
+    """Read-only view of the main pool's Player objects, shared by every session.
+
+    Players are addressed by position. `order` lists every position in
+    draft-board order (category, then rating) and `by_category` does the
+    same per category, so a session lists its available players by walking
+    them and skipping the positions its picked bitmap has set.
+    """
+
+    def __init__(self, players):
+        self.players = tuple(players)
+        self.position = {p.id: pos for pos, p in enumerate(self.players)}
+        self.order = sorted(range(len(self.players)),
+                            key=lambda pos: (self.players[pos].get_category_order(), -self.players[pos].rating, pos))
+        self.by_category = {}
+        for pos in self.order:
+            self.by_category.setdefault(self.players[pos].category, []).append(pos)
+
+    def __len__(self):
+        return len(self.players)
+
+    def get(self, player_id):
+        pos = self.position.get(player_id)
+        return None if pos is None else self.players[pos]
+
+    def available(self, limit=None, category=None, picked=()):
+        """Players whose position is not set in `picked`, in board order"""
+        positions = self.order if category is None else self.by_category.get(category, ())
+        players = self.players
+        result = []
+        for pos in positions:
+            if not picked[pos]:
+                result.append(players[pos])
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+
+# ======================
+# PICKED BITMAP CLASS
+# ======================
+class PickedBitmap:
+    """One bit per catalog player, set once a team in the session has them.
+
+    Indexes like a bytearray of flags (`bitmap[pos]`) and keeps the number
+    of set bits as they change, so counting available players is constant
+    time.
+    """
+
+    __slots__ = ('bits', 'size', 'count')
+
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) // 8)
+        self.size = size
+        self.count = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, pos):
+        return (self.bits[pos >> 3] >> (pos & 7)) & 1
+
+    def __setitem__(self, pos, value):
+        byte, mask = pos >> 3, 1 << (pos & 7)
+        was_set = self.bits[byte] & mask
+        if value and not was_set:
+            self.bits[byte] |= mask
+            self.count += 1
+        elif not value and was_set:
+            self.bits[byte] &= ~mask & 0xFF
+            self.count -= 1
+
+
+# ======================
+# SESSION TEAM CLASS
+# ======================
+class SessionTeam(Team):
+    """A team whose picks are flagged in its session's bitmap, not on the shared players"""
+
+    def __init__(self, session, name, max_points, max_budget, password):
+        super().__init__(name, max_points, max_budget, password)
+        self.session = session
+
+    def _is_picked(self, player):
+        return self.session.is_picked(player)
+
+    def _mark_picked(self, player, picked):
+        self.session.picked[self.session.catalog.position[player.id]] = picked
+
+
+# ======================
+# DRAFT SESSION CLASS
+# ======================
+class DraftSession:
+    """One draft with its own teams, snake order and undo stack.
+
+    Undo stack entries are (team_idx, player_id, round, pick_index): a buy
+    has round 0 and no pick index, and a skip has no team or player. Undo
+    puts the cursor back on the pick index, like DraftEngine._revert_entry.
+    """
+
+    def __init__(self, session_id, catalog, admin_password, rounds=DRAFT_ROUNDS, pick_seconds=0):
+        self.id = session_id
+        self.catalog = catalog
+        self.admin_password = admin_password
+        self.rounds = rounds
+        # Time allowed per turn before it is skipped (0 = untimed)
+        self.pick_seconds = pick_seconds
+        self.picked = PickedBitmap(len(catalog))
+        self.teams = []
+        self.undo_stack = []
+        self.draft_queue = DraftCursor()
+        self.draft_started = False
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+        # Requests holding the session (see SessionManager.use); never evicted while > 0
+        self.users = 0
+
+    def add_team(self, name, max_points, max_budget, password):
+        team = SessionTeam(self, name, max_points, max_budget, password)
+        self.teams.append(team)
+        return team
+
+    def is_picked(self, player):
+        return bool(self.picked[self.catalog.position[player.id]])
+
+    def available(self, limit=None, category=None):
+        """Available players in draft-board order, optionally one category"""
+        return self.catalog.available(limit, category=category, picked=self.picked)
+
+    def available_count(self):
+        return len(self.picked) - self.picked.count
+
+    def apply(self, event):
+        """Apply one draft event (same shapes as the main draft's events)"""
+        kind = event['type']
+        if kind == 'budget':
+            for team_idx, new_budget in event['budgets']:
+                self.teams[team_idx].update_budget(new_budget)
+        elif kind in ('buy', 'pick'):
+            player = self.catalog.get(event['player_id'])
+            self.teams[event['team_idx']].add_player(player, is_pre_draft=kind == 'buy')
+            pick_index = self.draft_queue.pick_index if kind == 'pick' else None
+            self.undo_stack.append((event['team_idx'], player.id, event.get('round', 0), pick_index))
+            if kind == 'pick':
+                self.draft_queue.popleft()
+        elif kind == 'undo':
+            team_idx, player_id, round_num, pick_index = self.undo_stack.pop()
+            if player_id is not None:
+                self.teams[team_idx].remove_player(self.catalog.get(player_id), is_pre_draft=round_num == 0)
+            if pick_index is not None:
+                if player_id is None:
+                    self.draft_queue.skipped.pop()
+                self.draft_queue.pick_index = pick_index
+        elif kind == 'skip':
+            current_round, _ = self.draft_queue[0]
+            self.undo_stack.append((None, None, current_round, self.draft_queue.pick_index))
+            self.draft_queue.skip()
+        elif kind == 'start':
+            self.draft_queue = DraftCursor(self.rounds, len(self.teams))
+            self.draft_started = True
+
+    def status(self):
+        """JSON-ready summary of the session and the pick on the clock"""
+        draft_queue = self.draft_queue
+        status = {
+            'id': self.id,
+            'rounds': self.rounds,
+            'pick_seconds': self.pick_seconds,
+            'started': self.draft_started,
+            'finished': self.draft_started and not draft_queue,
+            'pick_index': draft_queue.pick_index,
+            'picks_remaining': len(draft_queue),
+            'available_count': self.available_count(),
+            'current': None,
+            'teams': [dict(team.to_dict(), idx=idx) for idx, team in enumerate(self.teams)],
+            'undo_stack': [{'team_idx': t, 'player_id': p, 'round': r, 'pick_index': i}
+                           for t, p, r, i in self.undo_stack],
+        }
+        if self.draft_started and draft_queue:
+            current_round, current_team_idx = draft_queue[0]
+            status['current'] = {'round': current_round, 'team_idx': current_team_idx,
+                                 'team': self.teams[current_team_idx].name}
+        return status
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'admin_password': self.admin_password,
+            'rounds': self.rounds,
+            'pick_seconds': self.pick_seconds,
+            'teams': [
+                [t.name, t.max_points, t.max_budget, t.password, t.pre_draft_count,
+                 sorted(t.bought_categories), [p.id for p in t.players]]
+                for t in self.teams
+            ],
+            'draft_started': self.draft_started,
+            'undo_stack': [list(entry) for entry in self.undo_stack],
+            'draft_cursor': self.draft_queue.to_list(),
+        }
+
+    @classmethod
+    def from_dict(cls, data, catalog):
+        """Rebuild a saved session against the current catalog (unknown players are dropped)"""
+        session = cls(data['id'], catalog, data['admin_password'], data['rounds'], data.get('pick_seconds', 0))
+        for name, max_points, max_budget, password, pre_draft_count, bought_categories, player_ids in data['teams']:
+            team = session.add_team(name, max_points, max_budget, password)
+            for player_id in player_ids:
+                player = catalog.get(player_id)
+                if player is not None:
+                    team.add_player(player)
+            team.pre_draft_count = pre_draft_count
+            team.bought_categories = set(bought_categories)
+        session.draft_started = data['draft_started']
+        # Files saved before undo rewound the cursor have no pick index: those undos leave the cursor alone
+        session.undo_stack = [(tuple(entry) + (None,))[:4] for entry in data['undo_stack']
+                              if entry[1] is None or catalog.get(entry[1]) is not None]
+        session.draft_queue = DraftCursor(*data['draft_cursor'])
+        return session
+
+
+# ======================
+# SESSION MANAGER CLASS
+# ======================
+class SessionManager:
+    """Draft sessions by ID, keeping only the recently used ones in memory.
+
+    Every session is saved to its own JSON file after each change, so
+    evicting one just drops it from memory and the next request for it
+    reloads the file. Memory therefore grows with the number of active
+    drafts, each costing one bit per catalog player plus its rosters.
+    A session a request is still using is never evicted: the request's
+    change would land on an object nobody can reach, and the next load
+    from the file would miss it.
+    The catalog is rebuilt when the pool it is read from changes; sessions
+    already in memory keep the catalog they were loaded with.
+    """
+
+    def __init__(self, load_players, directory, idle_seconds=600, max_active=256):
+        self.load_players = load_players
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        self.max_active = max_active
+        self._catalog = None
+        self._catalog_source = None
+        self._active = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def catalog(self):
+        players = self.load_players()
+        if self._catalog is None or self._catalog_source is not players or len(self._catalog) != len(players):
+            self._catalog = PlayerCatalog(players)
+            self._catalog_source = players
+        return self._catalog
+
+    def path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def exists(self, session_id):
+        return session_id in self._active or os.path.exists(self.path(session_id))
+
+    def list_ids(self):
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+
+    def create(self, session_id, admin_password, teams, rounds=DRAFT_ROUNDS, pick_seconds=0):
+        """Start a new session with teams given as (name, max_points, max_budget, password)"""
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise ValueError("Session ID may only use letters, digits, '-' and '_' (max 64)")
+        with self._lock:
+            if self.exists(session_id):
+                raise ValueError(f"Session {session_id} already exists")
+            session = DraftSession(session_id, self.catalog(), admin_password, rounds, pick_seconds)
+            for name, max_points, max_budget, password in teams:
+                session.add_team(name, max_points, max_budget, password)
+            self.save(session)
+            self._remember(session)
+        return session
+
+    def get(self, session_id, pin=False):
+        """Return the session (reloading it if it was evicted) or None.
+        With `pin`, it is kept in memory until unpin(); handlers use use()"""
+        if not SESSION_ID_PATTERN.match(session_id):
+            return None
+        with self._lock:
+            session = self._active.get(session_id)
+            if session is None:
+                try:
+                    with open(self.path(session_id), 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except FileNotFoundError:
+                    return None
+                session = DraftSession.from_dict(data, self.catalog())
+            if pin:
+                session.users += 1
+            self._remember(session)
+        return session
+
+    def unpin(self, session):
+        with self._lock:
+            session.users -= 1
+
+    @contextmanager
+    def use(self, session_id):
+        """The session (or None), locked and kept in memory for the block"""
+        session = self.get(session_id, pin=True)
+        if session is None:
+            yield None
+            return
+        try:
+            with session.lock:
+                yield session
+        finally:
+            self.unpin(session)
+
+    def save(self, session):
+        """Write a session's file atomically"""
+        path = self.path(session.id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def active_count(self):
+        return len(self._active)
+
+    def _remember(self, session):
+        session.last_used = time.monotonic()
+        self._active[session.id] = session
+        self._active.move_to_end(session.id)
+        self._evict(session.last_used)
+
+    def _evict(self, now):
+        # Least recently used first, stopping at the first recently used session
+        # (and never the one just remembered, last in the order)
+        for session_id, session in list(self._active.items())[:-1]:
+            if len(self._active) <= self.max_active and now - session.last_used < self.idle_seconds:
+                break
+            if session.users:
+                # A request still holds it; it goes on a later pass
+                continue
+            del self._active[session_id]
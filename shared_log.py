@@ -0,0 +1,81 @@
+"""
+PSL Draft Simulator - SQLite event log shared by several worker processes
+
+"""
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+
+
+# ======================
+# SHARED EVENT LOG CLASS
+# ======================
+class SharedEventLog:
+    """Draft events in one SQLite file (WAL mode) that every worker replays.
+
+    Writers take SQLite's database write lock with BEGIN IMMEDIATE, which
+    serializes picks across processes; readers never block. The `snapshot`
+    row holds the compacted state up to its `seq`, and events at or below
+    it are deleted. A worker that has fallen behind the snapshot (or whose
+    write was rolled back) restores from it before replaying newer events.
+    """
+
+    def __init__(self, path, snapshot_interval=1000):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        # One connection per process: connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=FULL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS events (seq INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS snapshot (id INTEGER PRIMARY KEY CHECK (id = 0), seq INTEGER NOT NULL, state TEXT NOT NULL)')
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """Hold the cross-process write lock for the duration of the block"""
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def has_snapshot(self):
+        return self.conn.execute('SELECT 1 FROM snapshot').fetchone() is not None
+
+    def read_since(self, last_seq):
+        """Return (snapshot or None, [(seq, event), ...]) needed to move past last_seq"""
+        snapshot = None
+        row = self.conn.execute('SELECT seq, state FROM snapshot').fetchone()
+        if row is not None and row[0] > last_seq:
+            snapshot = json.loads(row[1])
+            snapshot['seq'] = last_seq = row[0]
+        rows = self.conn.execute('SELECT seq, body FROM events WHERE seq > ? ORDER BY seq', (last_seq,))
+        return snapshot, [(seq, json.loads(body)) for seq, body in rows]
+
+    def append(self, event):
+        """Insert one event (inside a transaction) and return its sequence number"""
+        cursor = self.conn.execute('INSERT INTO events (body) VALUES (?)',
+                                   (json.dumps(event, separators=(',', ':')),))
+        return cursor.lastrowid
+
+    def needs_snapshot(self, seq):
+        row = self.conn.execute('SELECT seq FROM snapshot').fetchone()
+        return row is None or seq - row[0] >= self.snapshot_interval
+
+    def write_snapshot(self, state, seq):
+        """Store the state as of `seq` and drop the events it contains"""
+        self.conn.execute('INSERT OR REPLACE INTO snapshot (id, seq, state) VALUES (0, ?, ?)',
+                          (seq, json.dumps(state, separators=(',', ':'))))
+        self.conn.execute('DELETE FROM events WHERE seq <= ?', (seq,))
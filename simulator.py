@@ -0,0 +1,287 @@
+"""
+PSL Draft Simulator - Monte Carlo batch simulation of full snake drafts
+
+Usage:
+    python simulator.py --sims 5000 --workers 4 --seed 42
+    python simulator.py --synthetic 2000 --strategies lookahead,greedy,value,random --json
+    python simulator.py --sims 5000 --archive data/draft_archive.bin
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+import csv
+import json
+import os
+import random
+
+from archive import DraftArchive
+from autopick import choose_pick, picks_left
+from models import Player, Team, DraftCursor, DRAFT_ROUNDS, create_default_teams
+from player_index import PlayerIndex
+
+# How many of the best legal players the sampling strategies look at
+CANDIDATE_WINDOW = 10
+
+
+# ======================
+# PICK STRATEGIES
+# ======================
+# A strategy gets (team, index, picks the team has after this one, rng) and
+# returns the player to draft, or None to pass the turn.
+def legal_candidates(team, index, count):
+    """The `count` best available players the team may legally pick now"""
+    found = []
+    for player in index.iter_available(max_rating=team.max_points - team.current_points):
+        if team.can_add_player(player)[0]:
+            found.append(player)
+            if len(found) == count:
+                break
+    return found
+
+
+def pick_lookahead(team, index, remaining, rng):
+    return choose_pick(team, index, remaining)
+
+
+def pick_greedy(team, index, remaining, rng):
+    return choose_pick(team, index, 0)
+
+
+def pick_value(team, index, remaining, rng):
+    candidates = legal_candidates(team, index, CANDIDATE_WINDOW)
+    return max(candidates, key=lambda p: p.rating / max(p.price, 1), default=None)
+
+
+def pick_random(team, index, remaining, rng):
+    candidates = legal_candidates(team, index, CANDIDATE_WINDOW)
+    return rng.choice(candidates) if candidates else None
+
+
+STRATEGIES = {
+    'lookahead': pick_lookahead,
+    'greedy': pick_greedy,
+    'value': pick_value,
+    'random': pick_random,
+}
+
+
+# ======================
+# POOLS
+# ======================
+def load_pool(path):
+    """Read (id, name, rating, price, country) rows from a players CSV"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(row['id'], row['name'], int(row['rating']), int(row['price']), row['country'])
+                for row in csv.DictReader(f)]
+
+
+def synthetic_pool(count, seed=7):
+    rng = random.Random(seed)
+    countries = ['Pakistan'] * 6 + ['England', 'Australia', 'South Africa', 'New Zealand', 'West Indies', 'Sri Lanka']
+    return [(f"P{1001 + n}", f"Scouted Player {n}", rng.randint(30, 99), rng.randrange(50000, 600000, 5000),
+             rng.choice(countries)) for n in range(count)]
+
+
+# ======================
+# SIMULATION
+# ======================
+# Per-process state, set once by the pool initializer: every simulation in a
+# worker reuses the same Player objects and sorted index, un-picking after
+_worker = {}
+
+
+def init_worker(pool, team_specs, rounds, strategy_names, keep_picks=False):
+    players = [Player(name, rating, price, country, player_id=player_id)
+               for player_id, name, rating, price, country in pool]
+    index = PlayerIndex()
+    index.rebuild(players)
+    _worker.update(players=players, index=index, team_specs=team_specs, rounds=rounds,
+                   strategies=[STRATEGIES[name] for name in strategy_names], keep_picks=keep_picks)
+
+
+def simulate_draft(seed):
+    """Run one full snake draft; return (picks as (pick_number, team_idx, player), teams)"""
+    rng = random.Random(seed)
+    index = _worker['index']
+    strategies = _worker['strategies']
+    teams = [Team(*spec) for spec in _worker['team_specs']]
+    draft_queue = DraftCursor(_worker['rounds'], len(teams))
+    picks = []
+    try:
+        while draft_queue:
+            pick_number = draft_queue.pick_index
+            _, team_idx = draft_queue[0]
+            team = teams[team_idx]
+            strategy = strategies[team_idx % len(strategies)]
+            player = strategy(team, index, picks_left(draft_queue, team_idx), rng)
+            if player is None:
+                draft_queue.skip()
+                continue
+            team.add_player(player)
+            index.mark_picked(player)
+            picks.append((pick_number, team_idx, player))
+            draft_queue.popleft()
+    finally:
+        for _, _, player in picks:
+            player.is_picked = False
+            index.mark_available(player)
+    return picks, teams
+
+
+def run_chunk(seeds):
+    """Simulate a batch of seeds and return their summed statistics (plus each
+    draft's (pick_number, team_idx, player_id) picks when keeping them for the archive)"""
+    num_teams = len(_worker['team_specs'])
+    totals = {
+        'sims': 0,
+        'rating': [0] * num_teams,
+        'spent': [0] * num_teams,
+        'picks_made': [0] * num_teams,
+        'skipped': 0,
+        'drafted': {},
+        'picks': [],
+    }
+    drafted = totals['drafted']
+    for seed in seeds:
+        picks, teams = simulate_draft(seed)
+        totals['sims'] += 1
+        for team_idx, team in enumerate(teams):
+            totals['rating'][team_idx] += team.current_points
+            totals['spent'][team_idx] += team.current_budget
+            totals['picks_made'][team_idx] += len(team.players)
+        totals['skipped'] += _worker['rounds'] * num_teams - len(picks)
+        for pick_number, _, player in picks:
+            drafted.setdefault(player.id, Counter())[pick_number] += 1
+        if _worker['keep_picks']:
+            totals['picks'].append([(pick_number, team_idx, player.id) for pick_number, team_idx, player in picks])
+    return totals
+
+
+def merge(into, part):
+    into['sims'] += part['sims']
+    into['skipped'] += part['skipped']
+    for key in ('rating', 'spent', 'picks_made'):
+        into[key] = [a + b for a, b in zip(into[key], part[key])]
+    for player_id, counts in part['drafted'].items():
+        into['drafted'].setdefault(player_id, Counter()).update(counts)
+    return into
+
+
+def archive_picks(archive, draft_picks, pool, team_specs, rounds):
+    """Append simulated drafts to a DraftArchive, as the app archives real ones"""
+    details = {player_id: (name, rating, price) for player_id, name, rating, price, _ in pool}
+    team_ids = [Team(*spec).id for spec in team_specs]
+    cursor = DraftCursor(rounds, len(team_specs))
+    archive.extend(([(pick_number + 1, cursor.pick_at(pick_number)[0], team_idx, player_id) + details[player_id]
+                     for pick_number, team_idx, player_id in picks], team_ids, rounds, None)
+                   for picks in draft_picks)
+
+
+def run_simulations(pool, team_specs, sims, rounds=DRAFT_ROUNDS, strategy_names=('lookahead',),
+                    seed=0, workers=None, chunk_size=None, archive=None):
+    """Run `sims` seeded drafts over a process pool and return the aggregate report.
+
+    Simulation i always uses seed `seed + i` and the totals are sums, so the
+    report is identical whatever the worker count or chunk size. With an
+    `archive` (a DraftArchive) every simulated draft is also archived.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, min(250, sims // (workers * 4) or 1))
+    seeds = list(range(seed, seed + sims))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, sims, chunk_size)]
+    init_args = (pool, team_specs, rounds, list(strategy_names), archive is not None)
+
+    totals = None
+    if workers == 1:
+        init_worker(*init_args)
+        parts = map(run_chunk, chunks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=init_args)
+        parts = executor.map(run_chunk, chunks)
+    try:
+        for part in parts:
+            if archive is not None:
+                # Written chunk by chunk, in seed order, so the picks are never all held at once
+                archive_picks(archive, part.pop('picks'), pool, team_specs, rounds)
+            totals = part if totals is None else merge(totals, part)
+    finally:
+        if workers != 1:
+            executor.shutdown()
+    return build_report(totals, pool, team_specs, strategy_names)
+
+
+def build_report(totals, pool, team_specs, strategy_names, top=25):
+    sims = totals['sims']
+    names = {player_id: name for player_id, name, *_ in pool}
+    teams = []
+    for team_idx, (name, max_points, max_budget, _) in enumerate(team_specs):
+        teams.append({
+            'team': name,
+            'strategy': strategy_names[team_idx % len(strategy_names)],
+            'avg_rating': round(totals['rating'][team_idx] / sims, 2),
+            'avg_players': round(totals['picks_made'][team_idx] / sims, 2),
+            'avg_spent': round(totals['spent'][team_idx] / sims),
+            'budget_used': round(totals['spent'][team_idx] / sims / max_budget, 4),
+        })
+
+    players = []
+    for player_id, counts in totals['drafted'].items():
+        times = sum(counts.values())
+        players.append({
+            'id': player_id,
+            'name': names.get(player_id, player_id),
+            'drafted_pct': round(100 * times / sims, 2),
+            'avg_pick': round(sum(n * c for n, c in counts.items()) / times + 1, 2),
+            'by_pick': {n + 1: c for n, c in sorted(counts.items())},
+        })
+    players.sort(key=lambda p: (p['avg_pick'], -p['drafted_pct']))
+
+    return {
+        'sims': sims,
+        'avg_skipped_turns': round(totals['skipped'] / sims, 3),
+        'teams': teams,
+        'players': players[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run many simulated PSL drafts and aggregate the results')
+    parser.add_argument('--sims', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=DRAFT_ROUNDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per core)')
+    parser.add_argument('--players', default='data/players.csv', help='players CSV to draft from')
+    parser.add_argument('--synthetic', type=int, default=0, help='draft from N generated players instead')
+    parser.add_argument('--strategies', default='lookahead',
+                        help=f"comma separated, assigned to teams in turn ({', '.join(STRATEGIES)})")
+    parser.add_argument('--top', type=int, default=25, help='players to list in the report')
+    parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    parser.add_argument('--archive', help='also append every simulated draft to this draft archive')
+    args = parser.parse_args()
+
+    strategy_names = args.strategies.split(',')
+    unknown = [name for name in strategy_names if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategy: {', '.join(unknown)}")
+    pool = synthetic_pool(args.synthetic) if args.synthetic else load_pool(args.players)
+    team_specs = [(t.name, t.max_points, t.max_budget, t.password) for t in create_default_teams()]
+
+    archive = DraftArchive(args.archive) if args.archive else None
+    report = run_simulations(pool, team_specs, args.sims, args.rounds, strategy_names, args.seed, args.workers,
+                             archive=archive)
+    report['players'] = report['players'][:args.top]
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['sims']} drafts, {report['avg_skipped_turns']} skipped turns per draft")
+    for team in report['teams']:
+        print(f"  {team['team']:<20} {team['strategy']:<10} rating {team['avg_rating']:>8}  "
+              f"players {team['avg_players']:>5}  budget used {team['budget_used']:.1%}")
+    print("Most drafted players (by average pick):")
+    for player in report['players']:
+        print(f"  {player['name']:<24} pick {player['avg_pick']:>6}  drafted {player['drafted_pct']:>6}%")
+
+
+if __name__ == '__main__':
+    main()
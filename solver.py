@@ -0,0 +1,200 @@
+"""
+PSL Draft Simulator - Optimal roster solver for pre-draft planning
+
+"""
+import heapq
+
+from autopick import DOMESTIC_COUNTRY, FOREIGN_LIMIT
+
+# Rule Team.can_add_player enforces for pre-draft buys
+PRE_DRAFT_LIMIT = 3
+
+INFEASIBLE = float('inf')
+
+
+def reduce_pool(players, slots, points_left, budget_left, foreign_left, distinct_categories, excluded_categories,
+                top=1):
+    """Drop players none of the `top` best rosters needs.
+
+    Players who cannot fit at all are removed. Players with the same
+    rating, category and foreign status (twins) differ only in price: a
+    roster that leaves k cheaper twins out is beaten or matched by the k
+    rosters that swap one of them in. A roster holds at most `slots` twins
+    (one when categories must be distinct), so only the cheapest
+    `slots + top - 1` of them (`top`) can be in the best `top` rosters.
+    Ratings span a small range, so thousands of players shrink to a few
+    hundred candidates.
+    """
+    groups = {}
+    for player in players:
+        foreign = player.country != DOMESTIC_COUNTRY
+        if (player.rating > points_left or player.price > budget_left
+                or (foreign and foreign_left <= 0) or player.category in excluded_categories):
+            continue
+        groups.setdefault((player.rating, foreign, player.category), []).append(player)
+
+    keep = top if distinct_categories else slots + top - 1
+    items = []
+    for group in groups.values():
+        group.sort(key=lambda p: p.price)
+        items.extend(group[:keep])
+    items.sort(key=lambda p: (-p.rating, p.price))
+    return items
+
+
+def _min_sums(values, slots):
+    """table[i][s] = smallest sum of s values taken from values[i:] (memoized bottom-up)"""
+    n = len(values)
+    table = [[INFEASIBLE] * (slots + 1) for _ in range(n + 1)]
+    for i in range(n, -1, -1):
+        table[i][0] = 0
+    for i in range(n - 1, -1, -1):
+        row, below = table[i], table[i + 1]
+        value = values[i]
+        for s in range(1, slots + 1):
+            row[s] = min(below[s], value + below[s - 1])
+    return table
+
+
+def _reachable_sums(ratings, slots, points_left, exact):
+    """table[i][s] = bitset of the totals up to points_left that s ratings
+    from ratings[i:] can make (up to s of them unless `exact`)"""
+    mask = (1 << (points_left + 1)) - 1
+    # No ratings left: a total of 0, made by no players (or up to any number)
+    table = [None] * len(ratings) + [[1] + [0 if exact else 1] * slots]
+    for i in range(len(ratings) - 1, -1, -1):
+        below, rating = table[i + 1], ratings[i]
+        table[i] = [below[0]] + [below[s] | ((below[s - 1] << rating) & mask) for s in range(1, slots + 1)]
+    return table
+
+
+def solve_roster(players, points_left, budget_left, foreign_left, slots, exact=False,
+                 distinct_categories=False, excluded_categories=(), top=5, max_steps=None):
+    """Return (rosters, complete): up to `top` rosters with the highest
+    total rating, best first, and whether the search finished.
+
+    A roster has at most `slots` players (exactly `slots` with `exact`),
+    fits the points, budget and foreign caps and, with
+    `distinct_categories`, uses each category once and none of
+    `excluded_categories`. Branch and bound over the reduced pool: a
+    branch is bounded by the highest total within its points left that
+    the remaining players can make (bitsets of reachable totals, so a
+    binding points cap still prunes). The memoized cheapest-price and
+    lowest-rating tables prune branches that can no longer reach `slots`
+    players, or that could only tie the kept rosters at a higher price.
+    Ties on rating go to the cheaper roster.
+
+    Players are tried best rated first, or cheapest first when the points
+    cap binds: then every good roster totals about the cap and price
+    decides, so the cheap ones should be found early.
+
+    With `max_steps`, the search stops after trying that many players
+    (across all branches) and returns the best found so far with
+    complete=False, so the time it takes has a ceiling whatever the pool.
+    """
+    if slots <= 0:
+        return [], True
+    items = reduce_pool(players, slots, points_left, budget_left, foreign_left,
+                        distinct_categories, set(excluded_categories), top)
+    if sum(p.rating for p in items[:slots]) > points_left:
+        items.sort(key=lambda p: (p.price, -p.rating))
+    n = len(items)
+    ratings = [p.rating for p in items]
+    reachable = _reachable_sums(ratings, slots, points_left, exact)
+    min_price = _min_sums([p.price for p in items], slots)
+    min_points = _min_sums(ratings, slots) if exact else None
+    # Twins (same rating, category and foreign status) sit cheapest first.
+    # Leaving `top` cheaper twins out for a pricier one gives a roster that
+    # `top` others beat or match, so such rosters are never searched.
+    twin_rank = []
+    twin_group = []
+    group_size = {}
+    for player in items:
+        key = (player.rating, player.country != DOMESTIC_COUNTRY, player.category)
+        twin_rank.append(group_size.get(key, 0))
+        twin_group.append(key)
+        group_size[key] = twin_rank[-1] + 1
+    twins_taken = dict.fromkeys(group_size, 0)
+    steps = 0
+
+    heap = []  # worst kept roster on top: (total_rating, -total_price, positions)
+
+    def offer(total_rating, total_price, chosen):
+        key = (total_rating, -total_price, tuple(chosen))
+        if len(heap) < top:
+            heapq.heappush(heap, key)
+        elif key[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, key)
+
+    def search(start, chosen, total_rating, total_price, foreign_used, categories):
+        nonlocal steps
+        if chosen and (not exact or len(chosen) == slots):
+            offer(total_rating, total_price, chosen)
+        need = slots - len(chosen)
+        if need == 0:
+            return
+        points_room = points_left - total_rating
+        budget_room = budget_left - total_price
+        room_mask = (1 << (points_room + 1)) - 1
+        for j in range(start, n):
+            steps += 1
+            if max_steps is not None and steps > max_steps:
+                return
+            group = twin_group[j]
+            if twin_rank[j] - twins_taken[group] >= top:
+                continue
+            player = items[j]
+            if player.rating > points_room or player.price > budget_room:
+                continue
+            foreign = player.country != DOMESTIC_COUNTRY
+            if foreign and foreign_used >= foreign_left:
+                continue
+            if distinct_categories and player.category in categories:
+                continue
+            if len(heap) == top:
+                # Both bounds only get worse as j grows
+                bound = total_rating + (reachable[j][need] & room_mask).bit_length() - 1
+                if bound < heap[0][0] or (
+                        bound == heap[0][0] and total_price + min_price[j][need if exact else 1] >= -heap[0][1]):
+                    break
+            if exact and (min_price[j + 1][need - 1] > budget_room - player.price
+                          or min_points[j + 1][need - 1] > points_room - player.rating):
+                continue
+            chosen.append(j)
+            twins_taken[group] += 1
+            if distinct_categories:
+                categories.add(player.category)
+            search(j + 1, chosen, total_rating + player.rating, total_price + player.price,
+                   foreign_used + foreign, categories)
+            if distinct_categories:
+                categories.discard(player.category)
+            chosen.pop()
+            twins_taken[group] -= 1
+
+    search(0, [], 0, 0, 0, set())
+
+    rosters = []
+    for total_rating, neg_price, chosen in sorted(heap, reverse=True):
+        rosters.append({
+            'players': [items[j] for j in chosen],
+            'total_rating': total_rating,
+            'total_price': -neg_price,
+        })
+    return rosters, max_steps is None or steps <= max_steps
+
+
+def team_plan(team, size=None):
+    """solve_roster's limits for a team as it is now: its remaining
+    pre-draft buys, or `size` more players"""
+    plan = {
+        'points_left': team.max_points - team.current_points,
+        'budget_left': team.max_budget - team.current_budget,
+        'foreign_left': FOREIGN_LIMIT - team.foreign_players,
+    }
+    if size is None:
+        plan.update(slots=PRE_DRAFT_LIMIT - team.pre_draft_count, distinct_categories=True,
+                    excluded_categories=tuple(team.bought_categories))
+    else:
+        plan.update(slots=size, exact=True)
+    return plan
+
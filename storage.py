@@ -0,0 +1,643 @@
+"""
+PSL Draft Simulator - Storage backends (CSV files, event journal, SQLite)
+
+Usage:
+    python storage.py migrate --data-dir data --db data/draft.db
+"""
+import argparse
+import csv
+import os
+import sqlite3
+
+from models import Player, Team, DraftCursor, DRAFT_ROUNDS, create_demo_players, create_default_teams
+from journal import DraftJournal
+from history import DraftHistory
+from metrics import metrics
+from player_snapshot import read_snapshot, restamp_snapshot, snapshot_is_current, write_snapshot
+
+HISTORY_FIELDS = ['position', 'kind', 'team_id', 'player_id', 'round', 'pick_index']
+
+
+# Every backend loads the full state into a DraftEngine with load(),
+# records one applied event with save(event) and writes everything with
+# save_all() (used on a reset and when seeding one backend from another).
+
+
+# ======================
+# CSV STORAGE CLASS
+# ======================
+class CsvStorage:
+    """The original layout: four CSV files, each rewritten whole.
+
+    The players file also has a binary snapshot (see player_snapshot.py)
+    that startup loads instead of parsing the CSV file, as long as the CSV
+    file has not changed since. Loading from CSV writes a new snapshot, so
+    does any save that changes the pool, and a save that only changes who
+    is picked restamps it: the snapshot leaves is_picked to the rosters.
+    """
+
+    def __init__(self, engine, players_file, teams_file, team_players_file, draft_state_file, history_file=None,
+                 snapshot_file=None):
+        self.engine = engine
+        self.players_file = players_file
+        self.teams_file = teams_file
+        self.team_players_file = team_players_file
+        self.draft_state_file = draft_state_file
+        # Append-only: one row per buy, pick or skip
+        self.history_file = history_file or os.path.join(os.path.dirname(draft_state_file), 'draft_history.csv')
+        self.snapshot_file = snapshot_file or os.path.splitext(players_file)[0] + '.bin'
+
+    def save_players(self, pool_changed=True):
+        """Save all players to CSV file and bring the snapshot up to date with it"""
+        current = not pool_changed and snapshot_is_current(self.snapshot_file, self.players_file)
+        with open(self.players_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'name', 'rating', 'price', 'country', 'is_picked'])
+            for player in self.engine.players:
+                writer.writerow([
+                    player.id,
+                    player.name,
+                    player.rating,
+                    player.price,
+                    player.country,
+                    player.is_picked
+                ])
+        if current:
+            restamp_snapshot(self.snapshot_file, self.players_file)
+        else:
+            write_snapshot(self.snapshot_file, self.engine.players, Player.player_counter, self.players_file)
+
+    def save_picked_players(self):
+        """Save all players after a change to who is picked only"""
+        self.save_players(pool_changed=False)
+
+    def load_players(self):
+        """Load players from the binary snapshot, or from CSV file when the snapshot is stale"""
+        engine = self.engine
+        engine.players = []
+        engine.player_dict = {}
+
+        if not os.path.exists(self.players_file):
+            # Create default players if file doesn't exist
+            engine.players = create_demo_players()
+            engine.player_dict = {p.id: p for p in engine.players}
+            self.save_players()
+            return
+
+        snapshot = read_snapshot(self.snapshot_file, self.players_file)
+        if snapshot is not None:
+            # Players come back unpicked; load_team_players marks the ones on a roster
+            engine.players, Player.player_counter = snapshot
+            engine.player_dict = {p.id: p for p in engine.players}
+            return
+
+        with open(self.players_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            max_id = 1000
+            for row in reader:
+                player = Player(
+                    name=row['name'],
+                    rating=int(row['rating']),
+                    price=int(row['price']),
+                    country=row['country'],
+                    player_id=row['id']
+                )
+                player.is_picked = row['is_picked'] == 'True'
+                engine.players.append(player)
+                engine.player_dict[player.id] = player
+
+                # Update counter
+                id_num = int(row['id'][1:])
+                if id_num > max_id:
+                    max_id = id_num
+
+            Player.player_counter = max_id + 1
+        # The next start reads the snapshot
+        write_snapshot(self.snapshot_file, engine.players, Player.player_counter, self.players_file)
+
+    def save_teams(self):
+        """Save team configurations to CSV file"""
+        with open(self.teams_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'name', 'max_points', 'max_budget', 'password', 'current_points', 'current_budget', 'foreign_players', 'pre_draft_count'])
+            for team in self.engine.teams:
+                writer.writerow([
+                    team.id,
+                    team.name,
+                    team.max_points,
+                    team.max_budget,
+                    team.password,
+                    team.current_points,
+                    team.current_budget,
+                    team.foreign_players,
+                    team.pre_draft_count
+                ])
+
+    def load_teams(self):
+        """Load teams from CSV file"""
+        engine = self.engine
+        if not os.path.exists(self.teams_file):
+            # Create default teams if file doesn't exist
+            engine.teams = create_default_teams()
+            self.save_teams()
+            return
+
+        teams = []
+        with open(self.teams_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                # Running totals are rebuilt from the rosters once everything is loaded
+                teams.append(Team(
+                    name=row['name'],
+                    max_points=int(row['max_points']),
+                    max_budget=int(row['max_budget']),
+                    password=row['password'],
+                    team_id=row.get('id')
+                ))
+        engine.teams = teams
+
+    def save_team_players(self):
+        """Save team-player assignments to CSV file"""
+        with open(self.team_players_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['team_id', 'team_name', 'player_id', 'category'])
+            for team in self.engine.teams:
+                for player in team.players:
+                    writer.writerow([
+                        team.id,
+                        team.name,
+                        player.id,
+                        player.category
+                    ])
+
+    def load_team_players(self):
+        """Load team-player assignments from CSV file"""
+        engine = self.engine
+        if not os.path.exists(self.team_players_file):
+            return
+
+        # Clear existing players from teams
+        for team in engine.teams:
+            team.players = []
+
+        # Older files name the team only
+        teams_by_name = {team.name: team for team in engine.teams}
+        with open(self.team_players_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                team_idx = engine.team_index.get(row.get('team_id'))
+                team = engine.teams[team_idx] if team_idx is not None else teams_by_name.get(row['team_name'])
+                player = engine.player_dict.get(row['player_id'])
+
+                if team and player:
+                    team.players.append(player)
+                    player.is_picked = True
+
+    def save_draft_state(self):
+        """Save draft state, the history position and the draft cursor position to CSV file"""
+        engine = self.engine
+        draft_queue = engine.draft_queue
+        with open(self.draft_state_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['draft_started', 'history_position', 'total_rounds', 'num_teams', 'pick_index', 'skipped_picks'])
+            writer.writerow([
+                engine.draft_started,
+                engine.history.position,
+                draft_queue.total_rounds,
+                draft_queue.num_teams,
+                draft_queue.pick_index,
+                '|'.join(str(n) for n in draft_queue.skipped)
+            ])
+
+    def load_draft_state(self):
+        """Load draft state, the history and the draft cursor position from CSV files"""
+        engine = self.engine
+        engine.draft_started = False
+        engine.history = DraftHistory()
+        engine.draft_queue = DraftCursor()
+
+        if not os.path.exists(self.draft_state_file):
+            return
+
+        # Older files keep the whole undo stack in one field: let it grow past csv's 128 KB default
+        csv.field_size_limit(max(csv.field_size_limit(), 2 ** 31 - 1))
+        with open(self.draft_state_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                engine.draft_started = row['draft_started'] == 'True'
+                if os.path.exists(self.history_file):
+                    engine.history = self.load_history(row.get('history_position'))
+                elif row.get('undo_stack'):
+                    undo_stack = []
+                    for item in row['undo_stack'].split('|'):
+                        if item:
+                            team_key, player_id, round_num = item.split(',')
+                            # Older files name the team by position
+                            team_key = int(team_key) if team_key.isdigit() else team_key
+                            undo_stack.append((engine.team_id(team_key), player_id, int(round_num)))
+                    engine.history = DraftHistory.from_undo_stack(undo_stack)
+                    # Move it to the history file, which later actions append to
+                    self.save_history()
+
+                if row.get('pick_index'):
+                    skipped = [int(n) for n in row['skipped_picks'].split('|') if n]
+                    engine.draft_queue = DraftCursor(int(row['total_rounds']), int(row['num_teams']),
+                                                     int(row['pick_index']), skipped)
+                elif engine.draft_started:
+                    # Older files kept no queue: resume after the main-draft picks on record
+                    picks_made = sum(1 for entry in engine.history.applied() if entry.kind == 'pick')
+                    engine.draft_queue = DraftCursor(DRAFT_ROUNDS, len(engine.teams), picks_made)
+
+    def append_history(self):
+        """Append the action just recorded to the history file (one row, not the whole history)"""
+        history = self.engine.history
+        new_file = not os.path.exists(self.history_file)
+        with open(self.history_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(HISTORY_FIELDS)
+            writer.writerow(self._history_row(history.position - 1, history.entries[history.position - 1]))
+
+    def save_history(self):
+        """Rewrite the history file with every entry, undone ones included"""
+        with open(self.history_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(HISTORY_FIELDS)
+            for position, entry in enumerate(self.engine.history.entries):
+                writer.writerow(self._history_row(position, entry))
+
+    def load_history(self, position):
+        """Read the history file; a row for position N replaces entries N and later"""
+        entries = []
+        with open(self.history_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                del entries[int(row['position']):]
+                entries.append((row['kind'], row['team_id'] or None, row['player_id'] or None, int(row['round']),
+                                int(row['pick_index']) if row['pick_index'] else None))
+        return DraftHistory(entries, min(int(position), len(entries)) if position else None)
+
+    @staticmethod
+    def _history_row(position, entry):
+        return [position, entry.kind, entry.team_id or '', entry.player_id or '', entry.round,
+                '' if entry.pick_index is None else entry.pick_index]
+
+    # CSV files rewritten for each kind of event
+    SAVERS = {
+        'register': (save_players,),
+        'import': (save_players,),
+        'budget': (save_teams,),
+        'buy': (save_picked_players, save_teams, save_team_players, append_history, save_draft_state),
+        'pick': (save_picked_players, save_teams, save_team_players, append_history, save_draft_state),
+        'skip': (append_history, save_draft_state),
+        'undo': (save_picked_players, save_teams, save_team_players, save_draft_state),
+        'redo': (save_picked_players, save_teams, save_team_players, save_draft_state),
+        'jump': (save_picked_players, save_teams, save_team_players, save_draft_state),
+        'start': (save_draft_state,),
+        'reset': (save_players, save_teams, save_team_players, save_history, save_draft_state),
+    }
+
+    LOADERS = (load_players, load_teams, load_team_players, load_draft_state)
+
+    def load(self):
+        for load in self.LOADERS:
+            with metrics.timer('psl_storage_seconds', backend='csv', call=load.__name__):
+                load(self)
+        self.engine.rebuild_team_totals()
+        with metrics.timer('psl_index_seconds', op='rebuild'):
+            self.engine.rebuild_indexes()
+
+    def save(self, event):
+        for save in self.SAVERS[event['type']]:
+            with metrics.timer('psl_storage_seconds', backend='csv', call=save.__name__):
+                save(self)
+
+    def save_all(self):
+        self.save({'type': 'reset'})
+
+
+# ======================
+# JOURNAL STORAGE CLASS
+# ======================
+class JournalStorage:
+    """Append-only event journal compacted into periodic snapshots (journal.py)"""
+
+    def __init__(self, engine, log_path, snapshot_path, snapshot_interval=1000, seed=None):
+        self.engine = engine
+        self.journal = DraftJournal(log_path, snapshot_path, snapshot_interval)
+        # Backend read on the first start, before any snapshot exists
+        self.seed = seed
+
+    def load(self):
+        snapshot, events = self.journal.load()
+        if snapshot is not None:
+            self.engine.restore(snapshot)
+        else:
+            self.seed.load()
+        for event in events:
+            self.engine.apply(event)
+        if snapshot is None:
+            self.save_all()
+
+    def save(self, event):
+        with metrics.timer('psl_storage_seconds', backend='journal', call='append'):
+            self.journal.append(event)
+        # A bulk import can be a huge line: fold it into a snapshot straight away
+        if event['type'] in ('reset', 'import') or self.journal.needs_snapshot():
+            self.save_all()
+
+    def save_all(self):
+        with metrics.timer('psl_storage_seconds', backend='journal', call='snapshot'):
+            self.journal.write_snapshot(self.engine.snapshot())
+
+
+# ======================
+# SQLITE STORAGE CLASS
+# ======================
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    category TEXT NOT NULL,
+    is_picked INTEGER NOT NULL DEFAULT 0,
+    pool_order INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_available ON players (is_picked, category, rating DESC);
+CREATE INDEX IF NOT EXISTS players_rating ON players (rating DESC);
+
+CREATE TABLE IF NOT EXISTS teams (
+    idx INTEGER PRIMARY KEY,
+    team_id TEXT,
+    name TEXT NOT NULL UNIQUE,
+    max_points INTEGER NOT NULL,
+    max_budget INTEGER NOT NULL,
+    password TEXT NOT NULL,
+    current_points INTEGER NOT NULL,
+    current_budget INTEGER NOT NULL,
+    foreign_players INTEGER NOT NULL,
+    pre_draft_count INTEGER NOT NULL,
+    bought_categories TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS assignments (
+    player_id TEXT PRIMARY KEY REFERENCES players (id),
+    team_idx INTEGER NOT NULL REFERENCES teams (idx),
+    category TEXT NOT NULL,
+    pick_order INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assignments_team ON assignments (team_idx, pick_order);
+
+CREATE TABLE IF NOT EXISTS history (
+    position INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    team_idx INTEGER NOT NULL,
+    player_id TEXT,
+    round INTEGER NOT NULL,
+    pick_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS history_team ON history (team_idx);
+
+CREATE TABLE IF NOT EXISTS draft_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    draft_started INTEGER NOT NULL,
+    total_rounds INTEGER NOT NULL,
+    num_teams INTEGER NOT NULL,
+    pick_index INTEGER NOT NULL,
+    skipped_picks TEXT NOT NULL,
+    player_counter INTEGER NOT NULL,
+    history_position INTEGER
+);
+"""
+
+
+class SqliteStorage:
+    """Normalized tables in one SQLite file (WAL mode).
+
+    A pick is a single transaction touching only the rows it changed: the
+    player's flag, one assignment, one team, one history row and the draft
+    cursor. Undo, redo and jumps leave the history rows alone and rewrite
+    only the players, assignments and teams of the entries they cross. The
+    players table is indexed for available-by-category and by-rating
+    queries, assignments and the history by team.
+    """
+
+    def __init__(self, engine, path, seed=None):
+        self.engine = engine
+        self.path = path
+        # Backend migrated from on the first start, while the database is empty
+        self.seed = seed
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.conn.executescript(SQLITE_SCHEMA)
+        self._upgrade()
+        # History position the database holds, to know which entries an undo, redo or jump crossed
+        self.position = 0
+
+    def _upgrade(self):
+        """Bring a database written by an older version up to the current schema"""
+        conn = self.conn
+        with conn:
+            if 'team_id' not in [row[1] for row in conn.execute('PRAGMA table_info(teams)')]:
+                conn.execute('ALTER TABLE teams ADD COLUMN team_id TEXT')
+            if 'history_position' not in [row[1] for row in conn.execute('PRAGMA table_info(draft_state)')]:
+                conn.execute('ALTER TABLE draft_state ADD COLUMN history_position INTEGER')
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'undo_log'").fetchone():
+                # The undo log held buys (round 0) and picks, with no cursor positions
+                conn.execute("INSERT OR IGNORE INTO history (position, kind, team_idx, player_id, round) "
+                             "SELECT position, CASE round WHEN 0 THEN 'buy' ELSE 'pick' END, team_idx, player_id, "
+                             "round FROM undo_log")
+                conn.execute('DROP TABLE undo_log')
+
+    def is_empty(self):
+        return self.conn.execute('SELECT 1 FROM draft_state').fetchone() is None
+
+    # ----- loading -----
+    def load(self):
+        if self.is_empty():
+            # One-shot migration from the seed backend (the CSV files)
+            self.seed.load()
+            self.save_all()
+            return
+
+        engine = self.engine
+        conn = self.conn
+        engine.players = []
+        for player_id, name, rating, price, country, is_picked in conn.execute(
+                'SELECT id, name, rating, price, country, is_picked FROM players ORDER BY pool_order'):
+            player = Player(name, rating, price, country, player_id=player_id)
+            player.is_picked = bool(is_picked)
+            engine.players.append(player)
+        engine.player_dict = {p.id: p for p in engine.players}
+
+        # Rows reference teams by idx; the stored running totals are rebuilt below
+        engine.teams = [Team(name, max_points, max_budget, password, team_id=team_id)
+                        for team_id, name, max_points, max_budget, password in conn.execute(
+                            'SELECT team_id, name, max_points, max_budget, password FROM teams ORDER BY idx')]
+        for team_idx, player_id in conn.execute('SELECT team_idx, player_id FROM assignments ORDER BY pick_order'):
+            engine.teams[team_idx].players.append(engine.player_dict[player_id])
+
+        draft_started, total_rounds, num_teams, pick_index, skipped, player_counter, history_position = conn.execute(
+            'SELECT draft_started, total_rounds, num_teams, pick_index, skipped_picks, player_counter, '
+            'history_position FROM draft_state').fetchone()
+        engine.history = DraftHistory(
+            ((kind, engine.teams[team_idx].id, player_id, round_num, pick_index)
+             for kind, team_idx, player_id, round_num, pick_index in conn.execute(
+                 'SELECT kind, team_idx, player_id, round, pick_index FROM history ORDER BY position')),
+            history_position)
+        self.position = engine.history.position
+        engine.draft_started = bool(draft_started)
+        engine.draft_queue = DraftCursor(total_rounds, num_teams, pick_index,
+                                         [int(n) for n in skipped.split('|') if n])
+        Player.player_counter = player_counter
+        engine.rebuild_team_totals()
+        engine.rebuild_indexes()
+
+    # ----- row writers -----
+    def _write_player(self, player, pool_order):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO players (id, name, rating, price, country, category, is_picked, pool_order) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (player.id, player.name, player.rating, player.price, player.country, player.category,
+             int(player.is_picked), pool_order))
+
+    def _write_team(self, team_idx):
+        team = self.engine.teams[team_idx]
+        self.conn.execute(
+            'INSERT OR REPLACE INTO teams (idx, team_id, name, max_points, max_budget, password, current_points, '
+            'current_budget, foreign_players, pre_draft_count, bought_categories) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (team_idx, team.id, team.name, team.max_points, team.max_budget, team.password, team.current_points,
+             team.current_budget, team.foreign_players, team.pre_draft_count,
+             '|'.join(sorted(team.bought_categories))))
+
+    def _write_draft_state(self):
+        engine = self.engine
+        draft_queue = engine.draft_queue
+        self.conn.execute(
+            'INSERT OR REPLACE INTO draft_state (id, draft_started, total_rounds, num_teams, pick_index, '
+            'skipped_picks, player_counter, history_position) VALUES (0, ?, ?, ?, ?, ?, ?, ?)',
+            (int(engine.draft_started), draft_queue.total_rounds, draft_queue.num_teams, draft_queue.pick_index,
+             '|'.join(str(n) for n in draft_queue.skipped), Player.player_counter, engine.history.position))
+        self.position = engine.history.position
+
+    def _history_row(self, position):
+        entry = self.engine.history.entries[position]
+        return (position, entry.kind, self.engine.team_index[entry.team_id], entry.player_id, entry.round,
+                entry.pick_index)
+
+    def _write_entry(self, entry, applied):
+        """Write the rows a history entry changes when it is applied or reverted"""
+        if entry.kind == 'skip':
+            return
+        conn = self.conn
+        team_idx = self.engine.team_index[entry.team_id]
+        conn.execute('UPDATE players SET is_picked = ? WHERE id = ?', (int(applied), entry.player_id))
+        if applied:
+            conn.execute('INSERT INTO assignments (player_id, team_idx, category, pick_order) '
+                         'VALUES (?, ?, ?, (SELECT COALESCE(MAX(pick_order), 0) + 1 FROM assignments))',
+                         (entry.player_id, team_idx, self.engine.player_dict[entry.player_id].category))
+        else:
+            conn.execute('DELETE FROM assignments WHERE player_id = ?', (entry.player_id,))
+        self._write_team(team_idx)
+
+    # ----- saving -----
+    def save(self, event):
+        """Write the rows one applied event changed, in one transaction"""
+        kind = event['type']
+        if kind == 'reset':
+            self.save_all()
+            return
+
+        engine = self.engine
+        conn = self.conn
+        with metrics.timer('psl_storage_seconds', backend='sqlite', call=f'save_{kind}'), conn:
+            if kind == 'register':
+                self._write_player(engine.player_dict[event['player'][0]], len(engine.players) - 1)
+            elif kind == 'import':
+                first = len(engine.players) - len(event['players'])
+                conn.executemany(
+                    'INSERT OR REPLACE INTO players (id, name, rating, price, country, category, is_picked, '
+                    'pool_order) VALUES (?, ?, ?, ?, ?, ?, 0, ?)',
+                    ((p.id, p.name, p.rating, p.price, p.country, p.category, pool_order)
+                     for pool_order, p in enumerate(engine.players[first:], first)))
+            elif kind == 'budget':
+                for team_key, new_budget in event['budgets']:
+                    conn.execute('UPDATE teams SET max_budget = ? WHERE idx = ?',
+                                 (new_budget, engine.team_position(team_key)))
+            elif kind in ('buy', 'pick', 'skip'):
+                # A new action replaces any undone history after it
+                position = engine.history.position - 1
+                conn.execute('DELETE FROM history WHERE position >= ?', (position,))
+                conn.execute('INSERT INTO history (position, kind, team_idx, player_id, round, pick_index) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', self._history_row(position))
+                self._write_entry(engine.history.entries[position], applied=True)
+            elif kind in ('undo', 'redo', 'jump'):
+                forward = engine.history.position > self.position
+                low, high = sorted((self.position, engine.history.position))
+                for entry in engine.history.entries[low:high]:
+                    self._write_entry(entry, applied=forward)
+            self._write_draft_state()
+
+    def save_all(self):
+        """Replace every table with the current state, in one transaction"""
+        engine = self.engine
+        conn = self.conn
+        with metrics.timer('psl_storage_seconds', backend='sqlite', call='save_all'), conn:
+            for table in ('assignments', 'history', 'players', 'teams', 'draft_state'):
+                conn.execute(f'DELETE FROM {table}')
+            for pool_order, player in enumerate(engine.players):
+                self._write_player(player, pool_order)
+            for team_idx, team in enumerate(engine.teams):
+                self._write_team(team_idx)
+            conn.executemany(
+                'INSERT INTO assignments (player_id, team_idx, category, pick_order) VALUES (?, ?, ?, ?)',
+                [(player.id, team_idx, player.category, order)
+                 for order, (team_idx, player) in enumerate(
+                     ((team_idx, player) for team_idx, team in enumerate(engine.teams) for player in team.players), 1)])
+            conn.executemany(
+                'INSERT INTO history (position, kind, team_idx, player_id, round, pick_index) VALUES (?, ?, ?, ?, ?, ?)',
+                [self._history_row(position) for position in range(len(engine.history))])
+            self._write_draft_state()
+
+    def close(self):
+        self.conn.close()
+
+
+# ======================
+# MIGRATION
+# ======================
+def migrate_csv_to_sqlite(data_dir, db_path):
+    """Copy the CSV layout in data_dir into a fresh SQLite database"""
+    from engine import DraftEngine
+
+    engine = DraftEngine()
+    CsvStorage(engine,
+               os.path.join(data_dir, 'players.csv'),
+               os.path.join(data_dir, 'teams.csv'),
+               os.path.join(data_dir, 'team_players.csv'),
+               os.path.join(data_dir, 'draft_state.csv')).load()
+    storage = SqliteStorage(engine, db_path)
+    storage.save_all()
+    storage.close()
+    return len(engine.players), len(engine.teams)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PSL Draft Simulator storage tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help='copy the CSV files into an SQLite database')
+    migrate.add_argument('--data-dir', default='data')
+    migrate.add_argument('--db', default='data/draft.db')
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        num_players, num_teams = migrate_csv_to_sqlite(args.data_dir, args.db)
+        print(f"Migrated {num_players} players and {num_teams} teams into {args.db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+PSL Draft Simulator - Tests for draft sessions
+
+Usage:
+    python -m pytest -q test_sessions.py
+"""
+from models import Player, create_demo_players, create_default_teams
+from sessions import DraftSession, PickedBitmap, PlayerCatalog, SessionManager
+
+
+def started_session():
+    # Demo players take IDs from a global counter: start from P1001 every time
+    Player.player_counter = 1001
+    session = DraftSession('test', PlayerCatalog(create_demo_players()), 'admin', rounds=2)
+    for team in create_default_teams():
+        session.add_team(team.name, team.max_points, team.max_budget, team.password)
+    session.apply({'type': 'start'})
+    return session
+
+
+def current_team(session):
+    return session.status()['current']['team_idx']
+
+
+def pick_event(session, player_id):
+    current_round, team_idx = session.draft_queue[0]
+    return {'type': 'pick', 'team_idx': team_idx, 'player_id': player_id, 'round': current_round}
+
+
+def test_undo_pick_puts_the_turn_back():
+    session = started_session()
+    session.apply(pick_event(session, 'P1001'))
+    assert current_team(session) == 1
+
+    session.apply({'type': 'undo'})
+    assert current_team(session) == 0
+    assert session.draft_queue.pick_index == 0
+    assert session.teams[0].players == []
+    assert session.available_count() == len(session.catalog)
+
+
+def test_undo_skip_puts_the_turn_back():
+    session = started_session()
+    session.apply(pick_event(session, 'P1001'))
+    session.apply({'type': 'skip'})
+    assert current_team(session) == 2
+    assert session.draft_queue.skipped == [1]
+
+    session.apply({'type': 'undo'})
+    assert current_team(session) == 1
+    assert session.draft_queue.skipped == []
+    assert [p.id for p in session.teams[0].players] == ['P1001']
+
+
+def test_undo_survives_a_save_and_reload():
+    session = started_session()
+    session.apply(pick_event(session, 'P1001'))
+    session.apply({'type': 'skip'})
+    reloaded = DraftSession.from_dict(session.to_dict(), session.catalog)
+
+    reloaded.apply({'type': 'undo'})
+    reloaded.apply({'type': 'undo'})
+    assert current_team(reloaded) == 0
+    assert reloaded.teams[0].players == []
+
+
+def test_picked_bitmap_counts_as_it_goes():
+    bitmap = PickedBitmap(20)
+    assert len(bitmap.bits) == 3
+    bitmap[3] = True
+    bitmap[17] = True
+    bitmap[3] = True
+    assert (bitmap[3], bitmap[4], bitmap[17], bitmap.count) == (1, 0, 1, 2)
+    bitmap[3] = False
+    assert (bitmap[3], bitmap.count) == (0, 1)
+
+
+def test_a_session_in_use_is_not_evicted(tmp_path):
+    Player.player_counter = 1001
+    players = create_demo_players()
+    manager = SessionManager(lambda: players, str(tmp_path), max_active=1)
+    teams = [(t.name, t.max_points, t.max_budget, t.password) for t in create_default_teams()]
+    manager.create('first', 'admin', teams)
+    manager.create('second', 'admin', teams)
+
+    with manager.use('first') as first:
+        manager.get('second')
+        assert manager.active_count() == 2
+        assert manager.get('first') is first
+        first.apply({'type': 'start'})
+        manager.save(first)
+    manager.get('second')
+    assert manager.active_count() == 1
+    assert manager.get('first').draft_started
@@ -0,0 +1,80 @@
+"""
+PSL Draft Simulator - Tests for the roster solver
+
+Usage:
+    python -m pytest -q test_solver.py
+"""
+from itertools import combinations
+import random
+
+from autopick import DOMESTIC_COUNTRY
+from models import Player
+from solver import solve_roster
+
+
+def brute_force(players, points_left, budget_left, foreign_left, slots, exact=False,
+                distinct_categories=False, excluded_categories=(), top=5):
+    """(total_rating, total_price) of every roster, best first, cut to `top`"""
+    found = []
+    for size in [slots] if exact else range(1, slots + 1):
+        for roster in combinations(players, size):
+            categories = [p.category for p in roster]
+            if (sum(p.rating for p in roster) > points_left
+                    or sum(p.price for p in roster) > budget_left
+                    or sum(p.country != DOMESTIC_COUNTRY for p in roster) > foreign_left):
+                continue
+            if distinct_categories and (len(set(categories)) < size or set(categories) & set(excluded_categories)):
+                continue
+            found.append((sum(p.rating for p in roster), -sum(p.price for p in roster)))
+    found.sort(reverse=True)
+    return [(rating, -price) for rating, price in found[:top]]
+
+
+def totals(rosters):
+    return [(roster['total_rating'], roster['total_price']) for roster in rosters]
+
+
+def random_pool(rng):
+    # Few distinct ratings and prices, so many players are interchangeable
+    return [Player(f"x{n}", rng.choice([55, 60, 60, 65, 70, 85, 92]), rng.choice([10, 20, 30]),
+                   rng.choice(['Pakistan', 'Pakistan', 'England']), player_id=f"P{n}")
+            for n in range(rng.randint(3, 10))]
+
+
+def test_pricier_twin_alone_is_a_roster_of_its_own():
+    players = [Player(f"x{n}", rating, price, player_id=f"P{n}")
+               for n, (rating, price) in enumerate([(60, 10), (60, 20), (55, 10), (60, 30)])]
+    rosters, complete = solve_roster(players, 120, 56, 0, 2, exact=True, top=3)
+    assert complete
+    assert totals(rosters) == [(120, 30), (120, 40), (120, 50)]
+
+
+def test_matches_brute_force_on_random_pools():
+    for seed in range(300):
+        rng = random.Random(seed)
+        players = random_pool(rng)
+        exact = rng.random() < 0.5
+        distinct = not exact and rng.random() < 0.3
+        limits = {
+            'points_left': rng.randint(60, 300),
+            'budget_left': rng.randint(20, 100),
+            'foreign_left': rng.randint(0, 2),
+            'slots': rng.randint(1, 4),
+            'exact': exact,
+            'distinct_categories': distinct,
+            'excluded_categories': ('Silver',) if distinct and rng.random() < 0.3 else (),
+            'top': rng.randint(1, 6),
+        }
+        rosters, complete = solve_roster(players, **limits)
+        assert complete
+        assert totals(rosters) == brute_force(players, **limits), (seed, limits)
+
+
+def test_step_budget_returns_the_best_found_so_far():
+    rng = random.Random(7)
+    players = [Player(f"x{n}", rng.randint(30, 99), rng.randrange(50000, 600000, 5000), player_id=f"P{n}")
+               for n in range(2000)]
+    rosters, complete = solve_roster(players, 1000, 5000000, 3, 20, exact=True, top=1, max_steps=1000)
+    assert not complete
+    assert len(rosters) == 1 and len(rosters[0]['players']) == 20
+    assert rosters[0]['total_rating'] <= 1000 and rosters[0]['total_price'] <= 5000000